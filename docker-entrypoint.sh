@@ -12,6 +12,16 @@ else
   echo "Using external database (Neon), skipping wait..."
 fi
 
+# Metrics files of the previous run's workers would be summed in again
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+# Refuses to start on settings that break with several workers (e.g. no shared cache)
+echo "Checking deployment settings..."
+python manage.py check --deploy --fail-level ERROR
+
 echo "Running migrations..."
 python manage.py migrate --noinput
 
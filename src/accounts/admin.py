@@ -0,0 +1,26 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.forms import UserChangeForm
+
+from .identity import email_taken
+
+User = get_user_model()
+
+
+class AccountUserChangeForm(UserChangeForm):
+    def clean_email(self):
+        # Checked here; the unique index on LOWER(email) would fail the save
+        email = self.cleaned_data.get("email")
+        if email and email_taken(email, exclude_pk=self.instance.pk):
+            raise forms.ValidationError("Another user already has this email address.")
+        return email
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class AccountUserAdmin(UserAdmin):
+    form = AccountUserChangeForm
@@ -0,0 +1,89 @@
+"""
+Password hashing off the request path.
+
+PBKDF2 runs for hundreds of milliseconds per call. Handlers await it on a
+small, dedicated thread pool instead of running it inline, so the event loop
+keeps serving other requests while a hash is computed. hashlib releases the
+GIL while deriving keys, so the pool threads run in parallel with the rest of
+the process.
+
+The pool is bounded twice: PASSWORD_HASHING_WORKERS caps the CPU spent on
+hashing, and PASSWORD_HASHING_MAX_PENDING caps the calls running or waiting
+for a worker. Past that, HashingBusy is raised immediately and the API
+answers 503 with Retry-After instead of queueing without limit.
+
+Pool threads only hash; they never touch the database. Django closes a
+thread's connections at the end of each request, and these threads outlive
+every request, so a query there would leave its connection open for good.
+A hash in need of an upgrade is computed on the pool and saved by the
+caller.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class HashingBusy(Exception):
+    """The hashing pool is saturated; the caller should retry later"""
+
+
+class HashingPool:
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Created lazily so forking servers don't inherit idle threads
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hashing")
+        return self._executor
+
+    def submit(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._slots.release())
+        return future
+
+    async def run(self, func, *args):
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+
+hashing_pool = HashingPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_MAX_PENDING)
+
+
+def _verify(encoded, raw_password):
+    """check_password() without its save; returns (correct, the upgraded hash or None)"""
+    upgraded = []
+    correct = check_password(raw_password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return correct, upgraded[0] if upgraded else None
+
+
+async def acheck_password(user, raw_password):
+    """
+    user.check_password() with the hashing on the pool. A hash in need of an
+    upgrade is re-hashed there too, then saved from here.
+    """
+    correct, upgraded = await hashing_pool.run(_verify, user.password, raw_password)
+    if upgraded is not None:
+        user.password = upgraded
+        await user.asave(update_fields=["password"])
+    return correct
+
+
+async def aset_password(user, raw_password):
+    """user.set_password() on the hashing pool; the caller saves the user"""
+    await hashing_pool.run(user.set_password, raw_password)
@@ -0,0 +1,92 @@
+"""
+Username-or-email identity lookups shared by the auth endpoints.
+
+Emails match case-insensitively on LOWER(NULLIF(email, '')), the exact
+expression of the unique index added by migration 0001; blank emails map to
+NULL so they neither collide nor match. Django's iexact compiles to UPPER()
+on PostgreSQL and would not use the index. allauth stores EmailAddress.email
+lowercased (migration 0002 lowercases the addresses saved as typed before),
+so those lookups are plain indexed equality.
+"""
+from allauth.account.models import EmailAddress
+from django.contrib.auth import get_user_model
+from django.db.models import CharField, Func, Q
+from django.db.models.functions import Lower
+
+User = get_user_model()
+
+
+class BlankAsNull(Func):
+    # '' is inlined rather than bound as a parameter so the SQL matches the
+    # index expression; SQLite won't use it for NULLIF(email, ?)
+    template = "NULLIF(%(expressions)s, '')"
+    output_field = CharField()
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def _users():
+    return User.objects.annotate(email_key=Lower(BlankAsNull("email")))
+
+
+def _email_q(email):
+    return Q(email_key=normalize_email(email))
+
+
+def _identity_queryset(login):
+    return _users().filter(Q(username=login) | _email_q(login))
+
+
+def _pick(users, login):
+    # A username match wins over another account's email
+    for user in users:
+        if user.username == login:
+            return user
+    return users[0] if users else None
+
+
+def find_user(login):
+    """Return the user whose username or email is login, or None"""
+    return _pick(list(_identity_queryset(login)[:2]), login)
+
+
+async def afind_user(login):
+    return _pick([user async for user in _identity_queryset(login)[:2]], login)
+
+
+def find_user_by_email(email):
+    return _users().filter(_email_q(email)).first()
+
+
+def identity_conflict(username, email):
+    """
+    Return "username" or "email" when a signup would collide with an
+    existing account, else None
+    """
+    usernames = list(
+        _users()
+        .filter(Q(username=username) | _email_q(email))
+        .values_list("username", flat=True)[:2]
+    )
+    if username in usernames:
+        return "username"
+    return "email" if usernames else None
+
+
+def email_taken(email, exclude_pk=None):
+    """Whether a user other than exclude_pk has email, ignoring case"""
+    users = _users().filter(_email_q(email))
+    if exclude_pk is not None:
+        users = users.exclude(pk=exclude_pk)
+    return users.exists()
+
+
+def find_email_address(email, **filters):
+    """Return the allauth EmailAddress for email, with its user, or None"""
+    return (
+        EmailAddress.objects.select_related("user")
+        .filter(email=normalize_email(email), **filters)
+        .first()
+    )
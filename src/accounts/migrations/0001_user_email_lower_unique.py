@@ -0,0 +1,34 @@
+from django.db import migrations
+
+INDEX_NAME = "accounts_user_email_lower_uniq"
+
+
+def check_duplicate_emails(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT LOWER(email) FROM auth_user WHERE email <> '' "
+            "GROUP BY LOWER(email) HAVING COUNT(*) > 1"
+        )
+        duplicates = [row[0] for row in cursor.fetchall()]
+    if duplicates:
+        raise RuntimeError(
+            "Cannot add a case-insensitive unique email index: these emails "
+            f"belong to several users: {', '.join(duplicates[:20])}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        # Blank emails become NULL, which never collides. The expression must
+        # match accounts.identity's lookups exactly for the index to be used
+        migrations.RunSQL(
+            f"CREATE UNIQUE INDEX {INDEX_NAME} ON auth_user (LOWER(NULLIF(email, '')))",
+            f"DROP INDEX {INDEX_NAME}",
+        ),
+    ]
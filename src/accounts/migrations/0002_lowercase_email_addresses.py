@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_email_addresses(apps, schema_editor):
+    """
+    Signups used to store EmailAddress.email as typed; lookups now match the
+    lowercased address. Rows whose lowercased form already exists are left
+    alone (that row is found instead) rather than broken on allauth's
+    unique constraints.
+    """
+    EmailAddress = apps.get_model("account", "EmailAddress")
+    addresses = EmailAddress.objects.using(schema_editor.connection.alias)
+    for pk, email in addresses.exclude(email=Lower("email")).values_list("pk", "email").iterator():
+        if not addresses.filter(email=email.lower()).exists():
+            addresses.filter(pk=pk).update(email=email.lower())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_user_email_lower_unique'),
+        ('account', '0009_emailaddress_unique_primary_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_email_addresses, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,212 @@
+import threading
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
+
+from allauth.account.models import EmailAddress
+from allauth.core.exceptions import ImmediateHttpResponse
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.db.models import Model
+from django.test import RequestFactory, TestCase, override_settings
+from ninja_jwt.tokens import RefreshToken
+
+from helpers.api_auth import CachedUserJWTAuth
+from helpers.cache import response_cache
+from helpers.socialaccount_adapter import CustomSocialAccountAdapter
+
+from .admin import AccountUserChangeForm
+from .hashing import HashingBusy, HashingPool, hashing_pool
+from .identity import find_email_address
+
+User = get_user_model()
+
+lowercase_migration = import_module("accounts.migrations.0002_lowercase_email_addresses")
+
+
+class EmailCaseTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("ana", "Ana@Example.com", "pw", is_active=False)
+
+    def lowercase_addresses(self):
+        lowercase_migration.lowercase_email_addresses(apps, SimpleNamespace(connection=connection))
+
+    def test_addresses_saved_as_typed_are_found_after_the_migration(self):
+        EmailAddress.objects.create(user=self.user, email="Ana@Example.com", primary=True, verified=False)
+        self.assertIsNone(find_email_address("ana@example.com"))
+        self.lowercase_addresses()
+        with mock.patch("core.api.queue_mail") as queue_mail:
+            response = self.client.post(
+                "/api/auth/resend-verification", {"email": "ANA@example.com"}, content_type="application/json"
+            )
+        self.assertTrue(response.json()["success"], response.content)
+        self.assertEqual(queue_mail.call_args.kwargs["recipient_list"], ["ana@example.com"])
+
+    def test_migration_leaves_addresses_whose_lowercase_form_exists(self):
+        EmailAddress.objects.create(user=self.user, email="ana@example.com", primary=True, verified=True)
+        EmailAddress.objects.create(user=self.user, email="ANA@example.com", primary=False, verified=False)
+        self.lowercase_addresses()
+        self.assertEqual(
+            sorted(EmailAddress.objects.values_list("email", flat=True)), ["ANA@example.com", "ana@example.com"]
+        )
+
+    def form_data(self, user, email):
+        return {
+            "username": user.username,
+            "email": email,
+            "date_joined": "2026-01-01 00:00:00",
+        }
+
+    def test_admin_rejects_an_email_taken_in_another_case(self):
+        other = User.objects.create_user("bo", "bo@example.com", "pw")
+        form = AccountUserChangeForm(self.form_data(other, "ANA@example.com"), instance=other)
+        self.assertFalse(form.is_valid())
+        self.assertIn("email", form.errors)
+        # A user keeps their own address in any case
+        form = AccountUserChangeForm(self.form_data(self.user, "ana@EXAMPLE.com"), instance=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_social_signup_with_a_taken_email_redirects_with_an_error(self):
+        request = RequestFactory().get("/")
+        with mock.patch(
+            "allauth.socialaccount.adapter.DefaultSocialAccountAdapter.save_user", side_effect=IntegrityError()
+        ):
+            with self.assertRaises(ImmediateHttpResponse) as raised:
+                CustomSocialAccountAdapter(request).save_user(request, mock.Mock())
+        self.assertIn("error=email_exists", raised.exception.response["Location"])
+
+
+class AccountMailTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("ana", "ana@example.com", "pw")
+
+    def post(self, url, payload):
+        return self.client.post(url, payload, content_type="application/json").json()
+
+    def test_forgot_password_queues_the_reset_email(self):
+        with mock.patch("core.api.queue_mail") as queue_mail:
+            data = self.post("/api/auth/forgot-password", {"email": "ana@example.com"})
+        self.assertTrue(data["success"])
+        self.assertEqual(queue_mail.call_args.kwargs["recipient_list"], ["ana@example.com"])
+
+    def test_forgot_password_reports_a_mail_queue_outage(self):
+        with mock.patch("core.api.queue_mail", side_effect=ConnectionRefusedError("broker down")):
+            data = self.post("/api/auth/forgot-password", {"email": "ana@example.com"})
+        self.assertFalse(data["success"])
+        self.assertIn("broker down", data["message"])
+
+
+class PasswordHashingTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("ana", "ana@example.com", "pw")
+
+    def login(self, password="pw"):
+        return self.client.post(
+            "/api/token/pair", {"username": "ana", "password": password}, content_type="application/json"
+        )
+
+    def test_pool_refuses_calls_past_its_bound(self):
+        pool = HashingPool(workers=1, max_pending=1)
+        release = threading.Event()
+        future = pool.submit(release.wait)
+        with self.assertRaises(HashingBusy):
+            pool.submit(int)
+        release.set()
+        future.result()
+        # The slot is given back once the call is done
+        self.assertEqual(pool.submit(int, "7").result(), 7)
+
+    def test_busy_pool_answers_503(self):
+        with mock.patch.object(hashing_pool, "submit", side_effect=HashingBusy()):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_wrong_password_is_refused(self):
+        self.assertEqual(self.login("nope").status_code, 401)
+
+    @override_settings(PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ])
+    def test_outdated_hash_is_upgraded_and_saved_off_the_pool(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password("pw", hasher="md5"))
+        saving_threads = []
+        save = Model.save
+
+        def record_save(instance, *args, **kwargs):
+            saving_threads.append(threading.current_thread().name)
+            return save(instance, *args, **kwargs)
+
+        with mock.patch.object(Model, "save", record_save):
+            response = self.login()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+        self.assertTrue(saving_threads)
+        self.assertFalse([name for name in saving_threads if name.startswith("password-hashing")])
+
+
+class CachedUserJWTAuthTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.local.clear()
+        self.user = User.objects.create_user("ana", "ana@example.com", "pw")
+        self.token = RefreshToken.for_user(self.user).access_token
+
+    def get(self, path="/api/me"):
+        return self.client.get(path, HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_user_is_loaded_once_then_served_from_the_snapshot(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get().status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.get()
+        self.assertEqual(response.json()["username"], "ana")
+
+    def test_snapshot_leaves_the_password_out(self):
+        user = async_to_sync(CachedUserJWTAuth().aget_user)(self.token)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.get_deferred_fields(), {"password"})
+        # Loaded on first access
+        self.assertTrue(user.check_password("pw"))
+
+    def save_user(self, **fields):
+        for name, value in fields.items():
+            setattr(self.user, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+    def test_deactivating_or_deleting_the_user_takes_effect_on_commit(self):
+        self.assertEqual(self.get().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            # Still the committed snapshot until then
+            self.assertEqual(self.get().status_code, 200)
+        self.assertEqual(self.get().status_code, 401)
+
+        self.save_user(is_active=True)
+        self.assertEqual(self.get().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_staff_flag_changes_are_seen_on_the_next_request(self):
+        path = "/api/waitlists/export/"
+        self.assertEqual(self.get(path).status_code, 403)
+        self.save_user(is_staff=True)
+        self.assertEqual(self.get(path).status_code, 200)
+
+    @override_settings(AUTH_USER_CACHE_TTL=60)
+    def test_writes_that_bypass_signals_wait_for_the_ttl(self):
+        self.assertEqual(self.get().status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get().status_code, 200)
+        cache.clear()
+        response_cache.local.clear()
+        self.assertEqual(self.get().status_code, 401)
@@ -0,0 +1,377 @@
+"""
+Latency, throughput and SQL query benchmark for every API route.
+
+Runs in-process on a throwaway test database seeded by generate_load_data,
+so it never touches real data and needs no running server. From src/:
+
+    python -m benchmarks.api_suite --output report.json
+    python -m benchmarks.api_suite --baseline benchmarks/baseline.json --fail-on-regression
+
+Every scenario first runs once cold and once warm on the main thread to
+record its SQL query counts, then `--requests` times from `--concurrency`
+threads, each with its own test client and database connection. The JSON
+report holds p50/p95/p99, throughput, errors and query counts per scenario;
+with --baseline the same figures are compared against a stored report.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+from .loadgen import summarize
+
+# Regression thresholds for --baseline (relative change)
+LATENCY_TOLERANCE = 0.20
+THROUGHPUT_TOLERANCE = 0.20
+
+
+def setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+    from django.conf import settings
+
+    database = settings.DATABASES["default"]
+    if database["ENGINE"].endswith("sqlite3"):
+        # Threads can't share an in-memory test database; writers queue on
+        # the file lock instead of failing fast
+        database.setdefault("TEST", {})["NAME"] = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+        database.setdefault("OPTIONS", {})["timeout"] = 60
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from core.celery import app
+
+    setup_test_environment()
+    # No broker: tasks run inline, inside the request being measured
+    app.conf.task_always_eager = True
+    connection.creation.create_test_db(verbosity=0)
+
+
+def seed(args):
+    from django.core.management import call_command
+
+    call_command(
+        "generate_load_data",
+        projects=args.projects,
+        users=args.users,
+        waitlist=args.waitlist,
+        contacts=args.contacts,
+        stdout=open(os.devnull, "w"),
+    )
+
+
+class State:
+    """Fixtures shared by the scenarios, created after seeding"""
+
+    def __init__(self, pool_size):
+        from allauth.account.models import EmailAddress, EmailConfirmationHMAC
+        from django.contrib.auth import get_user_model
+        from ninja_jwt.tokens import RefreshToken
+
+        from projects.models import Project
+        from waitlists.models import WaitlistEntry
+
+        User = get_user_model()
+        self.password = "bench-password"
+        self.user = User.objects.create_user("bench", "bench@example.com", self.password)
+        refresh = RefreshToken.for_user(self.user)
+        self.refresh = str(refresh)
+        self.access = str(refresh.access_token)
+
+        unverified = User.objects.create_user("bench-unverified", "unverified@example.com", is_active=False)
+        address = EmailAddress.objects.create(user=unverified, email=unverified.email, primary=True)
+        self.unverified_email = unverified.email
+        self.confirmation_key = EmailConfirmationHMAC(address).key
+
+        self.project_ids = list(Project.objects.values_list("id", flat=True)[:pool_size])
+        self.project_id = self.project_ids[0]
+        self.next_cursor = None
+        self.reset_user_ids = list(
+            User.objects.filter(username__startswith="load-user-").values_list("id", flat=True)[:pool_size]
+        )
+        self.entry_id = WaitlistEntry.objects.create(user=self.user, email=self.user.email).id
+
+        # Rows consumed by the delete scenarios, one per request
+        self.deletable_projects = iter(Project.objects.bulk_create(
+            [Project(**project_fields(f"bench-delete-{i}")) for i in range(pool_size + 2)]
+        ))
+        self.deletable_entries = iter(WaitlistEntry.objects.bulk_create(
+            [WaitlistEntry(user=self.user, email=f"delete-{i}@example.com") for i in range(pool_size + 2)]
+        ))
+        self.counter = itertools.count()
+
+
+def project_fields(external_id):
+    return {
+        "external_id": external_id,
+        "name": f"Benchmark {external_id}",
+        "description": "Benchmark project",
+        "due_date": "20 Dec 2025",
+        "digitalpath_responsible": "Sarah Chen",
+        "client_responsible": "Michael Roberts",
+        "budget": "$10,500 AUD",
+        "implementation_time": "3 weeks",
+        "last_update": "2 hours ago",
+        "full_scope": "Benchmark scope",
+    }
+
+
+def bulk_payload(state, i):
+    projects = []
+    for n in range(50):
+        item = project_fields(f"bench-bulk-{n}")
+        item["data_sources"] = [{"name": "Claims feed", "type": "API", "description": "x", "order": 1}]
+        item["reports"] = [{"name": "Weekly", "frequency": "Weekly", "description": "x", "order": 1}]
+        item["analytics"] = []
+        item["ai_integration"] = {"enabled": True, "features": ["Summaries"], "models": []}
+        projects.append(item)
+    return {"projects": projects}
+
+
+def reset_payload(state, i):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.tokens import default_token_generator
+    from django.utils.encoding import force_bytes
+    from django.utils.http import urlsafe_base64_encode
+
+    user = get_user_model().objects.get(pk=state.reset_user_ids[i % len(state.reset_user_ids)])
+    return {
+        "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+        "token": default_token_generator.make_token(user),
+        "new_password": "bench-new-password",
+    }
+
+
+def list_page_two(state, i):
+    return f"/api/projects/?cursor={state.next_cursor}" if state.next_cursor else "/api/projects/"
+
+
+# name, method, path (str or callable), body (None, dict or callable),
+# auth ("jwt", "session" or None), ok statuses, share of --requests
+SCENARIOS = [
+    ("hello", "GET", "/api/hello", None, None, (200,), 1),
+    ("token pair", "POST", "/api/token/pair",
+        lambda state, i: {"username": "bench", "password": state.password}, None, (200,), 0.1),
+    ("token refresh", "POST", lambda state, i: f"/api/token/refresh?refresh_token={state.refresh}",
+        None, None, (200,), 1),
+    ("me", "GET", "/api/me", None, "jwt", (200,), 1),
+    ("signup", "POST", "/api/auth/signup",
+        lambda state, i: {"username": f"bench-signup-{i}", "email": f"bench-signup-{i}@example.com",
+                          "password": "bench-password"}, None, (200,), 0.1),
+    ("verify email", "POST", "/api/auth/verify-email",
+        lambda state, i: {"key": state.confirmation_key}, None, (200,), 1),
+    ("resend verification", "POST", "/api/auth/resend-verification",
+        lambda state, i: {"email": state.unverified_email}, None, (200,), 1),
+    ("forgot password", "POST", "/api/auth/forgot-password",
+        lambda state, i: {"email": "bench@example.com"}, None, (200,), 1),
+    ("reset password", "POST", "/api/auth/reset-password", reset_payload, None, (200,), 0.1),
+    ("contact", "POST", "/api/contact",
+        lambda state, i: {"name": "Bench", "email": f"bench-{i}@example.com", "message": "Hello"},
+        None, (200,), 1),
+    ("waitlist list", "GET", "/api/waitlists/", None, "jwt", (200,), 1),
+    ("waitlist create", "POST", "/api/waitlists/",
+        lambda state, i: {"email": f"bench-wait-{i}@example.com"}, "jwt", (201,), 1),
+    ("waitlist detail", "GET", lambda state, i: f"/api/waitlists/{state.entry_id}/", None, "jwt", (200,), 1),
+    ("waitlist update", "PUT", lambda state, i: f"/api/waitlists/{state.entry_id}/",
+        lambda state, i: {"description": f"update {i}"}, "jwt", (200,), 1),
+    ("waitlist delete", "DELETE", lambda state, i: f"/api/waitlists/{next(state.deletable_entries).id}/delete/",
+        None, "jwt", (200,), 1),
+    ("projects list", "GET", "/api/projects/", None, "session", (200,), 1),
+    ("projects list page 2", "GET", list_page_two, None, "session", (200,), 1),
+    ("projects list sparse", "GET", "/api/projects/?fields=name,status", None, "session", (200,), 1),
+    ("projects detail", "GET", lambda state, i: f"/api/projects/{state.project_ids[i % len(state.project_ids)]}/",
+        None, "session", (200,), 1),
+    ("projects summary", "GET", "/api/projects/summary/", None, "session", (200,), 1),
+    ("projects search", "GET", "/api/projects/search/?q=claims%20pipeline", None, "session", (200,), 1),
+    ("projects create", "POST", "/api/projects/",
+        lambda state, i: project_fields(f"bench-create-{i}"), "session", (201,), 1),
+    ("projects update", "PUT", lambda state, i: f"/api/projects/{state.project_id}/",
+        lambda state, i: project_fields(f"bench-update-{state.project_id}"), "session", (200,), 1),
+    ("projects delete", "DELETE", lambda state, i: f"/api/projects/{next(state.deletable_projects).id}/",
+        None, "session", (204,), 1),
+    ("projects bulk", "POST", "/api/projects/bulk/", bulk_payload, "session", (200,), 0.1),
+]
+
+
+def make_client(state, auth):
+    from django.test import Client
+
+    if auth == "jwt":
+        return Client(HTTP_AUTHORIZATION=f"Bearer {state.access}")
+    client = Client()
+    if auth == "session":
+        client.force_login(state.user)
+    return client
+
+
+def send(client, state, method, path, body, i):
+    path = path(state, i) if callable(path) else path
+    body = body(state, i) if callable(body) else body
+    if method == "GET":
+        return client.get(path)
+    return client.generic(method, path, json.dumps(body) if body is not None else "", "application/json")
+
+
+def count_queries(client, state, scenario):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    _name, method, path, body, _auth, ok_statuses, _share = scenario
+    counts = []
+    for _ in range(2):
+        with CaptureQueriesContext(connection) as queries:
+            response = send(client, state, method, path, body, next(state.counter))
+        if response.status_code not in ok_statuses:
+            raise RuntimeError(f"{scenario[0]}: unexpected {response.status_code} {response.content[:200]!r}")
+        counts.append(len(queries))
+    return counts
+
+
+def run_scenario(state, scenario, total, concurrency):
+    from django.db import connections
+
+    _name, method, path, body, auth, ok_statuses, _share = scenario
+    latencies = []
+    errors = [0]
+    first_error = []
+    lock = threading.Lock()
+
+    def worker():
+        client = make_client(state, auth)
+        local_latencies, local_errors = [], 0
+        while True:
+            i = next(state.counter)
+            with lock:
+                if total[0] <= 0:
+                    break
+                total[0] -= 1
+            started = time.perf_counter()
+            try:
+                response = send(client, state, method, path, body, i)
+                error = None if response.status_code in ok_statuses else f"HTTP {response.status_code}"
+            except Exception as e:
+                error = repr(e)
+            if error is None:
+                local_latencies.append(time.perf_counter() - started)
+            else:
+                local_errors += 1
+                first_error[:] = first_error or [error]
+        connections.close_all()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = summarize(latencies, errors[0], time.perf_counter() - started)
+    if first_error:
+        stats["first_error"] = first_error[0]
+    return stats
+
+
+def compare(report, baseline):
+    """Return human-readable regressions of report against baseline"""
+    regressions = []
+    for name, stats in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        if stats["queries"] > before["queries"]:
+            regressions.append(f"{name}: queries {before['queries']} -> {stats['queries']}")
+        if before["p95_ms"] and stats["p95_ms"] > before["p95_ms"] * (1 + LATENCY_TOLERANCE):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {stats['p95_ms']}ms")
+        if stats["throughput_rps"] < before["throughput_rps"] * (1 - THROUGHPUT_TOLERANCE):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {stats['throughput_rps']} rps")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario (scaled for slow ones)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--waitlist", type=int, default=5000)
+    parser.add_argument("--contacts", type=int, default=5000)
+    parser.add_argument("--only", nargs="+", default=None, help="run only scenarios whose name contains one of these")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="JSON report to compare against")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+
+    seed(args)
+    state = State(args.requests)
+    first_page = make_client(state, "session").get("/api/projects/?page_size=50").json()
+    state.next_cursor = first_page["next"].split("cursor=")[1].split("&")[0] if first_page["next"] else None
+
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if not args.only or any(word in scenario[0] for word in args.only)
+    ]
+    report = {
+        "meta": {
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "projects": args.projects,
+            "users": args.users,
+            "waitlist": args.waitlist,
+            "contacts": args.contacts,
+        },
+        "scenarios": {},
+    }
+
+    print(f"{'scenario':<24}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'queries':>9}")
+    for scenario in scenarios:
+        name, method, _path, _body, auth, _ok, share = scenario
+        cold, warm = count_queries(make_client(state, auth), state, scenario)
+        total = [max(1, int(args.requests * share))]
+        concurrency = args.concurrency
+        if connection.vendor == "sqlite" and method != "GET":
+            # SQLite has a single writer, and transactions that read before
+            # writing fail on the lock upgrade instead of queueing
+            concurrency = 1
+        stats = run_scenario(state, scenario, total, concurrency)
+        stats["concurrency"] = concurrency
+        stats["queries_cold"] = cold
+        stats["queries"] = warm
+        report["scenarios"][name] = stats
+        print(
+            f"{name:<24}{stats['throughput_rps']:>9}{stats['p50_ms']:>9}{stats['p95_ms']:>9}"
+            f"{stats['p99_ms']:>9}{stats['errors']:>8}{f'{cold}/{warm}':>9}"
+        )
+        if "first_error" in stats:
+            print(f"    first error: {stats['first_error'][:200]}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f))
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if not regressions:
+            print("No regressions against the baseline")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare WSGI and ASGI throughput for the async Ninja endpoints.
+
+Start both servers against the same database, e.g.
+
+    gunicorn -w 3 -b 127.0.0.1:8001 core.wsgi:application
+    gunicorn -w 1 -k uvicorn.workers.UvicornWorker -b 127.0.0.1:8002 core.asgi:application
+
+then run from src/:
+
+    python -m benchmarks.asgi_vs_wsgi --token <access JWT> --concurrency 200
+
+The WSGI server can only have as many requests in flight as it has workers,
+so under high concurrency its latency grows with queueing while the single
+ASGI worker keeps serving every in-flight request.
+"""
+import argparse
+import json
+
+from .loadgen import run_load
+
+PATHS = ["/api/hello", "/api/me", "/api/waitlists/"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wsgi-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--asgi-url", default="http://127.0.0.1:8002")
+    parser.add_argument("--token", default="", help="access token for the authenticated endpoints")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    paths = PATHS if args.token else PATHS[:1]
+    results = {}
+    for label, base_url in (("wsgi", args.wsgi_url), ("asgi", args.asgi_url)):
+        for path in paths:
+            results[f"{label} {path}"] = run_load(
+                base_url + path, args.requests, args.concurrency, headers=headers
+            )
+
+    print(f"{'server / path':<28}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, stats in results.items():
+        print(
+            f"{name:<28}{stats['throughput_rps']:>10}{stats['p50_ms']:>10}"
+            f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>8}"
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Minimal closed-loop HTTP load generator (stdlib only).
+
+Each of `concurrency` threads keeps one keep-alive connection open and fires
+requests back to back until the shared request budget is spent.
+"""
+import http.client
+import itertools
+from collections import Counter
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, errors, elapsed, statuses=None):
+    ms = [latency * 1000 for latency in latencies]
+    summary = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+    }
+    if statuses is not None:
+        summary["statuses"] = {str(status): count for status, count in sorted(statuses.items())}
+    return summary
+
+
+def run_load(url, total, concurrency, method="GET", headers=None, body=None, ok_statuses=(200,)):
+    """
+    Send `total` requests to url with `concurrency` parallel clients and
+    return the summary produced by summarize()
+    """
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    connection_class = (
+        http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    )
+    budget = itertools.count()
+    latencies = []
+    errors = [0]
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        connection = connection_class(parts.netloc, timeout=60)
+        local_latencies, local_errors, local_statuses = [], 0, Counter()
+        while next(budget) < total:
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers or {})
+                response = connection.getresponse()
+                response.read()
+                local_statuses[response.status] += 1
+                if response.status in ok_statuses:
+                    local_latencies.append(time.perf_counter() - started)
+                else:
+                    local_errors += 1
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                connection.close()
+                connection = connection_class(parts.netloc, timeout=60)
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+            statuses.update(local_statuses)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started, statuses)
@@ -0,0 +1,87 @@
+"""
+Login throughput, and the latency of other endpoints during a login flood.
+
+Start the server as deployed (see the Dockerfile), e.g.
+
+    gunicorn -w 1 -k uvicorn.workers.UvicornWorker -b 127.0.0.1:8002 core.asgi:application
+
+then run from src/ with an existing account:
+
+    python -m benchmarks.login_flood --username alice --password secret
+
+The probe endpoints are measured twice: on an idle server, then while
+`--flood-concurrency` clients post to /api/token/pair back to back. Logins
+answered 503 (hashing pool saturated) show up in the status breakdown.
+"""
+import argparse
+import json
+import threading
+import urllib.request
+
+from .loadgen import run_load
+
+PROBE_PATHS = ["/api/hello", "/api/me"]
+
+
+def obtain_access_token(base_url, username, password):
+    request = urllib.request.Request(
+        base_url + "/api/token/pair",
+        data=json.dumps({"username": username, "password": password}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["access"]
+
+
+def probe(base_url, headers, requests, concurrency):
+    return {
+        path: run_load(base_url + path, requests, concurrency, headers=headers)
+        for path in PROBE_PATHS
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8002")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200, help="login requests in the flood")
+    parser.add_argument("--flood-concurrency", type=int, default=50)
+    parser.add_argument("--probe-requests", type=int, default=200)
+    parser.add_argument("--probe-concurrency", type=int, default=5)
+    args = parser.parse_args()
+
+    token = obtain_access_token(args.url, args.username, args.password)
+    headers = {"Authorization": f"Bearer {token}"}
+    body = json.dumps({"username": args.username, "password": args.password})
+
+    idle = probe(args.url, headers, args.probe_requests, args.probe_concurrency)
+
+    login = {}
+
+    def flood():
+        login.update(run_load(
+            args.url + "/api/token/pair", args.logins, args.flood_concurrency, method="POST",
+            headers={"Content-Type": "application/json"}, body=body,
+        ))
+
+    flood_thread = threading.Thread(target=flood)
+    flood_thread.start()
+    flooded = probe(args.url, headers, args.probe_requests, args.probe_concurrency)
+    flood_thread.join()
+
+    print(f"{'probe':<16}{'idle p50':>10}{'idle p99':>10}{'flood p50':>11}{'flood p99':>11}{'flood rps':>11}")
+    for path in PROBE_PATHS:
+        print(
+            f"{path:<16}{idle[path]['p50_ms']:>10}{idle[path]['p99_ms']:>10}"
+            f"{flooded[path]['p50_ms']:>11}{flooded[path]['p99_ms']:>11}{flooded[path]['throughput_rps']:>11}"
+        )
+    print(
+        f"logins: {login['throughput_rps']} rps, p50 {login['p50_ms']} ms, "
+        f"p99 {login['p99_ms']} ms, statuses {login['statuses']}"
+    )
+    print(json.dumps({"idle": idle, "flood": flooded, "login": login}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Measure the mail pipeline against one SMTP connection per message.
+
+Runs in-process against benchmarks.smtp_stub and a throwaway test database.
+From src/:
+
+    python -m benchmarks.mail_pipeline --messages 500 --signups 50 --connect-delay 0.05
+
+Two measurements:
+
+* throughput: --messages emails through django.core.mail.send_mail (a new
+  connection each) versus queue_mail() followed by the drain_mail_queue task
+  run as a worker runs it, in batches over the process's persistent
+  connection;
+* signup latency: --signups POSTs to /api/auth/signup with the verification
+  email sent inline through send_mail (the old path) versus queued, which
+  puts it on the mail queue at CELERY_BROKER_URL (in-memory unless set). A fast
+  password hasher is used so the figures isolate the cost of mail.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from .loadgen import percentile
+from .smtp_stub import SMTPStub
+
+
+def setup(port):
+    os.environ.update(
+        DJANGO_SETTINGS_MODULE="core.settings",
+        EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+        EMAIL_HOST="127.0.0.1",
+        EMAIL_PORT=str(port),
+        EMAIL_USE_TLS="False",
+        EMAIL_USE_SSL="False",
+        EMAIL_HOST_USER="",
+        EMAIL_HOST_PASSWORD="",
+    )
+    os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.db import connection
+
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    # Not setup_test_environment(): it would swap in the locmem email backend
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+    connection.creation.create_test_db(verbosity=0)
+
+
+def throughput(stub, count):
+    from django.conf import settings
+    from django.core.mail import send_mail
+
+    from helpers.mail import drain_mail_queue, queue_mail
+
+    results = {}
+    for label, send in (("send_mail", send_mail), ("pipeline", queue_mail)):
+        connections, messages = stub.connections, stub.messages
+        started = time.perf_counter()
+        for i in range(count):
+            send(f"Message {i}", "Body", settings.DEFAULT_FROM_EMAIL, [f"user{i}@example.com"])
+        if send is queue_mail:
+            drain_mail_queue.apply()
+        # The stub counts a message once its DATA is acknowledged
+        while stub.messages - messages < count:
+            time.sleep(0.001)
+        elapsed = time.perf_counter() - started
+        results[label] = {
+            "messages_per_s": round(count / elapsed, 1),
+            "connections": stub.connections - connections,
+        }
+    return results
+
+
+def signup_latency(count):
+    from django.core.mail import send_mail
+    from django.test import Client
+
+    import core.api
+    from helpers.mail import queue_mail
+
+    def send_inline(subject, message, from_email, recipient_list):
+        send_mail(subject, message, from_email, recipient_list, fail_silently=False)
+
+    client = Client()
+    results = {}
+    for label, sender in (("send_mail", send_inline), ("pipeline", queue_mail)):
+        core.api.queue_mail = sender
+        latencies = []
+        for i in range(count):
+            started = time.perf_counter()
+            response = client.post(
+                "/api/auth/signup",
+                {"username": f"{label}-{i}", "email": f"{label}-{i}@example.com", "password": "pw"},
+                content_type="application/json",
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.json()["success"], response.content
+        results[label] = {
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "mean_ms": round(statistics.fmean(latencies), 2),
+        }
+    core.api.queue_mail = queue_mail
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--signups", type=int, default=50)
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--connect-delay", type=float, default=0.05, help="seconds of simulated connection setup")
+    args = parser.parse_args()
+
+    stub = SMTPStub(port=args.port, connect_delay=args.connect_delay).start_in_thread()
+    setup(args.port)
+
+    sent = throughput(stub, args.messages)
+    print(f"{'throughput':<12}{'msg/s':>10}{'connections':>13}")
+    for label, stats in sent.items():
+        print(f"{label:<12}{stats['messages_per_s']:>10}{stats['connections']:>13}")
+
+    signups = signup_latency(args.signups)
+    print(f"{'signup':<12}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for label, stats in signups.items():
+        print(f"{label:<12}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['mean_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
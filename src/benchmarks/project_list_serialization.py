@@ -0,0 +1,98 @@
+"""
+Compare ProjectListSerializer against the values()-based fast list path.
+
+Runs on a throwaway test database, so it never touches real data. From src/:
+
+    python -m benchmarks.project_list_serialization --sizes 1000 10000 100000
+
+For every size both paths serialize the whole table ordered like the list
+endpoint; the rendered bytes are compared before any timing is reported.
+"""
+import argparse
+import os
+import time
+
+
+def setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+
+def seed(count, full_scope_size):
+    from projects.models import Project
+
+    Project.objects.all().delete()
+    statuses = [status for status, _label in Project.STATUS_CHOICES]
+    scope = "Scope paragraph. " * (full_scope_size // 17)
+    batch = []
+    for i in range(count):
+        batch.append(Project(
+            name=f"Project {i}",
+            status=statuses[i % len(statuses)],
+            description=f"Description for project {i} — ünïcode",
+            progress=i % 101,
+            due_date="20 Dec 2025",
+            team_size=1 + i % 9,
+            digitalpath_responsible="Sarah Chen",
+            client_responsible="Michael Roberts",
+            tasks_total=20 + i % 10,
+            tasks_completed=i % 20,
+            budget="$10,500 AUD",
+            implementation_time="3 weeks",
+            last_update="2 hours ago",
+            full_scope=scope,
+        ))
+        if len(batch) == 5000:
+            Project.objects.bulk_create(batch)
+            batch = []
+    Project.objects.bulk_create(batch)
+
+
+def best_of(runs, func):
+    timings = []
+    result = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--full-scope-size", type=int, default=2000, help="bytes of full_scope text per project")
+    args = parser.parse_args()
+
+    setup()
+    from rest_framework.renderers import JSONRenderer
+
+    from helpers.renderers import ORJSONRenderer
+    from projects.models import Project
+    from projects.serializers import ProjectListFastSerializer, ProjectListSerializer
+
+    def current():
+        queryset = Project.objects.order_by("-created_at", "-id")
+        return JSONRenderer().render(ProjectListSerializer(queryset, many=True).data)
+
+    def fast():
+        queryset = ProjectListFastSerializer.values(Project.objects.order_by("-created_at", "-id"))
+        return ORJSONRenderer().render(ProjectListFastSerializer.serialize(queryset))
+
+    print(f"{'projects':>10}{'serializer s':>15}{'fast s':>10}{'speedup':>10}")
+    for size in args.sizes:
+        seed(size, args.full_scope_size)
+        current_time, current_body = best_of(args.runs, current)
+        fast_time, fast_body = best_of(args.runs, fast)
+        assert current_body == fast_body, "fast path output differs from ProjectListSerializer"
+        print(f"{size:>10}{current_time:>15.3f}{fast_time:>10.3f}{current_time / fast_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
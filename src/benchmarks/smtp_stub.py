@@ -0,0 +1,145 @@
+"""
+Local SMTP stand-in that accepts and discards mail (stdlib only).
+
+    python -m benchmarks.smtp_stub --port 2525 --connect-delay 0.2 --fault-rate 0.3
+
+--connect-delay holds the greeting back to model the TCP + TLS + AUTH setup
+of a real provider, which is what a fresh connection per message pays.
+Counts of connections and messages are printed on exit and exposed through
+SMTPStub for in-process use.
+
+Faults are injected per connection: with probability --fault-rate the stub
+greets with --fault-reply (a 421 "try again later" by default) and hangs up,
+with reject_recipients set every RCPT TO is refused with a 550 (or only
+those for the addresses in refused), and with drop_after the stub hangs up
+a connection once it has accepted that many messages.
+"""
+import argparse
+import asyncio
+import random
+import threading
+
+
+class SMTPStub:
+    def __init__(self, host="127.0.0.1", port=2525, connect_delay=0.0, message_delay=0.0,
+                 fault_rate=0.0, fault_reply="421 4.3.2 Service not available", reject_recipients=False,
+                 refused=(), drop_after=0):
+        self.host = host
+        self.port = port
+        self.connect_delay = connect_delay
+        self.message_delay = message_delay
+        self.fault_rate = fault_rate
+        self.fault_reply = fault_reply
+        self.reject_recipients = reject_recipients
+        self.refused = set(refused)
+        self.drop_after = drop_after
+        self.connections = 0
+        self.messages = 0
+        self.faults = 0
+        self._loop = None
+        self._server = None
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.connect_delay)
+        if self.fault_rate and random.random() < self.fault_rate:
+            self.faults += 1
+            writer.write(self.fault_reply.encode() + b"\r\n")
+            await writer.drain()
+            writer.close()
+            return
+        writer.write(b"220 smtp-stub ESMTP\r\n")
+        await writer.drain()
+        accepted = 0
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode("latin-1").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                writer.write(b"250-smtp-stub\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif command.startswith("AUTH"):
+                # Any credentials will do
+                writer.write(b"235 2.7.0 Authentication successful\r\n")
+            elif command.startswith("RCPT") and (self.reject_recipients or self._is_refused(command)):
+                writer.write(b"550 5.1.1 No such user\r\n")
+            elif command == "DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                    pass
+                await asyncio.sleep(self.message_delay)
+                self.messages += 1
+                accepted += 1
+                writer.write(b"250 OK queued\r\n")
+                if self.drop_after and accepted >= self.drop_after:
+                    await writer.drain()
+                    break
+            elif command == "QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                # MAIL FROM, RCPT TO, RSET, NOOP
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+    def _is_refused(self, command):
+        address = command.partition(":")[2].strip().strip("<>")
+        return address.lower() in {refused.lower() for refused in self.refused}
+
+    async def serve(self):
+        self._server = await asyncio.start_server(self.handle, self.host, self.port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self):
+        """Serve from a daemon thread; returns once the port is listening"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self.handle, self.host, self.port)
+            )
+            # port=0 binds a free port
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        """Stop a stub started with start_in_thread()"""
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--connect-delay", type=float, default=0.0)
+    parser.add_argument("--message-delay", type=float, default=0.0)
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="share of connections refused")
+    parser.add_argument("--fault-reply", default="421 4.3.2 Service not available")
+    parser.add_argument("--reject-recipients", action="store_true", help="answer every RCPT TO with a 550")
+    args = parser.parse_args()
+
+    stub = SMTPStub(
+        args.host, args.port, args.connect_delay, args.message_delay,
+        args.fault_rate, args.fault_reply, args.reject_recipients,
+    )
+    try:
+        asyncio.run(stub.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{stub.connections} connections, {stub.messages} messages, {stub.faults} faults")
+
+
+if __name__ == "__main__":
+    main()
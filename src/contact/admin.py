@@ -1,22 +1,28 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import ContactMessage
+
+from helpers.admin import LargeTableAdminMixin
+
+from .models import ContactMessage, ContactOutbox
+from .outbox import requeue
 
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'status_badge', 'created_at', 'sent_at']
+class ContactMessageAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['name', 'email', 'status_badge', 'attempts', 'created_at', 'sent_at']
+    # created_at's ranges (today, past 7 days, ...) use the (-created_at, -id)
+    # index; date_hierarchy would read the distinct dates of every row
     list_filter = ['status', 'created_at', 'sent_at']
     search_fields = ['name', 'email', 'message']
-    readonly_fields = ['created_at', 'updated_at', 'sent_at']
-    date_hierarchy = 'created_at'
+    readonly_fields = ['attempts', 'created_at', 'updated_at', 'sent_at']
+    actions = ['requeue_messages']
 
     fieldsets = (
         ('Contact Information', {
             'fields': ('name', 'email', 'message')
         }),
         ('Status', {
-            'fields': ('status', 'error_message')
+            'fields': ('status', 'attempts', 'error_message')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'sent_at'),
@@ -29,6 +35,7 @@ class ContactMessageAdmin(admin.ModelAdmin):
             'pending': '#FFA500',
             'sent': '#28a745',
             'failed': '#dc3545',
+            'dead': '#343a40',
         }
         color = colors.get(obj.status, '#6c757d')
         return format_html(
@@ -38,6 +45,23 @@ class ContactMessageAdmin(admin.ModelAdmin):
         )
     status_badge.short_description = 'Status'
 
+    @admin.action(description='Re-queue selected messages')
+    def requeue_messages(self, request, queryset):
+        count = requeue(queryset.exclude(status='sent').values_list('id', flat=True), reset_attempts=True)
+        self.message_user(request, f"{count} message(s) re-queued.")
+
     def has_add_permission(self, request):
         # Prevent manual creation of contact messages
         return False
+
+
+
+@admin.register(ContactOutbox)
+class ContactOutboxAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['id', 'contact_message', 'created_at', 'dispatched_at']
+    list_select_related = ['contact_message']
+    readonly_fields = ['contact_message', 'created_at', 'dispatched_at']
+
+    def has_add_permission(self, request):
+        # Rows are written with their message by the contact endpoint
+        return False
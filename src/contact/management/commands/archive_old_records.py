@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from contact.models import ContactMessage
+from helpers.archive import archive_before, archive_partition, archive_path
+from helpers.partitions import ensure_monthly_partitions, is_partitioned, list_partitions
+from waitlists.models import WaitlistEntry
+
+# Append-only tables and the column their retention (and partitions) go by
+TARGETS = {
+    "contact": (ContactMessage, "created_at"),
+    "waitlist": (WaitlistEntry, "timestamp"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Move contact messages and waitlist entries older than the retention "
+        "window into gzipped NDJSON archives, and keep monthly partitions "
+        "created ahead on PostgreSQL. Safe to re-run; schedule it daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.ARCHIVE_RETENTION_DAYS)
+        parser.add_argument("--dir", default=settings.ARCHIVE_DIR)
+        parser.add_argument("--chunk-size", type=int, default=settings.ARCHIVE_CHUNK_SIZE)
+        parser.add_argument("--only", choices=sorted(TARGETS), action="append", help="repeatable")
+        parser.add_argument("--dry-run", action="store_true", help="count what would be archived")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1 or options["days"] < 0:
+            raise CommandError("--chunk-size must be positive and --days not negative")
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        for name in options["only"] or sorted(TARGETS):
+            model, column = TARGETS[name]
+            self.archive(model, column, cutoff, options)
+
+    def archive(self, model, column, cutoff, options):
+        table = model._meta.db_table
+        partitioned = is_partitioned(connection, table)
+        if partitioned and not options["dry_run"]:
+            for partition in ensure_monthly_partitions(connection, table, column, settings.PARTITION_MONTHS_AHEAD):
+                self.stdout.write(f"{table}: created partition {partition}")
+
+        started = time.perf_counter()
+        total = 0
+        if partitioned:
+            for partition, lower, upper in list_partitions(connection, table):
+                # The legacy partition (no lower bound) is trimmed row by row below
+                if lower is None or upper > cutoff:
+                    continue
+                if options["dry_run"]:
+                    rows = model._base_manager.filter(**{f"{column}__gte": lower, f"{column}__lt": upper}).count()
+                    self.stdout.write(f"{table}: would archive {rows} rows from {partition} and drop it")
+                    continue
+                path = archive_path(options["dir"], table, f"{lower:%Y-%m}")
+                rows = archive_partition(model, column, partition, lower, upper, path, options["chunk_size"])
+                self.stdout.write(f"{table}: archived {rows} rows from {partition} and dropped it")
+                total += rows
+
+        if options["dry_run"]:
+            rows = model._base_manager.filter(**{f"{column}__lt": cutoff}).count()
+            self.stdout.write(f"{table}: would archive {rows} rows in all older than {cutoff:%Y-%m-%d %H:%M}")
+            return
+        path = archive_path(options["dir"], table, f"before-{cutoff:%Y-%m-%d}")
+        rows = archive_before(model, column, cutoff, path, options["chunk_size"])
+        total += rows
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{table}: archived {total} rows older than {cutoff:%Y-%m-%d %H:%M} in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-18 11:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True)),
+                ('contact_message', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='outbox', to='contact.contactmessage')),
+            ],
+            options={
+                'verbose_name': 'Contact Outbox Entry',
+                'verbose_name_plural': 'Contact Outbox',
+                'indexes': [models.Index(condition=models.Q(('dispatched_at__isnull', True)), fields=['id'], name='contact_outbox_pending_idx')],
+            },
+        ),
+    ]
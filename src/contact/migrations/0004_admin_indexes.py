@@ -0,0 +1,38 @@
+# Generated by Django 5.0 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+from helpers.operations import AddIndexConcurrently, AddTrigramIndexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('contact', '0003_contact_delivery_attempts'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='contactmessage',
+            index=models.Index(fields=['-created_at', '-id'], name='contact_created_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactmessage',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='contact_status_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='contactmessage',
+            index=models.Index(fields=['sent_at'], name='contact_sent_at_idx'),
+        ),
+        # Admin search (icontains) on PostgreSQL
+        AddTrigramIndexes(
+            model_name='contactmessage',
+            indexes=[
+                ('contact_name_trgm_idx', 'name'),
+                ('contact_email_trgm_idx', 'email'),
+                ('contact_message_trgm_idx', 'message'),
+            ],
+        ),
+    ]
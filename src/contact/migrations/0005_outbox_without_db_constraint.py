@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-18 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0004_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contactoutbox',
+            name='contact_message',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='outbox', to='contact.contactmessage'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0 on 2026-10-18 12:12
+
+# Partitions contact_contactmessage by month on created_at; see
+# helpers.partitions.partition_by_month. archive_old_records keeps the
+# months coming.
+
+from django.db import migrations
+
+from helpers.operations import PartitionByMonth
+
+
+class Migration(migrations.Migration):
+    # Builds an index CONCURRENTLY, then swaps the table in its own transaction
+    atomic = False
+
+    dependencies = [
+        ('contact', '0005_outbox_without_db_constraint'),
+    ]
+
+    operations = [
+        PartitionByMonth("contactmessage", "created_at", months_ahead=3),
+    ]
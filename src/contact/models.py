@@ -8,12 +8,14 @@ class ContactMessage(models.Model):
         ('pending', 'Pending'),
         ('sent', 'Sent'),
         ('failed', 'Failed'),
+        ('dead', 'Dead'),
     ]
 
     name = models.CharField(max_length=200)
     email = models.EmailField()
     message = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
 
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -25,6 +27,43 @@ class ContactMessage(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Contact Message'
         verbose_name_plural = 'Contact Messages'
+        indexes = [
+            # The sweep looks for unsent messages nobody has touched lately
+            models.Index(fields=['status', 'updated_at'], name='contact_status_updated_idx'),
+            # Admin changelist order (ordering plus the pk tie-breaker),
+            # unfiltered and filtered by status
+            models.Index(fields=['-created_at', '-id'], name='contact_created_id_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='contact_status_created_idx'),
+            models.Index(fields=['sent_at'], name='contact_sent_at_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.email} ({self.created_at.strftime('%Y-%m-%d %H:%M')})"
+
+
+class ContactOutbox(models.Model):
+    """Pending publish of send_contact_email_task, committed with its message"""
+
+    # No database constraint: ContactMessage is partitioned by month on
+    # PostgreSQL (migration 0006), so its id alone can't be referenced
+    contact_message = models.OneToOneField(
+        ContactMessage, on_delete=models.CASCADE, related_name='outbox', db_constraint=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Contact Outbox Entry'
+        verbose_name_plural = 'Contact Outbox'
+        indexes = [
+            # The relay only ever scans undispatched rows, oldest first
+            models.Index(
+                fields=['id'],
+                condition=models.Q(dispatched_at__isnull=True),
+                name='contact_outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        state = 'dispatched' if self.dispatched_at else 'pending'
+        return f"Outbox #{self.pk} for message {self.contact_message_id} ({state})"
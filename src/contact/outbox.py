@@ -0,0 +1,112 @@
+"""
+Transactional outbox for contact emails.
+
+The /api/contact handler commits the ContactMessage together with a
+ContactOutbox row and publishes send_contact_email_task from
+transaction.on_commit. That publish uses a fail-fast broker connection
+(helpers.broker), so a broker outage costs the request one refused
+connection instead of kombu's retry loop or an inline SMTP round trip.
+A failed publish is only logged: the row stays undispatched and the
+relay_contact_outbox beat task publishes it, in batches, once the broker
+is reachable again.
+
+Delivery is at least once; send_contact_email_task skips messages already sent.
+requeue() re-arms outbox rows so the relay publishes their messages again.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from helpers.broker import fail_fast_connection
+
+from .models import ContactMessage, ContactOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def _publish(rows, published):
+    """Publish (outbox_id, contact_message_id) pairs, appending each outbox id once sent"""
+    from .tasks import send_contact_email_task
+
+    with fail_fast_connection() as connection:
+        for outbox_id, contact_message_id in rows:
+            send_contact_email_task.apply_async((contact_message_id,), retry=False, connection=connection)
+            published.append(outbox_id)
+
+
+def _mark_dispatched(outbox_ids):
+    if outbox_ids:
+        ContactOutbox.objects.filter(id__in=outbox_ids).update(dispatched_at=timezone.now())
+
+
+def dispatch(outbox_id, contact_message_id):
+    """on_commit hook: publish one message now, or leave it to the relay"""
+    try:
+        _publish([(outbox_id, contact_message_id)], [])
+        _mark_dispatched([outbox_id])
+    except Exception as e:
+        logger.warning(f"Broker unavailable, contact message {contact_message_id} left to the outbox relay: {e}")
+
+
+def create_contact_message(**fields):
+    """Save a ContactMessage and its outbox row; the task is published on commit"""
+    with transaction.atomic():
+        contact_message = ContactMessage.objects.create(**fields)
+        outbox = ContactOutbox.objects.create(contact_message=contact_message)
+        transaction.on_commit(lambda: dispatch(outbox.id, contact_message.id))
+    return contact_message
+
+
+def requeue(contact_message_ids, reset_attempts=False):
+    """
+    Hand messages back to the relay: used by the sweep for tasks that were
+    lost, and from the admin to replay dead messages (reset_attempts=True)
+    """
+    contact_message_ids = list(contact_message_ids)
+    changes = {'status': 'pending', 'updated_at': timezone.now()}
+    if reset_attempts:
+        changes['attempts'] = 0
+    with transaction.atomic():
+        ContactMessage.objects.filter(id__in=contact_message_ids).update(**changes)
+        ContactOutbox.objects.filter(contact_message_id__in=contact_message_ids).update(dispatched_at=None)
+        # Messages saved before the outbox existed get a row of their own
+        ContactOutbox.objects.bulk_create(
+            [ContactOutbox(contact_message_id=id) for id in contact_message_ids],
+            ignore_conflicts=True,
+        )
+    return len(contact_message_ids)
+
+
+def relay(batch_size=None):
+    """
+    Publish undispatched outbox rows in batches, oldest first. Rows younger
+    than CONTACT_OUTBOX_RELAY_DELAY are left to their own on_commit publish.
+    Stops at the first broker error; returns the number of rows published.
+    """
+    batch_size = batch_size or settings.CONTACT_OUTBOX_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(seconds=settings.CONTACT_OUTBOX_RELAY_DELAY)
+    relayed = 0
+    while True:
+        with transaction.atomic():
+            # skip_locked lets overlapping relays split the backlog
+            rows = list(
+                ContactOutbox.objects.select_for_update(skip_locked=True)
+                .filter(dispatched_at__isnull=True, created_at__lt=cutoff)
+                .order_by('id')
+                .values_list('id', 'contact_message_id')[:batch_size]
+            )
+            if not rows:
+                return relayed
+            published = []
+            try:
+                _publish(rows, published)
+            except Exception as e:
+                logger.warning(f"Outbox relay stopped after {relayed + len(published)} message(s): {e}")
+            # Record what did go out before giving up on the rest
+            _mark_dispatched(published)
+        relayed += len(published)
+        if len(published) < len(rows):
+            return relayed
@@ -1,17 +1,27 @@
 from celery import shared_task
-from django.core.mail import send_mail
+from datetime import timedelta
 from django.conf import settings
 from django.utils import timezone
 import logging
+import random
+
+from helpers.circuit_breaker import CircuitOpen
+from helpers.mail import backoff, is_permanent, send_now, smtp_breaker
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, max_retries=3)
+@shared_task(bind=True, max_retries=None, ignore_result=True)
 def send_contact_email_task(self, contact_message_id):
     """
     Send contact form email and update database record.
 
+    Failed sends are retried with full-jitter exponential backoff and
+    dead-lettered after CONTACT_EMAIL_MAX_ATTEMPTS, or at once when the
+    message itself is rejected. While the SMTP circuit breaker is open the
+    task is parked (retried later without spending an attempt), which frees
+    the worker for other tasks.
+
     Args:
         contact_message_id: ID of the ContactMessage model instance
     """
@@ -19,49 +29,108 @@ def send_contact_email_task(self, contact_message_id):
 
     try:
         contact_message = ContactMessage.objects.get(id=contact_message_id)
+    except ContactMessage.DoesNotExist:
+        logger.error(f"ContactMessage with ID {contact_message_id} does not exist")
+        raise
 
-        # Build email content
-        subject = f"New Contact Form Submission from {contact_message.name}"
-        message = (
-            f"From: {contact_message.name} <{contact_message.email}>\n"
-            f"Contact Form Submission\n"
-            f"***********************\n\n"
-            f"{contact_message.message}\n\n"
-            f"---\n"
-            f"Submitted at: {contact_message.created_at.strftime('%Y-%m-%d %H:%M:%S UTC')}"
-        )
+    if contact_message.status in ('sent', 'dead'):
+        # Published twice by the outbox (on commit and by the relay)
+        logger.info(f"Contact message {contact_message_id} already {contact_message.status}")
+        return
 
-        # Send email
-        send_mail(
+    try:
+        smtp_breaker.before_call()
+    except CircuitOpen as e:
+        # Spread the parked tasks over a reset period so they don't return in lockstep
+        countdown = e.retry_after + random.uniform(0, smtp_breaker.reset_timeout)
+        # Touched so the sweep doesn't take a parked message for a lost one
+        ContactMessage.objects.filter(id=contact_message_id).update(updated_at=timezone.now())
+        logger.info(f"SMTP circuit open, contact message {contact_message_id} parked for {countdown:.0f}s")
+        raise self.retry(countdown=countdown)
+
+    # Build email content
+    subject = f"New Contact Form Submission from {contact_message.name}"
+    message = (
+        f"From: {contact_message.name} <{contact_message.email}>\n"
+        f"Contact Form Submission\n"
+        f"***********************\n\n"
+        f"{contact_message.message}\n\n"
+        f"---\n"
+        f"Submitted at: {contact_message.created_at.strftime('%Y-%m-%d %H:%M:%S UTC')}"
+    )
+
+    try:
+        # Sent synchronously to record the outcome, over the worker's
+        # persistent SMTP connection
+        send_now(
             subject,
             message,
             settings.DEFAULT_FROM_EMAIL,
             [settings.EMAIL_HOST_USER],
-            fail_silently=False
         )
+    except Exception as e:
+        attempts = contact_message.attempts + 1
+        permanent = is_permanent(e)
+        if not permanent:
+            smtp_breaker.record_failure()
+        dead = permanent or attempts >= settings.CONTACT_EMAIL_MAX_ATTEMPTS
+        ContactMessage.objects.filter(id=contact_message_id).update(
+            status='dead' if dead else 'failed',
+            attempts=attempts,
+            error_message=str(e),
+            updated_at=timezone.now(),
+        )
+        if dead:
+            logger.error(f"Contact message {contact_message_id} dead after {attempts} attempt(s): {e}")
+            return
+        countdown = backoff(attempts, settings.CONTACT_EMAIL_RETRY_BASE, settings.CONTACT_EMAIL_RETRY_MAX)
+        logger.warning(f"Error sending contact email {contact_message_id}, retry in {countdown:.0f}s: {e}")
+        raise self.retry(exc=e, countdown=countdown)
 
-        # Update status to sent
-        contact_message.status = 'sent'
-        contact_message.sent_at = timezone.now()
-        contact_message.error_message = None
-        contact_message.save()
+    smtp_breaker.record_success()
+    ContactMessage.objects.filter(id=contact_message_id).update(
+        status='sent',
+        attempts=contact_message.attempts + 1,
+        sent_at=timezone.now(),
+        error_message=None,
+        updated_at=timezone.now(),
+    )
+    logger.info(f"Contact email sent successfully for message ID {contact_message_id}")
 
-        logger.info(f"Contact email sent successfully for message ID {contact_message_id}")
 
-    except ContactMessage.DoesNotExist:
-        logger.error(f"ContactMessage with ID {contact_message_id} does not exist")
-        raise
-    except Exception as e:
-        logger.error(f"Error sending contact email: {e}", exc_info=True)
-
-        # Update status to failed
-        try:
-            contact_message = ContactMessage.objects.get(id=contact_message_id)
-            contact_message.status = 'failed'
-            contact_message.error_message = str(e)
-            contact_message.save()
-        except Exception as update_error:
-            logger.error(f"Error updating contact message status: {update_error}")
-
-        # Retry the task
-        raise self.retry(exc=e, countdown=60)
+@shared_task(ignore_result=True)
+def relay_contact_outbox():
+    """Publish contact messages whose on-commit dispatch missed the broker"""
+    from .outbox import relay
+
+    relayed = relay()
+    if relayed:
+        logger.info(f"Relayed {relayed} contact message(s) from the outbox")
+    return relayed
+
+
+@shared_task(ignore_result=True)
+def sweep_contact_messages():
+    """
+    Dead-letter unsent messages that ran out of attempts, and re-queue those
+    untouched for CONTACT_EMAIL_STALE_AFTER whose task was lost (worker
+    killed, queue purged). Skipped while the SMTP breaker is open.
+    """
+    from .models import ContactMessage
+    from .outbox import requeue
+
+    if not smtp_breaker.is_closed():
+        return 0
+    stale = ContactMessage.objects.filter(
+        status__in=('pending', 'failed'),
+        updated_at__lt=timezone.now() - timedelta(seconds=settings.CONTACT_EMAIL_STALE_AFTER),
+        # Only messages already handed to a worker; the relay owns the rest
+        outbox__dispatched_at__isnull=False,
+    )
+    dead = stale.filter(attempts__gte=settings.CONTACT_EMAIL_MAX_ATTEMPTS).update(
+        status='dead', updated_at=timezone.now()
+    )
+    requeued = requeue(stale.values_list('id', flat=True))
+    if dead or requeued:
+        logger.warning(f"Contact sweep: {dead} message(s) dead-lettered, {requeued} re-queued")
+    return requeued
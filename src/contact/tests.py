@@ -1,3 +1,289 @@
-from django.test import TestCase
+import gzip
+import io
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import orjson
+
+from celery.exceptions import Retry
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from benchmarks.smtp_stub import SMTPStub
+from helpers.admin import estimated_row_count
+from helpers.archive import archive_partition
+from helpers.circuit_breaker import CircuitBreaker, CircuitOpen
+from helpers.mail import mail_connection, smtp_breaker
+from helpers.partitions import ensure_monthly_partitions, list_partitions, partition_name
+
+from .models import ContactMessage, ContactOutbox
+from .tasks import send_contact_email_task, sweep_contact_messages
+
+
+class CircuitBreakerTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        with self.assertRaises(CircuitOpen) as raised:
+            self.breaker.before_call()
+        self.assertGreater(raised.exception.retry_after, 59)
+
+    def test_success_resets_the_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.before_call()
+
+    def test_half_open_lets_one_trial_through(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        with mock.patch("helpers.circuit_breaker.time.time", return_value=cache.get("circuit:test:opened_until") + 1):
+            self.breaker.before_call()
+            with self.assertRaises(CircuitOpen):
+                self.breaker.before_call()
+            self.breaker.record_success()
+            self.breaker.before_call()
+        self.assertTrue(self.breaker.is_closed())
+
+
+@override_settings(
+    CONTACT_EMAIL_MAX_ATTEMPTS=3,
+    CONTACT_EMAIL_RETRY_BASE=30,
+    CONTACT_EMAIL_RETRY_MAX=1800,
+    EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+    EMAIL_HOST="127.0.0.1",
+    EMAIL_HOST_USER="ops@example.com",
+    EMAIL_HOST_PASSWORD="secret",
+    EMAIL_USE_TLS=False,
+    EMAIL_USE_SSL=False,
+    EMAIL_TIMEOUT=5,
+)
+class ContactEmailTaskTestCase(TestCase):
+    """send_contact_email_task against a local SMTP stub that injects faults"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = SMTPStub(port=0).start_in_thread()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.stub.fault_rate = 0.0
+        self.stub.reject_recipients = False
+        self.settings_override = override_settings(EMAIL_PORT=self.stub.port)
+        self.settings_override.enable()
+        # Drop a connection another test left open with the locmem backend
+        mail_connection.close()
+        self.message = ContactMessage.objects.create(name="Ana", email="ana@example.com", message="Hello")
+
+    def tearDown(self):
+        mail_connection.close()
+        self.settings_override.disable()
+
+    def run_task(self):
+        """Run the task inline; returns the countdown it asked to be retried with, if any"""
+        with mock.patch.object(send_contact_email_task, "retry", side_effect=Retry()) as retry:
+            try:
+                send_contact_email_task(self.message.id)
+            except Retry:
+                return retry.call_args.kwargs["countdown"]
+        return None
+
+    def test_sends_and_records_the_attempt(self):
+        messages = self.stub.messages
+        self.assertIsNone(self.run_task())
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, "sent")
+        self.assertEqual(self.message.attempts, 1)
+        self.assertEqual(self.stub.messages, messages + 1)
+
+    def test_transient_failure_backs_off_with_jitter(self):
+        self.stub.fault_rate = 1.0
+        with mock.patch("contact.tasks.random.uniform", side_effect=lambda low, high: high):
+            countdowns = [self.run_task() for _ in range(2)]
+        # The upper bound doubles with each recorded attempt
+        self.assertEqual(countdowns, [30, 60])
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, "failed")
+        self.assertEqual(self.message.attempts, 2)
+        self.assertIn("421", self.message.error_message)
+
+    def test_dead_letters_after_max_attempts(self):
+        self.stub.fault_rate = 1.0
+        ContactMessage.objects.filter(id=self.message.id).update(attempts=2)
+        self.assertIsNone(self.run_task())
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, "dead")
+        self.assertEqual(self.message.attempts, 3)
+        # A duplicate publish of a dead message is a no-op
+        self.assertIsNone(self.run_task())
+
+    def test_rejected_recipient_is_dead_at_once(self):
+        self.stub.reject_recipients = True
+        self.assertIsNone(self.run_task())
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, "dead")
+        self.assertEqual(self.message.attempts, 1)
+        self.assertTrue(smtp_breaker.is_closed())
+
+    def test_open_circuit_parks_without_touching_smtp(self):
+        self.stub.fault_rate = 1.0
+        for _ in range(smtp_breaker.failure_threshold):
+            smtp_breaker.record_failure()
+        connections = self.stub.connections
+        countdown = self.run_task()
+        self.assertGreater(countdown, smtp_breaker.reset_timeout - 1)
+        self.assertEqual(self.stub.connections, connections)
+        self.message.refresh_from_db()
+        self.assertEqual((self.message.status, self.message.attempts), ("pending", 0))
+
+    def test_successful_trial_closes_the_circuit(self):
+        for _ in range(smtp_breaker.failure_threshold):
+            smtp_breaker.record_failure()
+        with mock.patch("helpers.circuit_breaker.time.time", return_value=timezone.now().timestamp() + 3600):
+            self.assertIsNone(self.run_task())
+        self.assertTrue(smtp_breaker.is_closed())
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, "sent")
+
+
+@override_settings(CONTACT_EMAIL_MAX_ATTEMPTS=3, CONTACT_EMAIL_STALE_AFTER=3600)
+class SweepContactMessagesTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def create(self, status, attempts, dispatched=True, age=timedelta(hours=2)):
+        message = ContactMessage.objects.create(name="n", email="n@example.com", message="m")
+        ContactOutbox.objects.create(
+            contact_message=message, dispatched_at=timezone.now() - age if dispatched else None
+        )
+        ContactMessage.objects.filter(id=message.id).update(
+            status=status, attempts=attempts, updated_at=timezone.now() - age
+        )
+        return message
+
+    def test_requeues_lost_and_dead_letters_exhausted(self):
+        lost = self.create("failed", 1)
+        exhausted = self.create("failed", 3)
+        recent = self.create("pending", 0, age=timedelta(minutes=5))
+        undispatched = self.create("pending", 0, dispatched=False)
+
+        self.assertEqual(sweep_contact_messages(), 1)
+
+        statuses = dict(ContactMessage.objects.values_list("id", "status"))
+        self.assertEqual(statuses[lost.id], "pending")
+        self.assertEqual(statuses[exhausted.id], "dead")
+        self.assertIsNone(ContactOutbox.objects.get(contact_message=lost).dispatched_at)
+        self.assertIsNotNone(ContactOutbox.objects.get(contact_message=recent).dispatched_at)
+        self.assertEqual(statuses[undispatched.id], "pending")
+
+    def test_skipped_while_the_circuit_is_open(self):
+        lost = self.create("failed", 1)
+        for _ in range(smtp_breaker.failure_threshold):
+            smtp_breaker.record_failure()
+        self.assertEqual(sweep_contact_messages(), 0)
+        self.assertIsNotNone(ContactOutbox.objects.get(contact_message=lost).dispatched_at)
+
+
+class ArchiveOldRecordsTestCase(TestCase):
+    """archive_old_records on a database without partitions (chunked export then delete)"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        now = timezone.now()
+        for days in (400, 380, 370, 10):
+            message = ContactMessage.objects.create(name="n", email="n@example.com", message="m")
+            ContactOutbox.objects.create(contact_message=message)
+            ContactMessage.objects.filter(id=message.id).update(created_at=now - timedelta(days=days))
+
+    def archive(self, *args):
+        call_command(
+            "archive_old_records", "--only=contact", "--days=365", f"--dir={self.directory}", *args,
+            stdout=io.StringIO(),
+        )
+
+    def test_moves_old_rows_to_a_compressed_archive(self):
+        self.archive("--chunk-size=2")
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(ContactOutbox.objects.count(), 1)
+        (path,) = [
+            os.path.join(root, name) for root, _dirs, names in os.walk(self.directory) for name in names
+        ]
+        with gzip.open(path) as archive:
+            records = [orjson.loads(line) for line in archive]
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0]["email"], "n@example.com")
+        # A second run has nothing left to move
+        self.archive()
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    def test_dry_run_changes_nothing(self):
+        self.archive("--dry-run")
+        self.assertEqual(ContactMessage.objects.count(), 4)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+@skipUnless(connection.vendor == "postgresql", "monthly partitions are PostgreSQL only")
+class MonthlyPartitionsTestCase(TestCase):
+    table = "contact_contactmessage"
+
+    def test_row_estimate_adds_up_the_partitions(self):
+        ContactMessage.objects.bulk_create(
+            ContactMessage(name="n", email=f"n{i}@example.com", message="m") for i in range(30)
+        )
+        with connection.cursor() as cursor:
+            # As autovacuum does: the partitions are analyzed, never their parent
+            cursor.execute(f"SELECT relid::text FROM pg_partition_tree('{self.table}') WHERE isleaf")
+            for (partition,) in cursor.fetchall():
+                cursor.execute(f"ANALYZE {partition}")
+        self.assertEqual(estimated_row_count(ContactMessage), 30)
+
+    def test_rows_caught_by_the_default_partition_move_to_the_new_month(self):
+        covered_until = list_partitions(connection, self.table)[-1][2]
+        message = ContactMessage.objects.create(name="n", email="n@example.com", message="m")
+        ContactMessage.objects.filter(id=message.id).update(created_at=covered_until + timedelta(days=3))
+
+        created = ensure_monthly_partitions(connection, self.table, "created_at", 0, now=covered_until)
+        self.assertEqual(created, [partition_name(self.table, covered_until)])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT tableoid::regclass::text FROM {self.table} WHERE id = %s", [message.id])
+            self.assertEqual(cursor.fetchone()[0], created[0])
+
+    def test_partition_is_dropped_with_the_outbox_only_once_archived(self):
+        partition, lower, upper = list_partitions(connection, self.table)[-1]
+        for i in range(3):
+            message = ContactMessage.objects.create(name="n", email=f"n{i}@example.com", message="m")
+            ContactOutbox.objects.create(contact_message=message)
+        ContactMessage.objects.update(created_at=lower + timedelta(days=1))
+        path = os.path.join(tempfile.mkdtemp(), "month.ndjson.gz")
+
+        def archive():
+            return archive_partition(ContactMessage, "created_at", partition, lower, upper, path, 2)
+
+        with mock.patch("helpers.archive.detach_partition", side_effect=RuntimeError("lock timeout")):
+            with self.assertRaises(RuntimeError):
+                archive()
+        # Nothing is deleted unless the drop commits too
+        self.assertEqual((ContactMessage.objects.count(), ContactOutbox.objects.count()), (3, 3))
+
+        self.assertEqual(archive(), 3)
+        self.assertEqual((ContactMessage.objects.count(), ContactOutbox.objects.count()), (0, 0))
+        self.assertNotIn(partition, [name for name, _lower, _upper in list_partitions(connection, self.table)])
+        with gzip.open(path) as archived:
+            self.assertEqual(len([orjson.loads(line) for line in archived]), 3)
+        self.assertFalse(os.path.exists(f"{path}.partial"))
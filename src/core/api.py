@@ -1,12 +1,23 @@
 import helpers
+from accounts.hashing import HashingBusy, acheck_password, aset_password
+from accounts.identity import (
+    afind_user,
+    find_email_address,
+    find_user_by_email,
+    identity_conflict,
+    normalize_email,
+)
+from helpers.cache import cache_result
+from helpers.mail import queue_mail
+from asgiref.sync import sync_to_async
 from ninja import NinjaAPI, Schema
 from django.contrib.auth import get_user_model
 from allauth.account.models import EmailAddress, EmailConfirmationHMAC
 from allauth.headless.account.views import send_verification_email_to_address
 from django.shortcuts import get_object_or_404
 from typing import Optional
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
@@ -15,24 +26,28 @@ from ninja_extra import NinjaExtraAPI, api_controller, route
 from ninja_jwt.authentication import JWTAuth
 from ninja_jwt.controller import NinjaJWTDefaultController
 from ninja_jwt.tokens import RefreshToken
-from ninja_jwt.schema import TokenObtainPairInputSchema, TokenObtainPairOutputSchema
+from ninja_jwt.schema import TokenObtainPairOutputSchema
 
 User = get_user_model()
 
+
+class TokenPairInputSchema(Schema):
+    # Plain credentials: ninja_jwt's TokenObtainPairInputSchema authenticates
+    # synchronously while validating and hands the handler a SecretStr
+    username: str
+    password: str
+
+
 # Custom JWT Controller to allow login with email or username
 @api_controller("/token", tags=["Auth"], auth=None)
 class AsyncNinjaJWTSlidingController:
     @route.post("/pair", response=TokenObtainPairOutputSchema, url_name="token_obtain_pair")
-    def obtain_token(self, user_token: TokenObtainPairInputSchema):
-        # Try to find user by username first
-        user = User.objects.filter(username=user_token.username).first()
-
-        # If not found, try to find by email
-        if not user:
-            user = User.objects.filter(email=user_token.username).first()
+    async def obtain_token(self, user_token: TokenPairInputSchema):
+        # Username or email, in one indexed query
+        user = await afind_user(user_token.username)
 
-        # Check if user exists and password is correct
-        if user and user.check_password(user_token.password):
+        # Check if user exists and password is correct (on the hashing pool)
+        if user and await acheck_password(user, user_token.password):
             refresh = RefreshToken.for_user(user)
             return {
                 "refresh": str(refresh),
@@ -45,7 +60,7 @@ class AsyncNinjaJWTSlidingController:
         raise HttpError(401, "Invalid credentials")
 
     @route.post("/refresh", auth=None, url_name="token_refresh")
-    def refresh_token(self, refresh_token: str):
+    async def refresh_token(self, refresh_token: str):
         from ninja_jwt.tokens import RefreshToken
         token = RefreshToken(refresh_token)
         return {"access": str(token.access_token)}
@@ -54,6 +69,16 @@ api = NinjaExtraAPI()
 api.register_controllers(AsyncNinjaJWTSlidingController)
 api.add_router("/waitlists/", "waitlists.api.router")
 
+
+@api.exception_handler(HashingBusy)
+def hashing_busy(request, exc):
+    response = api.create_response(
+        request, {"detail": "Too many requests, please retry shortly"}, status=503
+    )
+    response["Retry-After"] = "1"
+    return response
+
+
 class UserSchema(Schema):
     username: str
     is_authenticated: bool
@@ -131,64 +156,72 @@ If you didn't register for an account, you can safely ignore this email.
 Thank you for using DigitalPath AI!
 """
 
-    send_mail(
+    # Queued for the mail pipeline's persistent connection; the request
+    # doesn't wait for SMTP
+    queue_mail(
         subject=subject,
         message=message,
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[email_address.email],
-        fail_silently=False,
     )
 
 @api.get("/hello")
-def hello(request):
+async def hello(request):
     # print(request)
     return {"message":"Hello World"}
 
 @api.get("/me",
     response=UserSchema,
     auth=helpers.api_auth_user_required)
-def me(request):
-    return request.user
+@cache_result(tags=lambda request: [f"user:{request.user.pk}"], per_user=True)
+async def me(request):
+    return UserSchema.from_orm(request.user).dict()
+
+def create_signup_user(request, user, email):
+    with transaction.atomic():
+        user.save()
+        # Create EmailAddress record and send verification email
+        email_address = EmailAddress.objects.create(
+            user=user,
+            email=normalize_email(email),
+            primary=True,
+            verified=False
+        )
+
+    # Send custom verification email with frontend URL
+    send_custom_verification_email(request, email_address)
+
 
 @api.post("/auth/signup", response=SignupResponseSchema)
-def signup(request, payload: SignupSchema):
-    # Check if username already exists
-    if User.objects.filter(username=payload.username).exists():
+async def signup(request, payload: SignupSchema):
+    # Check if username or email (case-insensitively) already exists
+    conflict = await sync_to_async(identity_conflict)(payload.username, payload.email)
+    if conflict == "username":
         return {
             "success": False,
             "message": "Username already exists",
             "user": None
         }
-
-    # Check if email already exists
-    if User.objects.filter(email=payload.email).exists():
+    if conflict == "email":
         return {
             "success": False,
             "message": "Email already exists",
             "user": None
         }
 
-    try:
-        # Create user (inactive until email is verified)
-        user = User.objects.create_user(
-            username=payload.username,
-            email=payload.email,
-            password=payload.password,
-            first_name=payload.first_name or "",
-            last_name=payload.last_name or "",
-            is_active=False  # User must verify email first
-        )
-
-        # Create EmailAddress record and send verification email
-        email_address = EmailAddress.objects.create(
-            user=user,
-            email=payload.email,
-            primary=True,
-            verified=False
-        )
+    # Create user (inactive until email is verified); the password is hashed
+    # on the hashing pool, HashingBusy becomes a 503
+    user = User(
+        username=User.normalize_username(payload.username),
+        email=User.objects.normalize_email(payload.email),
+        first_name=payload.first_name or "",
+        last_name=payload.last_name or "",
+        is_active=False  # User must verify email first
+    )
+    await aset_password(user, payload.password)
 
-        # Send custom verification email with frontend URL
-        send_custom_verification_email(request, email_address)
+    try:
+        await sync_to_async(create_signup_user)(request, user, payload.email)
 
         return {
             "success": True,
@@ -199,6 +232,13 @@ def signup(request, payload: SignupSchema):
                 "is_authenticated": False
             }
         }
+    except IntegrityError:
+        # A concurrent signup claimed the username or email after the check
+        return {
+            "success": False,
+            "message": "Username or email already exists",
+            "user": None
+        }
     except Exception as e:
         return {
             "success": False,
@@ -241,23 +281,17 @@ def verify_email(request, payload: EmailConfirmSchema):
 def resend_verification(request, payload: ResendEmailSchema):
     """Resend verification email to user"""
     try:
-        # Find user by email
-        user = User.objects.filter(email=payload.email).first()
+        # Find the primary address (and its user) by email
+        email_address = find_email_address(payload.email, primary=True)
 
-        if not user:
+        if not email_address:
             return {
                 "success": False,
                 "message": "No user found with this email"
             }
 
         # Check if already verified
-        email_address = EmailAddress.objects.filter(
-            user=user,
-            email=payload.email,
-            primary=True
-        ).first()
-
-        if email_address and email_address.verified:
+        if email_address.verified:
             return {
                 "success": False,
                 "message": "Email is already verified"
@@ -281,7 +315,7 @@ def forgot_password(request, payload: ForgotPasswordSchema):
     """Send password reset email to user"""
     try:
         # Find user by email
-        user = User.objects.filter(email=payload.email).first()
+        user = find_user_by_email(payload.email)
 
         # Always return success for security (don't reveal if email exists)
         # But only send email if user exists
@@ -311,12 +345,11 @@ If you didn't request this password reset, you can safely ignore this email. You
 Thank you for using DigitalPath AI!
 """
 
-            send_mail(
+            queue_mail(
                 subject=subject,
                 message=message,
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=[user.email],
-                fail_silently=False,
             )
 
         return {
@@ -330,29 +363,30 @@ Thank you for using DigitalPath AI!
         }
 
 @api.post("/auth/reset-password", response=ResetPasswordResponseSchema)
-def reset_password(request, payload: ResetPasswordSchema):
+async def reset_password(request, payload: ResetPasswordSchema):
     """Reset user password using uid and token"""
+    # Decode user ID
     try:
-        # Decode user ID
-        try:
-            uid = force_str(urlsafe_base64_decode(payload.uid))
-            user = User.objects.get(pk=uid)
-        except (TypeError, ValueError, OverflowError, User.DoesNotExist):
-            return {
-                "success": False,
-                "message": "Invalid reset link"
-            }
+        uid = force_str(urlsafe_base64_decode(payload.uid))
+        user = await User.objects.aget(pk=uid)
+    except (TypeError, ValueError, OverflowError, User.DoesNotExist):
+        return {
+            "success": False,
+            "message": "Invalid reset link"
+        }
 
-        # Check if token is valid
-        if not default_token_generator.check_token(user, payload.token):
-            return {
-                "success": False,
-                "message": "Invalid or expired reset link"
-            }
+    # Check if token is valid
+    if not default_token_generator.check_token(user, payload.token):
+        return {
+            "success": False,
+            "message": "Invalid or expired reset link"
+        }
 
-        # Set new password
-        user.set_password(payload.new_password)
-        user.save()
+    # Set new password on the hashing pool, HashingBusy becomes a 503
+    await aset_password(user, payload.new_password)
+
+    try:
+        await user.asave()
 
         return {
             "success": True,
@@ -367,30 +401,21 @@ def reset_password(request, payload: ResetPasswordSchema):
 @api.post("/contact", response=ContactMessageResponseSchema)
 def contact(request, payload: ContactMessageSchema):
     """Handle contact form submissions"""
-    from contact.models import ContactMessage
-    from contact.tasks import send_contact_email_task
+    from contact.outbox import create_contact_message
     import logging
 
     logger = logging.getLogger(__name__)
 
     try:
-        # Create contact message record
-        contact_message = ContactMessage.objects.create(
+        # Message and outbox row commit together; the email task is published
+        # on commit, or by the outbox relay if the broker is down
+        create_contact_message(
             name=payload.name,
             email=payload.email,
             message=payload.message,
             status='pending'
         )
 
-        # Try to send email asynchronously via Celery
-        try:
-            task_result = send_contact_email_task.delay(contact_message.id)
-            logger.info(f"Contact email task dispatched: {task_result.id} for message {contact_message.id}")
-        except Exception as celery_error:
-            # Fallback: send email synchronously if Celery is not available
-            logger.warning(f"Celery not available, sending email synchronously: {celery_error}")
-            send_contact_email_task(contact_message.id)
-
         return {
             "success": True,
             "message": "Thank you for your message! We'll get back to you within 24 hours."
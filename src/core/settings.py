@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sites",  # Required for allauth
+    "django.contrib.postgres",  # OpClass in the trigram index migrations
     # third party
     "corsheaders",
     "rest_framework",
@@ -59,12 +60,15 @@ INSTALLED_APPS = [
     "allauth.socialaccount.providers.google",
     "allauth.socialaccount.providers.github",
     # internal
+    "accounts",
     "waitlists",
     "projects",
     "contact",
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware
+    "helpers.metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -130,11 +134,44 @@ if DATABASE_URL != "":
     DATABASES = {
         "default": dj_database_url.config(
             default=DATABASE_URL,
-            conn_max_age=300,
+            # Use 0 under ASGI: async requests don't reuse thread-bound connections
+            conn_max_age=config("DATABASE_CONN_MAX_AGE", cast=int, default=300),
             conn_health_checks=True
         )
     }
 
+# Cache
+# Shared tier: Redis when REDIS_CACHE_URL is set, otherwise a process-local
+# locmem stand-in for development
+REDIS_CACHE_URL = config("REDIS_CACHE_URL", cast=str, default="")
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "digitalpath",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+
+# Response cache (helpers.cache): per-process LRU in front of the shared tier
+RESPONSE_CACHE_TTL = config("RESPONSE_CACHE_TTL", cast=int, default=300)
+RESPONSE_CACHE_LOCAL_TTL = config("RESPONSE_CACHE_LOCAL_TTL", cast=int, default=5)
+RESPONSE_CACHE_LOCAL_MAX_ENTRIES = config("RESPONSE_CACHE_LOCAL_MAX_ENTRIES", cast=int, default=1024)
+RESPONSE_CACHE_LOCAL_MAX_BYTES = config("RESPONSE_CACHE_LOCAL_MAX_BYTES", cast=int, default=32 * 1024 * 1024)
+
+# Admin changelists over large tables (helpers.admin.EstimatedCountPaginator):
+# unfiltered lists past the threshold use the planner's row estimate, other
+# lists count at most ADMIN_COUNT_LIMIT rows
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config("ADMIN_ESTIMATED_COUNT_THRESHOLD", cast=int, default=100000)
+ADMIN_COUNT_LIMIT = config("ADMIN_COUNT_LIMIT", cast=int, default=10000)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -198,8 +235,24 @@ EMAIL_HOST_USER = config("EMAIL_HOST_USER", cast=str, default="")
 EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", cast=str, default="")
 EMAIL_USE_TLS = config("EMAIL_USE_TLS", cast=bool, default=True)
 EMAIL_USE_SSL = config("EMAIL_USE_SSL", cast=bool, default=False)
+# Seconds before a stalled SMTP call gives up instead of holding a worker
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", cast=int, default=10)
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", cast=str, default="noreply@digitalpathai.com")
 
+# Outbound mail (helpers.mail): queued messages are sent by Celery workers over
+# a persistent connection; off, they are sent inline
+MAIL_PIPELINE_ENABLED = config("MAIL_PIPELINE_ENABLED", cast=bool, default=True)
+MAIL_IDLE_TIMEOUT = config("MAIL_IDLE_TIMEOUT", cast=float, default=30)
+# Messages per MailConnection.send() call; a drain is also published every
+# MAIL_BATCH_SIZE queued messages
+MAIL_BATCH_SIZE = config("MAIL_BATCH_SIZE", cast=int, default=50)
+# Seconds between scheduled drains: the longest a partial batch waits
+MAIL_FLUSH_INTERVAL = config("MAIL_FLUSH_INTERVAL", cast=float, default=2.0)
+# Attempts per queued message, and the backoff (seconds) between them
+MAIL_MAX_ATTEMPTS = config("MAIL_MAX_ATTEMPTS", cast=int, default=6)
+MAIL_RETRY_BASE = config("MAIL_RETRY_BASE", cast=int, default=30)
+MAIL_RETRY_MAX = config("MAIL_RETRY_MAX", cast=int, default=1800)
+
 # Django Allauth Configuration
 AUTHENTICATION_BACKENDS = [
     # Needed to login by username in Django admin
@@ -247,10 +300,109 @@ SOCIALACCOUNT_PROVIDERS = {
 # if DEBUG:
 #     EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# API pagination (keyset cursors; page_size is clamped to the max)
+API_PAGE_SIZE = config("API_PAGE_SIZE", cast=int, default=50)
+API_MAX_PAGE_SIZE = config("API_MAX_PAGE_SIZE", cast=int, default=200)
+
+# Seconds an authenticated user's snapshot may be served from cache (see
+# helpers.api_auth); saves and deletes invalidate it immediately
+AUTH_USER_CACHE_TTL = config("AUTH_USER_CACHE_TTL", cast=int, default=60)
+
+# Password hashing pool (accounts.hashing): threads that run PBKDF2, and how
+# many hash calls may run or wait before the API answers 503
+PASSWORD_HASHING_WORKERS = config("PASSWORD_HASHING_WORKERS", cast=int, default=2)
+PASSWORD_HASHING_MAX_PENDING = config("PASSWORD_HASHING_MAX_PENDING", cast=int, default=8)
+
+# Waitlist (waitlists.limits): sign-ups allowed per email over a rolling
+# window, with an optional counter in the shared cache in front of the query
+WAITLIST_SIGNUP_CAP = config("WAITLIST_SIGNUP_CAP", cast=int, default=5)
+WAITLIST_SIGNUP_WINDOW = config("WAITLIST_SIGNUP_WINDOW", cast=int, default=24 * 60 * 60)
+WAITLIST_SIGNUP_CAP_CACHE = config("WAITLIST_SIGNUP_CAP_CACHE", cast=bool, default=True)
+# Write-behind ingestion (waitlists.buffer): anonymous sign-ups are answered
+# 202 and saved in batches from a Redis stream (redis:// URL) or spool file
+WAITLIST_BUFFERED_INGESTION = config("WAITLIST_BUFFERED_INGESTION", cast=bool, default=False)
+WAITLIST_BUFFER = config("WAITLIST_BUFFER", cast=str, default=str(BASE_DIR / "waitlist.spool"))
+WAITLIST_BUFFER_BATCH_SIZE = config("WAITLIST_BUFFER_BATCH_SIZE", cast=int, default=500)
+
+# Staff exports and imports (helpers.streaming, waitlists.transfer): rows per
+# database round trip when streaming out, rows per bulk_create when loading
+EXPORT_CHUNK_SIZE = config("EXPORT_CHUNK_SIZE", cast=int, default=2000)
+IMPORT_BATCH_SIZE = config("IMPORT_BATCH_SIZE", cast=int, default=2000)
+
+# Projects
+# Upper bound on staleness for the cached /api/projects/summary/ payload
+PROJECTS_SUMMARY_CACHE_TIMEOUT = config("PROJECTS_SUMMARY_CACHE_TIMEOUT", cast=int, default=300)
+# Largest payload accepted by POST /api/projects/bulk/
+PROJECTS_BULK_MAX_ITEMS = config("PROJECTS_BULK_MAX_ITEMS", cast=int, default=5000)
+# Projects per keyset chunk of GET /api/projects/export/ (one prefetch per
+# child table per chunk)
+PROJECTS_EXPORT_CHUNK_SIZE = config("PROJECTS_EXPORT_CHUNK_SIZE", cast=int, default=500)
+
+# Retention (archive_old_records): contact messages and waitlist entries older
+# than this many days are moved to gzipped NDJSON files under ARCHIVE_DIR,
+# ARCHIVE_CHUNK_SIZE rows per transaction. On PostgreSQL both tables are
+# partitioned by month, with partitions created this many months ahead
+ARCHIVE_RETENTION_DAYS = config("ARCHIVE_RETENTION_DAYS", cast=int, default=365)
+ARCHIVE_DIR = config("ARCHIVE_DIR", cast=str, default=str(BASE_DIR / "archive"))
+ARCHIVE_CHUNK_SIZE = config("ARCHIVE_CHUNK_SIZE", cast=int, default=5000)
+PARTITION_MONTHS_AHEAD = config("PARTITION_MONTHS_AHEAD", cast=int, default=3)
+
+# Request metrics (helpers.metrics) exposed at /metrics; the scraper must send
+# "Authorization: Bearer <METRICS_TOKEN>", and without a token the endpoint
+# only answers when DEBUG is on. Set the PROMETHEUS_MULTIPROC_DIR environment
+# variable to aggregate across workers
+METRICS_ENABLED = config("METRICS_ENABLED", cast=bool, default=True)
+METRICS_TOKEN = config("METRICS_TOKEN", cast=str, default="")
+
 # Celery Configuration
 CELERY_BROKER_URL = config("CELERY_BROKER_URL", cast=str, default="redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = config("CELERY_RESULT_BACKEND", cast=str, default="redis://localhost:6379/0")
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
-CELERY_TIMEZONE = TIME_ZONE
\ No newline at end of file
+CELERY_TIMEZONE = TIME_ZONE
+# Task modules outside the apps' tasks.py
+CELERY_IMPORTS = ["helpers.mail"]
+CELERY_BEAT_SCHEDULE = {
+    "relay-contact-outbox": {
+        "task": "contact.tasks.relay_contact_outbox",
+        "schedule": config("CONTACT_OUTBOX_RELAY_INTERVAL", cast=float, default=30.0),
+    },
+    "sweep-contact-messages": {
+        "task": "contact.tasks.sweep_contact_messages",
+        "schedule": config("CONTACT_EMAIL_SWEEP_INTERVAL", cast=float, default=300.0),
+    },
+}
+# Nothing is buffered unless WAITLIST_BUFFERED_INGESTION is on (turning it off,
+# flush what is left first: the flush_waitlist_buffer task is still registered)
+if WAITLIST_BUFFERED_INGESTION:
+    CELERY_BEAT_SCHEDULE["flush-waitlist-buffer"] = {
+        "task": "waitlists.tasks.flush_waitlist_buffer",
+        "schedule": config("WAITLIST_BUFFER_FLUSH_INTERVAL", cast=float, default=5.0),
+    }
+# Inline mail (MAIL_PIPELINE_ENABLED off) leaves nothing to drain
+if MAIL_PIPELINE_ENABLED:
+    CELERY_BEAT_SCHEDULE["drain-mail-queue"] = {
+        "task": "helpers.mail.drain_mail_queue",
+        "schedule": MAIL_FLUSH_INTERVAL,
+    }
+# Connect timeout for tasks published from requests (helpers.broker)
+BROKER_PUBLISH_TIMEOUT = config("BROKER_PUBLISH_TIMEOUT", cast=float, default=1.0)
+
+# Contact outbox (contact.outbox)
+# Rows published per relay transaction
+CONTACT_OUTBOX_BATCH_SIZE = config("CONTACT_OUTBOX_BATCH_SIZE", cast=int, default=100)
+# Age (seconds) before the relay takes over a row from its on-commit publish
+CONTACT_OUTBOX_RELAY_DELAY = config("CONTACT_OUTBOX_RELAY_DELAY", cast=int, default=60)
+
+# Contact email delivery (contact.tasks)
+# Failed sends before a message is dead-lettered
+CONTACT_EMAIL_MAX_ATTEMPTS = config("CONTACT_EMAIL_MAX_ATTEMPTS", cast=int, default=6)
+# Full-jitter exponential backoff: retry n waits up to min(MAX, BASE * 2**n) seconds
+CONTACT_EMAIL_RETRY_BASE = config("CONTACT_EMAIL_RETRY_BASE", cast=int, default=30)
+CONTACT_EMAIL_RETRY_MAX = config("CONTACT_EMAIL_RETRY_MAX", cast=int, default=1800)
+# Unsent messages untouched this long (seconds) are re-queued or dead-lettered by the sweep
+CONTACT_EMAIL_STALE_AFTER = config("CONTACT_EMAIL_STALE_AFTER", cast=int, default=7200)
+# SMTP circuit breaker (helpers.mail.smtp_breaker), shared through the cache
+SMTP_CIRCUIT_FAILURE_THRESHOLD = config("SMTP_CIRCUIT_FAILURE_THRESHOLD", cast=int, default=5)
+SMTP_CIRCUIT_RESET_TIMEOUT = config("SMTP_CIRCUIT_RESET_TIMEOUT", cast=int, default=60)
\ No newline at end of file
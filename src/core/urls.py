@@ -14,9 +14,12 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
+from helpers.metrics import metrics_view
+
 from .api import api
 
 urlpatterns = [
@@ -25,3 +28,6 @@ urlpatterns = [
     path("api/", include("projects.urls")),  # Projects API
     path("accounts/", include("allauth.urls")),  # Required for allauth email verification
 ]
+
+if settings.METRICS_ENABLED:
+    urlpatterns.append(path("metrics", metrics_view))  # Prometheus scrape target
@@ -1,10 +1,12 @@
 from .api_auth import (
    api_auth_user_required,
-   api_auth_user_or_annon
+   api_auth_user_or_annon,
+   api_auth_staff_required
 )
 
 
 __all__ = [
     api_auth_user_required,
-    api_auth_user_or_annon
+    api_auth_user_or_annon,
+    api_auth_staff_required
 ]
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Admin building blocks for tables too large for exact counts.
+
+LargeTableAdminMixin swaps the changelist paginator for
+EstimatedCountPaginator and drops the second, unfiltered COUNT(*) that the
+changelist runs to show "N results (M total)". PaginatedTabularInline shows
+a model's children a page at a time instead of rendering all of them on the
+parent's change form.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using="default"):
+    """
+    The planner's row estimate for the model's table, or None where the
+    database keeps none (anything but PostgreSQL, or a table never analyzed).
+    A partitioned table keeps no estimate of its own (-1), so its partitions'
+    estimates are added up.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT SUM(reltuples) FILTER (WHERE reltuples >= 0)::bigint FROM ("
+            "  SELECT reltuples FROM pg_class WHERE oid = %s::regclass AND relkind <> 'p'"
+            "  UNION ALL"
+            "  SELECT c.reltuples FROM pg_partition_tree(%s::regclass) AS t"
+            "  JOIN pg_class c ON c.oid = t.relid WHERE t.isleaf"
+            ") AS estimates",
+            [table, table],
+        )
+        return cursor.fetchone()[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator whose count never scans a large table.
+
+    An unfiltered changelist uses the planner's estimate once it passes
+    ADMIN_ESTIMATED_COUNT_THRESHOLD rows. Otherwise at most ADMIN_COUNT_LIMIT
+    rows are counted, so a broad filter or search stops paginating there.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return queryset.order_by().values("pk")[:settings.ADMIN_COUNT_LIMIT].count()
+
+
+class LargeTableAdminMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset over one page of the parent's children"""
+
+    per_page = 20
+    page_number = 1
+    query = None
+
+    @classmethod
+    def page_param(cls):
+        return f"{cls.get_default_prefix()}-page"
+
+    def get_queryset(self):
+        if not hasattr(self, "_page"):
+            queryset = super().get_queryset()
+            # Children share "order" values; the pk keeps the pages disjoint
+            ordering = queryset.query.order_by or queryset.model._meta.ordering
+            self.paginator = Paginator(queryset.order_by(*ordering, "pk"), self.per_page)
+            self._page = self.paginator.get_page(self.page_number)
+            self._queryset = list(self._page.object_list)
+        return self._queryset
+
+    @property
+    def page(self):
+        self.get_queryset()
+        return self._page
+
+    @property
+    def pages(self):
+        """Links for the inline's page navigation, with gaps as None"""
+        query = self.query.copy()
+        links = []
+        for number in self.paginator.get_elided_page_range(self.page.number):
+            if number == self.paginator.ELLIPSIS:
+                links.append(None)
+                continue
+            query[self.page_param()] = number
+            links.append({"number": number, "url": f"?{query.urlencode()}", "current": number == self.page.number})
+        return links
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    formset = PaginatedInlineFormSet
+    template = "admin/edit_inline/tabular_paginated.html"
+    per_page = 20
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        # inlineformset_factory() builds a new class per request
+        formset.per_page = self.per_page
+        formset.page_number = request.GET.get(formset.page_param(), 1)
+        formset.query = request.GET
+        return formset
@@ -1,10 +1,83 @@
-from ninja_jwt.authentication import JWTAuth
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from ninja.errors import HttpError
+from ninja_jwt.authentication import AsyncJWTAuth
+from ninja_jwt.exceptions import AuthenticationFailed, InvalidToken
+from ninja_jwt.settings import api_settings
 
+from .cache import response_cache
 
-def allow_annon(request):
-    if not request.user.is_authenticated:
+User = get_user_model()
+
+# Everything but the password hash, in model field order for User.from_db()
+USER_SNAPSHOT_FIELDS = [
+    field.attname for field in User._meta.concrete_fields if field.attname != "password"
+]
+
+
+async def _load_user_snapshot(user_id):
+    return await User.objects.filter(pk=user_id).values_list(*USER_SNAPSHOT_FIELDS).afirst()
+
+
+class CachedUserJWTAuth(AsyncJWTAuth):
+    """
+    AsyncJWTAuth that resolves the token's user from a cached snapshot
+    instead of a query per request. Snapshots carry the "user:<id>" tag, so
+    saving or deleting the user (deactivation, password change) swaps the
+    tag version and the next request reloads it; AUTH_USER_CACHE_TTL bounds
+    the staleness of writes that bypass model signals.
+    """
+
+    async def async_jwt_authenticate(self, request, token):
+        request.user = AnonymousUser()
+        # Signature and expiry checks are pure CPU, no thread hop needed
+        validated_token = self.get_validated_token(token)
+        user = await self.aget_user(validated_token)
+        request.user = user
+        return user
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        snapshot = await response_cache.aget_or_set(
+            f"auth-user:{user_id}",
+            lambda: _load_user_snapshot(user_id),
+            tags=[f"user:{user_id}"],
+            ttl=settings.AUTH_USER_CACHE_TTL,
+        )
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"))
+        # The password is left deferred; it loads on first access
+        user = User.from_db(DEFAULT_DB_ALIAS, USER_SNAPSHOT_FIELDS, snapshot)
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"))
+        return user
+
+
+class CachedStaffJWTAuth(CachedUserJWTAuth):
+    """CachedUserJWTAuth for staff-only endpoints; other users get a 403"""
+
+    async def aget_user(self, validated_token):
+        user = await super().aget_user(validated_token)
+        if not user.is_staff:
+            raise HttpError(403, "Staff access required")
+        return user
+
+
+async def allow_annon(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        # Resolve the lazy user now so handlers never touch the sync ORM for it
+        request.user = user
         return True
-    
 
-api_auth_user_required = [JWTAuth()]
-api_auth_user_or_annon = [JWTAuth(), allow_annon]
\ No newline at end of file
+
+api_auth_user_required = [CachedUserJWTAuth()]
+api_auth_user_or_annon = [CachedUserJWTAuth(), allow_annon]
+api_auth_staff_required = [CachedStaffJWTAuth()]
@@ -0,0 +1,94 @@
+"""
+Moving old rows out of the database into gzipped NDJSON files.
+
+Rows are read and removed ARCHIVE_CHUNK_SIZE at a time, each chunk written
+and fsync'ed before the short transaction that deletes it, so no lock is
+held for long and a crash loses nothing: a chunk that was written but not
+deleted is archived again on the next run (files may hold duplicates).
+Each chunk is a separate gzip member; `zcat` reads the file as one stream.
+
+A month partition that is entirely past the cutoff is exported whole first,
+to a .partial file renamed into place once complete. Only then, in one
+transaction, are its rows' dependents deleted and the partition detached
+and dropped: a run that dies earlier leaves the rows and their dependents
+as they were, and the next run exports the month again from the start.
+"""
+import gzip
+import os
+
+from django.db import connection, models, transaction
+
+from .partitions import LOCK_TIMEOUT, detach_partition
+from .streaming import ndjson_lines
+
+
+def archive_path(directory, table, label):
+    os.makedirs(os.path.join(directory, table), exist_ok=True)
+    return os.path.join(directory, table, f"{table}_{label}.ndjson.gz")
+
+
+def _append(path, rows):
+    with open(path, "ab") as archive:
+        with gzip.GzipFile(fileobj=archive, mode="wb") as member:
+            member.writelines(ndjson_lines(rows))
+        archive.flush()
+        os.fsync(archive.fileno())
+
+
+def _delete_dependents(model, rows):
+    """Cascade by hand for rows that leave with a dropped partition"""
+    for related in model._meta.related_objects:
+        if related.on_delete is models.CASCADE:
+            related.related_model._base_manager.filter(**{f"{related.field.name}__in": rows.values("pk")}).delete()
+
+
+def _columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def archive_before(model, column, cutoff, path, chunk_size):
+    """Archive and delete rows whose column is before cutoff; returns how many"""
+    stale = model._base_manager.filter(**{f"{column}__lt": cutoff})
+    archived = 0
+    while True:
+        rows = list(stale.order_by("pk").values(*_columns(model))[:chunk_size])
+        if not rows:
+            return archived
+        _append(path, rows)
+        with transaction.atomic():
+            # The range condition keeps the delete to the partitions involved
+            stale.filter(pk__in=[row["id"] for row in rows]).delete()
+        archived += len(rows)
+
+
+def _export(rows, path, chunk_size, last_id=0):
+    """Append rows after last_id to path in pk order; returns (count, last id)"""
+    exported = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last_id).order_by("pk").values(*_columns(rows.model))[:chunk_size])
+        if not chunk:
+            return exported, last_id
+        _append(path, chunk)
+        exported += len(chunk)
+        last_id = chunk[-1]["id"]
+
+
+def archive_partition(model, column, partition, lower, upper, path, chunk_size):
+    """Archive every row of a month partition, then drop it; returns how many"""
+    in_month = model._base_manager.filter(**{f"{column}__gte": lower, f"{column}__lt": upper})
+    partial = f"{path}.partial"
+    if os.path.exists(partial):
+        # Left by a run that died before the drop; start it over
+        os.remove(partial)
+    archived, last_id = _export(in_month, partial, chunk_size)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+        # Rows written to the month since are archived too, and no more can arrive
+        cursor.execute(f"LOCK TABLE {partition} IN SHARE MODE")
+        late, _last_id = _export(in_month, partial, chunk_size, last_id)
+        archived += late
+        if archived:
+            os.replace(partial, path)
+        _delete_dependents(model, in_month)
+        detach_partition(connection, model._meta.db_table, partition)
+    return archived
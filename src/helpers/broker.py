@@ -0,0 +1,44 @@
+"""
+Publishing Celery tasks from a request without stalling on the broker.
+
+A plain delay() retries the broker connection (and, for tasks that keep
+results, the result backend) for several seconds before giving up. The
+connections handed out here make one attempt with a BROKER_PUBLISH_TIMEOUT
+connect timeout, so an outage costs the caller a refused connection. Callers
+pair them with apply_async(retry=False) and keep a way to publish later.
+"""
+import threading
+from contextlib import contextmanager
+
+from celery import current_app
+from django.conf import settings
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _fail_fast_pool():
+    # Created lazily so each (forked) process gets its own connections
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                connection = current_app.connection_for_write(
+                    transport_options={"max_retries": 0},
+                    connect_timeout=settings.BROKER_PUBLISH_TIMEOUT,
+                )
+                _pool = connection.Pool(limit=current_app.conf.broker_pool_limit)
+    return _pool
+
+
+@contextmanager
+def fail_fast_connection():
+    """A pooled broker connection that raises at once if the broker is down"""
+    with _fail_fast_pool().acquire(block=True, timeout=settings.BROKER_PUBLISH_TIMEOUT) as connection:
+        yield connection
+
+
+def publish(task, args=(), **options):
+    """task.apply_async() over a fail-fast connection; raises if the broker is down"""
+    with fail_fast_connection() as connection:
+        return task.apply_async(args, retry=False, connection=connection, **options)
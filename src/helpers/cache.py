@@ -0,0 +1,327 @@
+"""
+Two-tier response cache.
+
+Tier 1 is a per-process LRU with TTL and size-based eviction; tier 2 is the
+shared Django cache (Redis in production, locmem locally). Entries are keyed
+by the current version token of every tag they carry, so invalidating a tag
+(e.g. "project:42") swaps its token and orphans exactly the entries that
+depend on it, in every process, without scanning keys.
+
+Tag versions, invalidations and the stampede lock only work across workers
+through a shared tier that really is shared. Without REDIS_CACHE_URL every
+process has its own locmem cache, and check_shared_cache() warns on
+"check --deploy" unless DEBUG is on (the projects summary cache, in the same
+default cache, has the same problem).
+"""
+import hashlib
+import inspect
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import transaction
+
+from .metrics import record_cache
+
+TAG_KEY_PREFIX = "cachetag:"
+ENTRY_KEY_PREFIX = "resp:"
+LOCK_KEY_PREFIX = "resp-lock:"
+
+# Deletes a lock only while it still holds the caller's token
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """The default cache should be shared by the workers outside development"""
+    if settings.DEBUG or not isinstance(caches["default"], LocMemCache):
+        return []
+    return [
+        # Not an Error: deploys without REDIS_CACHE_URL ran before this check did
+        checks.Warning(
+            "The default cache is a per-process locmem cache: with more than one worker, cache "
+            "invalidations and stampede locks only reach the process that made them.",
+            hint="Set REDIS_CACHE_URL. A single-process deployment can add helpers.W001 to "
+            "SILENCED_SYSTEM_CHECKS.",
+            id="helpers.W001",
+        )
+    ]
+
+
+def release_lock(cache, key, token):
+    """Delete a lock taken with cache.add(key, token) unless another owner has it by now"""
+    if isinstance(cache, RedisCache):
+        # Atomic on Redis; values are stored serialized, so compare those
+        key = cache.make_and_validate_key(key)
+        client = cache._cache.get_client(key, write=True)
+        client.eval(RELEASE_LOCK_SCRIPT, 1, key, cache._cache._serializer.dumps(token))
+    elif cache.get(key) == token:
+        cache.delete(key)
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU holding pickled payloads"""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (expires_at, payload)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, payload = item
+            if expires_at < time.monotonic():
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return payload
+
+    def set(self, key, payload, ttl):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (time.monotonic() + ttl, payload)
+            self._bytes += len(payload)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _pop(self, key):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= len(item[1])
+
+
+class TieredCache:
+    def __init__(self, alias="default", local_max_entries=1024, local_max_bytes=32 * 1024 * 1024,
+                 local_ttl=5, ttl=300, lock_timeout=10):
+        self.alias = alias
+        self.local = LocalLRU(local_max_entries, local_max_bytes)
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def tag_versions(self, tags):
+        """
+        Fetch the current version token of each tag in one round trip,
+        creating tokens for tags that have none yet
+        """
+        keys = [TAG_KEY_PREFIX + tag for tag in tags]
+        versions = self.shared.get_many(keys) if keys else {}
+        for key in keys:
+            if key not in versions:
+                self.shared.add(key, uuid.uuid4().hex, timeout=None)
+                versions[key] = self.shared.get(key)
+        return [versions[key] for key in keys]
+
+    def invalidate_tags(self, *tags):
+        self.shared.set_many(
+            {TAG_KEY_PREFIX + tag: uuid.uuid4().hex for tag in tags},
+            timeout=None,
+        )
+
+    def _entry_key(self, key, tags):
+        versions = ":".join(f"{tag}={version}" for tag, version in zip(tags, self.tag_versions(tags)))
+        digest = hashlib.sha1(f"{key}|{versions}".encode()).hexdigest()
+        return ENTRY_KEY_PREFIX + digest
+
+    def _lookup(self, entry_key):
+        payload = self.local.get(entry_key)
+        if payload is None:
+            payload = self.shared.get(entry_key)
+            if payload is None:
+                return None
+            self.local.set(entry_key, payload, self.local_ttl)
+        return payload
+
+    def _get(self, key, tags):
+        entry_key = self._entry_key(key, tags)
+        return entry_key, self._lookup(entry_key)
+
+    def get_or_set(self, key, producer, tags=(), ttl=None):
+        """
+        Return the cached value for key, calling producer() on a miss.
+        Concurrent misses for the same entry run producer() once: threads in
+        this process wait on an event, other processes wait on a shared lock.
+        """
+        tags = sorted(set(tags))
+        entry_key = self._entry_key(key, tags)
+        payload = self._lookup(entry_key)
+        record_cache("response", payload is not None)
+        if payload is not None:
+            return pickle.loads(payload)
+
+        with self._inflight_lock:
+            event = self._inflight.get(entry_key)
+            leader = event is None
+            if leader:
+                event = self._inflight[entry_key] = threading.Event()
+        if not leader:
+            event.wait(self.lock_timeout)
+            payload = self._lookup(entry_key)
+            if payload is not None:
+                return pickle.loads(payload)
+            return producer()
+
+        try:
+            return self._fill(entry_key, producer, ttl or self.ttl)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(entry_key, None)
+            event.set()
+
+    def _fill(self, entry_key, producer, ttl):
+        lock_key = LOCK_KEY_PREFIX + entry_key
+        token = uuid.uuid4().hex
+        locked = self.shared.add(lock_key, token, timeout=self.lock_timeout)
+        if not locked:
+            # Another process is filling this entry; wait for it briefly,
+            # then produce without the lock (it isn't ours to release)
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                payload = self._lookup(entry_key)
+                if payload is not None:
+                    return pickle.loads(payload)
+        try:
+            value = producer()
+            self._store(entry_key, value, ttl)
+            return value
+        finally:
+            if locked:
+                release_lock(self.shared, lock_key, token)
+
+    def _store(self, entry_key, value, ttl):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self.shared.set(entry_key, payload, ttl)
+        self.local.set(entry_key, payload, min(ttl, self.local_ttl))
+
+    async def aget_or_set(self, key, producer, tags=(), ttl=None):
+        """
+        Async variant of get_or_set for coroutine producers. Cache I/O runs
+        off the event loop, the lookup in a single thread hop; misses are not
+        coalesced.
+        """
+        tags = sorted(set(tags))
+        entry_key, payload = await sync_to_async(self._get, thread_sensitive=False)(key, tags)
+        record_cache("response", payload is not None)
+        if payload is not None:
+            return pickle.loads(payload)
+        value = await producer()
+        await sync_to_async(self._store, thread_sensitive=False)(entry_key, value, ttl or self.ttl)
+        return value
+
+
+response_cache = TieredCache(
+    local_max_entries=settings.RESPONSE_CACHE_LOCAL_MAX_ENTRIES,
+    local_max_bytes=settings.RESPONSE_CACHE_LOCAL_MAX_BYTES,
+    local_ttl=settings.RESPONSE_CACHE_LOCAL_TTL,
+    ttl=settings.RESPONSE_CACHE_TTL,
+)
+
+
+def invalidate_tags(*tags):
+    """Invalidate every cached response carrying any of tags once the transaction commits"""
+    transaction.on_commit(lambda: response_cache.invalidate_tags(*tags))
+
+
+def _cache_key(request, per_user):
+    key = request.build_absolute_uri()
+    if per_user:
+        key += f"|user={request.user.pk}"
+    return key
+
+
+def cache_response(tags, ttl=None, per_user=False):
+    """
+    Opt a DRF view method into the response cache. tags is a callable
+    receiving (request, *args, **kwargs) and returning the tags the
+    response depends on. Only 200 responses are cached.
+    """
+    from rest_framework.response import Response
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            def produce():
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    raise _Uncacheable(response)
+                return response.data
+
+            try:
+                data = response_cache.get_or_set(
+                    _cache_key(request, per_user),
+                    produce,
+                    tags=tags(request, *args, **kwargs),
+                    ttl=ttl,
+                )
+            except _Uncacheable as e:
+                return e.response
+            return Response(data)
+        return wrapper
+    return decorator
+
+
+def cache_result(tags, ttl=None, per_user=False):
+    """
+    Opt a Ninja operation into the response cache. The handler must return
+    plain, picklable data (e.g. a schema's .dict()).
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(request, *args, **kwargs):
+                return await response_cache.aget_or_set(
+                    _cache_key(request, per_user),
+                    lambda: func(request, *args, **kwargs),
+                    tags=tags(request, *args, **kwargs),
+                    ttl=ttl,
+                )
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(request, *args, **kwargs):
+            return response_cache.get_or_set(
+                _cache_key(request, per_user),
+                lambda: func(request, *args, **kwargs),
+                tags=tags(request, *args, **kwargs),
+                ttl=ttl,
+            )
+        return wrapper
+    return decorator
+
+
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
@@ -0,0 +1,84 @@
+"""
+Circuit breaker with its state in the shared Django cache.
+
+Every process consults the same keys (Redis in production), so once
+`failure_threshold` consecutive failures have been recorded the breaker opens
+for all of them: callers get CircuitOpen for `reset_timeout` seconds instead
+of adding load to a dependency that is already failing. After that a single
+caller at a time is let through as a trial (half-open); its success closes
+the breaker, its failure opens it again.
+
+With the locmem fallback cache the state is per process.
+"""
+import time
+
+from django.core.cache import caches
+
+
+class CircuitOpen(Exception):
+    """The breaker is open; retry_after is the number of seconds to wait"""
+
+    def __init__(self, name, retry_after):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.0f}s")
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, reset_timeout=60, alias="default"):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.alias = alias
+        self._failures_key = f"circuit:{name}:failures"
+        self._opened_until_key = f"circuit:{name}:opened_until"
+        self._trial_key = f"circuit:{name}:trial"
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def retry_after(self):
+        """Seconds until the breaker lets a trial call through; 0 when it would"""
+        opened_until = self.cache.get(self._opened_until_key)
+        if opened_until is None:
+            return 0.0
+        return max(0.0, opened_until - time.time())
+
+    def is_closed(self):
+        return self.cache.get(self._opened_until_key) is None
+
+    def before_call(self):
+        """Raise CircuitOpen unless the caller may use the dependency now"""
+        opened_until = self.cache.get(self._opened_until_key)
+        if opened_until is None:
+            return
+        remaining = opened_until - time.time()
+        if remaining > 0:
+            raise CircuitOpen(self.name, remaining)
+        # Half-open: the first caller to claim the trial goes ahead
+        if not self.cache.add(self._trial_key, 1, timeout=self.reset_timeout):
+            raise CircuitOpen(self.name, self.reset_timeout)
+
+    def record_success(self):
+        self.cache.delete_many([self._failures_key, self._opened_until_key, self._trial_key])
+
+    def record_failure(self):
+        if self.cache.get(self._opened_until_key) is not None:
+            # A failed trial (or a call that raced the opening) re-opens it
+            self._open()
+            return
+        # Failures older than reset_timeout no longer count as consecutive
+        self.cache.add(self._failures_key, 0, timeout=self.reset_timeout)
+        try:
+            failures = self.cache.incr(self._failures_key)
+        except ValueError:
+            # The counter expired between add() and incr()
+            self.cache.add(self._failures_key, 1, timeout=self.reset_timeout)
+            failures = 1
+        if failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.cache.set(self._opened_until_key, time.time() + self.reset_timeout, timeout=None)
+        self.cache.delete_many([self._failures_key, self._trial_key])
@@ -0,0 +1,280 @@
+"""
+Outbound mail.
+
+Request handlers queue messages with queue_mail(), which puts each one on
+MAIL_QUEUE, a durable queue on the Celery broker, over a fail-fast
+connection and returns: the request doesn't wait for SMTP, and a broker
+outage is reported to the caller instead of losing the message.
+
+The drain_mail_queue task empties the queue in batches of up to
+MAIL_BATCH_SIZE, each handed to the process's persistent SMTP connection in
+one MailConnection.send() call. A drain is published every MAIL_BATCH_SIZE
+queued messages and runs on Celery beat every MAIL_FLUSH_INTERVAL seconds,
+so a partial batch waits at most that long. A message is acknowledged only
+once its batch has been sent; one taken by a worker that dies is redelivered
+by the broker (delivery is at least once).
+
+MailConnection reuses one connection across batches and reopens it after
+MAIL_IDLE_TIMEOUT seconds without mail. Messages go out one at a time over
+it: a refused recipient fails only its own message, and when the server
+drops the connection it is reopened and delivery resumes from the first
+message not yet accepted. A message that couldn't be delivered becomes a
+send_queued_mail task, retried with full-jitter exponential backoff up to
+MAIL_MAX_ATTEMPTS; one the server rejects outright (5xx) is logged and
+dropped.
+
+send_now() delivers synchronously over the same connection, for callers that
+need the outcome (the contact task records sent/failed). All of them consult
+smtp_breaker, which pauses them cluster-wide while the provider keeps failing.
+"""
+import logging
+import random
+import smtplib
+import threading
+import time
+
+from celery import current_app, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+
+from helpers.broker import fail_fast_connection, publish
+from helpers.circuit_breaker import CircuitBreaker, CircuitOpen
+
+logger = logging.getLogger(__name__)
+
+# Raised when the server hangs up; the connection is reopened
+DISCONNECTED = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+MAIL_QUEUE = "mail.outbound"
+QUEUED_KEY = "mail-queue:queued"
+
+
+def backoff(attempts, base, maximum):
+    """Full-jitter exponential backoff after the given number of failed attempts"""
+    return random.uniform(0, min(maximum, base * 2 ** (attempts - 1)))
+
+
+def is_permanent(error):
+    """Rejections of a message that no retry will fix"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPDataError) and error.smtp_code >= 500
+
+
+class MailConnection:
+    """A persistent SMTP connection shared by the threads of a process"""
+
+    def __init__(self, idle_timeout=30):
+        self.idle_timeout = idle_timeout
+        self._connection = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def send(self, messages):
+        """
+        Send each message in turn; returns (message, error) for those that
+        failed. A dropped connection is reopened once per message, and a
+        message the server hung up on is sent again only if it wasn't accepted.
+        """
+        failures = []
+        with self._lock:
+            if self._connection is not None and time.monotonic() - self._last_used >= self.idle_timeout:
+                # Most likely closed by the server by now
+                self._close()
+            down = None
+            for message in messages:
+                if down is not None:
+                    # The server can't be reached; don't wait on it once per message
+                    failures.append((message, down))
+                    continue
+                try:
+                    self._send(message)
+                except DISCONNECTED:
+                    self._close()
+                    try:
+                        self._send(message)
+                    except Exception as e:
+                        self._close()
+                        failures.append((message, e))
+                        if isinstance(e, DISCONNECTED):
+                            down = e
+                except smtplib.SMTPResponseException as e:
+                    # Refused with the session reset; the connection is still good
+                    failures.append((message, e))
+                except smtplib.SMTPRecipientsRefused as e:
+                    failures.append((message, e))
+                except Exception as e:
+                    self._close()
+                    failures.append((message, e))
+        return failures
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _send(self, message):
+        if self._connection is None:
+            # Kept only once open, so a refused connect is retried from scratch
+            connection = get_connection(fail_silently=False)
+            connection.open()
+            self._connection = connection
+        self._connection.send_messages([message])
+        self._last_used = time.monotonic()
+
+    def _close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+mail_connection = MailConnection(idle_timeout=settings.MAIL_IDLE_TIMEOUT)
+
+smtp_breaker = CircuitBreaker(
+    "smtp",
+    failure_threshold=settings.SMTP_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.SMTP_CIRCUIT_RESET_TIMEOUT,
+)
+
+
+def send_now(subject, message, from_email, recipient_list):
+    """send_mail() over the process's persistent connection; raises on failure"""
+    failures = mail_connection.send([EmailMessage(subject, message, from_email, recipient_list)])
+    if failures:
+        raise failures[0][1]
+    return 1
+
+
+def _reschedule(recipient_list, error, attempts):
+    """Backoff before the next attempt at a failed message, or None once it is dropped"""
+    if is_permanent(error):
+        logger.error(f"Mail to {recipient_list} rejected, dropped: {error}")
+        return None
+    if attempts >= settings.MAIL_MAX_ATTEMPTS:
+        logger.error(f"Mail to {recipient_list} dropped after {attempts} attempt(s): {error}")
+        return None
+    countdown = backoff(attempts, settings.MAIL_RETRY_BASE, settings.MAIL_RETRY_MAX)
+    logger.warning(f"Error sending mail to {recipient_list}, retry in {countdown:.0f}s: {error}")
+    return countdown
+
+
+def _take(queue, batch_size):
+    batch = []
+    while len(batch) < batch_size:
+        try:
+            batch.append(queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def drain(connection, batch_size=None):
+    """
+    Send everything queued on MAIL_QUEUE, a batch per MailConnection.send()
+    call; returns the number of messages handled. Each batch is acknowledged
+    once sent, with the messages that failed rescheduled first.
+    """
+    batch_size = batch_size or settings.MAIL_BATCH_SIZE
+    handled = 0
+    with connection.SimpleQueue(MAIL_QUEUE) as queue:
+        while True:
+            try:
+                smtp_breaker.before_call()
+            except CircuitOpen:
+                # Left queued for a drain after the breaker closes
+                return handled
+            batch = _take(queue, batch_size)
+            if not batch:
+                return handled
+            emails = [
+                EmailMessage(
+                    item.payload["subject"], item.payload["message"],
+                    item.payload["from_email"], item.payload["recipient_list"],
+                )
+                for item in batch
+            ]
+            failures = {id(email): error for email, error in mail_connection.send(emails)}
+            transient = 0
+            for item, email in zip(batch, emails):
+                error = failures.get(id(email))
+                if error is None:
+                    continue
+                transient += not is_permanent(error)
+                countdown = _reschedule(email.to, error, 1)
+                if countdown is not None:
+                    send_queued_mail.apply_async(kwargs={**item.payload, "attempts": 1}, countdown=countdown)
+            if transient == len(batch):
+                smtp_breaker.record_failure()
+            else:
+                smtp_breaker.record_success()
+            for item in batch:
+                item.ack()
+            handled += len(batch)
+
+
+@shared_task(ignore_result=True)
+def drain_mail_queue():
+    """Send the mail queued by queue_mail() in batches"""
+    with current_app.connection_for_read() as connection:
+        handled = drain(connection)
+    if handled:
+        logger.info(f"Drained {handled} queued message(s)")
+    return handled
+
+
+@shared_task(bind=True, max_retries=None, ignore_result=True, acks_late=True, reject_on_worker_lost=True)
+def send_queued_mail(self, subject, message, from_email, recipient_list, attempts=0):
+    """Deliver a message the drain couldn't, retrying transient failures"""
+    retry_kwargs = {
+        "subject": subject,
+        "message": message,
+        "from_email": from_email,
+        "recipient_list": recipient_list,
+    }
+    try:
+        smtp_breaker.before_call()
+    except CircuitOpen as e:
+        # Parked without spending an attempt, spread over a reset period
+        countdown = e.retry_after + random.uniform(0, smtp_breaker.reset_timeout)
+        raise self.retry(countdown=countdown, kwargs={**retry_kwargs, "attempts": attempts})
+
+    try:
+        send_now(subject, message, from_email, recipient_list)
+    except Exception as e:
+        attempts += 1
+        if not is_permanent(e):
+            smtp_breaker.record_failure()
+        countdown = _reschedule(recipient_list, e, attempts)
+        if countdown is None:
+            return
+        raise self.retry(exc=e, countdown=countdown, kwargs={**retry_kwargs, "attempts": attempts})
+    smtp_breaker.record_success()
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """
+    Queue a plain-text email for a worker; send_mail() without the wait.
+    Raises if the broker can't take it, so the caller can report the failure.
+    """
+    if not settings.MAIL_PIPELINE_ENABLED:
+        send_now(subject, message, from_email, recipient_list)
+        return
+    payload = {
+        "subject": subject,
+        "message": message,
+        "from_email": from_email,
+        "recipient_list": list(recipient_list),
+    }
+    with fail_fast_connection() as connection:
+        with connection.SimpleQueue(MAIL_QUEUE) as queue:
+            queue.put(payload, serializer="json")
+
+    cache.add(QUEUED_KEY, 0, timeout=None)
+    if cache.incr(QUEUED_KEY) % settings.MAIL_BATCH_SIZE == 0:
+        try:
+            publish(drain_mail_queue)
+        except Exception as e:
+            logger.warning(f"Broker unavailable, mail left to the scheduled drain: {e}")
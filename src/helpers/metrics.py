@@ -0,0 +1,215 @@
+"""
+Per-request metrics in Prometheus histograms, served at /metrics.
+
+The endpoint, mounted only with METRICS_ENABLED, answers scrapers that send
+"Authorization: Bearer <METRICS_TOKEN>"; without a token it is open only
+when DEBUG is on, and refused otherwise.
+
+RequestMetricsMiddleware times every request and records, per route
+template (e.g. "api/waitlists/<int:entry_id>/"), method and status:
+
+* total latency; for streamed responses, until the last chunk is sent;
+* the number of database queries and the time spent in them, through an
+  execute wrapper installed on every connection. Work done in worker
+  threads (sync_to_async) is attributed to the request that started it;
+* cache lookups by cache and result (see record_cache()).
+
+With PROMETHEUS_MULTIPROC_DIR set (before the process starts) each worker
+writes its samples to files in that directory and /metrics adds them up
+across all the gunicorn workers. The directory has to be emptied when the
+server starts.
+"""
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+METRICS_PATH = "/metrics"
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+REQUEST_LATENCY = Histogram(
+    "django_http_request_duration_seconds",
+    "Request latency, from the first middleware to the last byte",
+    ["route", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_QUERIES = Histogram(
+    "django_http_request_db_queries",
+    "Database queries per request",
+    ["route", "method"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DB_DURATION = Histogram(
+    "django_http_request_db_duration_seconds",
+    "Time per request spent in database queries",
+    ["route", "method"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+CACHE_LOOKUPS = Counter(
+    "django_http_request_cache_lookups",
+    "Cache lookups made while serving requests",
+    ["route", "cache", "result"],
+)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "cache")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache = {}
+
+
+_current = ContextVar("request_stats", default=None)
+
+
+def record_cache(cache, hit):
+    """Count a cache lookup against the request being served, if any"""
+    stats = _current.get()
+    if stats is not None:
+        key = (cache, "hit" if hit else "miss")
+        stats.cache[key] = stats.cache.get(key, 0) + 1
+
+
+def _count_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def _instrument(connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(_instrument, dispatch_uid="helpers.metrics")
+        # Connections this thread opened before the signal was connected
+        for connection in connections.all(initialized_only=True):
+            _instrument(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if request.path_info == METRICS_PATH:
+            return self.get_response(request)
+        stats, started = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        if request.path_info == METRICS_PATH:
+            return await self.get_response(request)
+        stats, started = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    def _finish(self, request, response, stats, started):
+        match = request.resolver_match
+        # DRF router patterns are regexes; drop the end anchor
+        route = match.route.removesuffix("$") if match is not None else "<unmatched>"
+        method = request.method if request.method in METHODS else "OTHER"
+        observe = lambda: _observe(route, method, str(response.status_code), stats, started)
+        if not response.streaming:
+            observe()
+        elif response.is_async:
+            response.streaming_content = _aiter_measured(response.streaming_content, stats, observe)
+        else:
+            response.streaming_content = _iter_measured(response.streaming_content, stats, observe)
+        return response
+
+
+def _iter_measured(content, stats, observe):
+    iterator = iter(content)
+    try:
+        while True:
+            token = _current.set(stats)
+            try:
+                chunk = next(iterator, None)
+            finally:
+                _current.reset(token)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        observe()
+
+
+async def _aiter_measured(content, stats, observe):
+    iterator = aiter(content)
+    try:
+        while True:
+            token = _current.set(stats)
+            try:
+                chunk = await anext(iterator, None)
+            finally:
+                _current.reset(token)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        observe()
+
+
+def _observe(route, method, status, stats, started):
+    REQUEST_LATENCY.labels(route, method, status).observe(time.perf_counter() - started)
+    DB_QUERIES.labels(route, method).observe(stats.queries)
+    DB_DURATION.labels(route, method).observe(stats.db_time)
+    for (cache, result), count in stats.cache.items():
+        CACHE_LOOKUPS.labels(route, cache, result).inc(count)
+
+
+def metrics_view(request):
+    """Prometheus text exposition, summed over all workers in multiprocess mode"""
+    token = settings.METRICS_TOKEN
+    if not token:
+        # Only a development server serves it to anyone
+        if not settings.DEBUG:
+            return HttpResponseForbidden()
+    elif request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponseForbidden()
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
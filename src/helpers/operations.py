@@ -0,0 +1,139 @@
+"""
+Migration operations shared by the apps.
+
+AddTrigramIndexes builds the pg_trgm indexes behind admin search. Admin
+search runs icontains, i.e. UPPER(column::text) LIKE '%...%', so each index
+is a GIN over that same expression with the gin_trgm_ops operator class.
+
+AddIndexConcurrently builds a regular index without blocking writes on
+PostgreSQL, and the usual way elsewhere.
+
+PartitionByMonth converts an append-only table into monthly range
+partitions in place (see helpers.partitions.partition_by_month).
+"""
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres import operations as postgres_operations
+from django.contrib.postgres.operations import NotInTransactionMixin, TrigramExtension
+from django.db import models, router
+from django.db.migrations.operations import AddIndex
+from django.db.migrations.operations.base import Operation
+from django.db.migrations.exceptions import IrreversibleError
+from django.db.models.functions import Cast, Upper
+
+from .partitions import partition_by_month
+
+
+class AddTrigramIndexes(NotInTransactionMixin, Operation):
+    """
+    Create trigram indexes concurrently on PostgreSQL, nothing elsewhere.
+
+    Database only: the indexes stay out of the model state, so no other
+    backend ever renders them (SQLite has no GIN). The migration needs
+    atomic = False, as CREATE INDEX CONCURRENTLY can't run in a transaction.
+    """
+
+    reversible = True
+
+    def __init__(self, model_name, indexes):
+        # [(index name, field name)]
+        self.model_name = model_name
+        self.indexes = indexes
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def gin_indexes(self):
+        return [
+            GinIndex(OpClass(Upper(Cast(field, models.TextField())), name="gin_trgm_ops"), name=name)
+            for name, field in self.indexes
+        ]
+
+    def applies_to(self, schema_editor, model):
+        return schema_editor.connection.vendor == "postgresql" and router.allow_migrate_model(
+            schema_editor.connection.alias, model
+        )
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.applies_to(schema_editor, model):
+            return
+        self._ensure_not_in_transaction(schema_editor)
+        TrigramExtension().database_forwards(app_label, schema_editor, from_state, to_state)
+        for index in self.gin_indexes():
+            schema_editor.add_index(model, index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.applies_to(schema_editor, model):
+            return
+        self._ensure_not_in_transaction(schema_editor)
+        # pg_trgm stays; other apps' indexes may still use it
+        for index in self.gin_indexes():
+            schema_editor.remove_index(model, index, concurrently=True)
+
+    def describe(self):
+        return f"Create trigram indexes {', '.join(name for name, _field in self.indexes)} on {self.model_name}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_trigram_indexes"
+
+
+class AddIndexConcurrently(postgres_operations.AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL, a plain CREATE INDEX on other
+    backends (SQLite in development and tests), whose schema editors don't
+    take concurrently. The migration needs atomic = False.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class PartitionByMonth(NotInTransactionMixin, Operation):
+    """
+    Partition a model's table by month on PostgreSQL, nothing elsewhere.
+
+    Database only, like AddTrigramIndexes: the model state keeps its single
+    id primary key. Needs atomic = False, as the conversion builds an index
+    CONCURRENTLY before swapping the table in its own short transaction.
+    Not reversible: merging the partitions back means copying every row.
+    """
+
+    reversible = False
+
+    def __init__(self, model_name, column, months_ahead=3):
+        self.model_name = model_name
+        self.column = column
+        # Fixed per migration rather than read from settings.PARTITION_MONTHS_AHEAD
+        self.months_ahead = months_ahead
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        connection = schema_editor.connection
+        if connection.vendor != "postgresql" or not router.allow_migrate_model(connection.alias, model):
+            return
+        self._ensure_not_in_transaction(schema_editor)
+        partition_by_month(connection, model._meta.db_table, self.column, self.months_ahead)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        raise IrreversibleError(f"Partitioning {self.model_name} by month is not reversible")
+
+    def describe(self):
+        return f"Partition {self.model_name} by month on {self.column}"
+
+    @property
+    def migration_name_fragment(self):
+        return "partition_by_month"
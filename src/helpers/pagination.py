@@ -0,0 +1,219 @@
+"""
+Keyset (cursor) pagination for the DRF and Ninja list endpoints.
+
+Lists paginated here answer {"next": <url or null>, "results": [...]}
+instead of a bare array; clients follow next until it is null. A bad cursor
+is a 400 on both stacks.
+"""
+import base64
+import binascii
+import json
+from typing import Any, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, F, Func, Q, Value
+from ninja import Schema
+from ninja.errors import HttpError
+from ninja.pagination import AsyncPaginationBase
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_page_size(requested, default=None, maximum=None):
+    """
+    Resolve the requested page size, falling back to the default and
+    clamping to the hard cap
+    """
+    default = default or settings.API_PAGE_SIZE
+    maximum = maximum or settings.API_MAX_PAGE_SIZE
+    try:
+        page_size = int(requested)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(page_size, maximum))
+
+
+def encode_cursor(position):
+    payload = json.dumps(position, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Decode an opaque cursor into typed values for the ordering fields.
+    Raises ValueError for anything that was not produced by encode_cursor.
+    """
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(position, list) or len(position) != len(ordering):
+        raise ValueError("Invalid cursor")
+    try:
+        return [
+            model._meta.get_field(name.lstrip("-")).to_python(value)
+            for name, value in zip(ordering, position)
+        ]
+    except ValidationError as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class RowValueCompare(Func):
+    """(a, b, ...) < (x, y, ...), or > for ascending keys"""
+    output_field = BooleanField()
+
+    def __init__(self, model, fields, values, operator):
+        self.operator = operator
+        super().__init__(
+            *(F(field) for field in fields),
+            *(Value(value, output_field=model._meta.get_field(field)) for field, value in zip(fields, values)),
+        )
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = [], []
+        for expression in self.get_source_expressions():
+            expression_sql, expression_params = compiler.compile(expression)
+            sql.append(expression_sql)
+            params.extend(expression_params)
+        half = len(sql) // 2
+        return f"({', '.join(sql[:half])}) {self.operator} ({', '.join(sql[half:])})", params
+
+
+def keyset_filter(model, ordering, position):
+    """
+    The condition "rows strictly after position" for the given ordering.
+    Keys sorted the same way become one row-value comparison, e.g.
+    (created_at, id) < (%s, %s) for descending keys, which the index on
+    those columns answers as a single range. Mixed directions fall back to
+    the equivalent OR of comparisons.
+    """
+    fields = [name.lstrip("-") for name in ordering]
+    descending = {name.startswith("-") for name in ordering}
+    if len(descending) == 1:
+        return RowValueCompare(model, fields, position, "<" if descending.pop() else ">")
+    condition = Q()
+    equal_prefix = Q()
+    for name, field, value in zip(ordering, fields, position):
+        lookup = "lt" if name.startswith("-") else "gt"
+        condition |= equal_prefix & Q(**{f"{field}__{lookup}": value})
+        equal_prefix &= Q(**{field: value})
+    return condition
+
+
+def _position_of(item, ordering):
+    fields = [name.lstrip("-") for name in ordering]
+    if isinstance(item, dict):
+        return [item[field] for field in fields]
+    return [getattr(item, field) for field in fields]
+
+
+def paginate_keyset(queryset, ordering, position, page_size):
+    """
+    Return one page of rows after position plus the position for the next
+    page (None on the last page). One extra row is fetched to detect the end.
+    """
+    queryset = queryset.order_by(*ordering)
+    if position is not None:
+        queryset = queryset.filter(keyset_filter(queryset.model, ordering, position))
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, _position_of(rows[-1], ordering)
+
+
+class KeysetPagination(BasePagination):
+    """
+    DRF keyset pagination. Deep pages cost the same as the first one because
+    the cursor turns into an indexed range condition instead of an OFFSET.
+    """
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = get_page_size(request.query_params.get(self.page_size_query_param))
+        try:
+            position = decode_cursor(
+                request.query_params.get(self.cursor_query_param),
+                queryset.model,
+                self.ordering,
+            )
+        except ValueError:
+            raise ParseError("Invalid cursor")
+        page, self.next_position = paginate_keyset(queryset, self.ordering, position, page_size)
+        return page
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class NinjaKeysetPagination(AsyncPaginationBase):
+    """
+    Ninja counterpart of KeysetPagination, used with @paginate(...)
+    """
+    items_attribute: str = "results"
+
+    class Input(Schema):
+        cursor: Optional[str] = None
+        page_size: Optional[int] = None
+
+    class Output(Schema):
+        next: Optional[str]
+        results: List[Any]
+
+    def __init__(self, *, ordering=("-id",), **kwargs: Any) -> None:
+        self.ordering = tuple(ordering)
+        super().__init__(**kwargs)
+
+    def _page(self, queryset, pagination, request):
+        page_size = get_page_size(pagination.page_size)
+        try:
+            position = decode_cursor(pagination.cursor, queryset.model, self.ordering)
+        except ValueError:
+            raise HttpError(400, "Invalid cursor")
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(queryset.model, self.ordering, position))
+        return queryset[:page_size + 1], page_size
+
+    def _response(self, rows, page_size, request):
+        next_url = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            cursor = encode_cursor(_position_of(rows[-1], self.ordering))
+            next_url = replace_query_param(request.build_absolute_uri(), "cursor", cursor)
+        return {"next": next_url, self.items_attribute: rows}
+
+    def paginate_queryset(self, queryset, pagination, request, **params):
+        queryset, page_size = self._page(queryset, pagination, request)
+        return self._response(list(queryset), page_size, request)
+
+    async def apaginate_queryset(self, queryset, pagination, request, **params):
+        queryset, page_size = self._page(queryset, pagination, request)
+        return self._response([obj async for obj in queryset], page_size, request)
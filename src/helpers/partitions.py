@@ -0,0 +1,221 @@
+"""
+Monthly range partitions of append-only PostgreSQL tables.
+
+partition_by_month() converts a table in place (the PartitionByMonth
+migration operation runs it for contact_contactmessage and
+waitlists_waitlistentry): a legacy partition holding every row up to the
+conversion, a DEFAULT partition, and one partition per month after that.
+ensure_monthly_partitions() has to run ahead of time to keep the months
+coming (archive_old_records does it); detach_partition() drops a month once
+it has been archived.
+"""
+import re
+from datetime import datetime, timezone
+
+from django.db import transaction
+
+# Short enough to fail fast rather than queue writers behind the DDL
+LOCK_TIMEOUT = "5s"
+
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def month_start(value, months=0):
+    """First instant (UTC) of value's month, shifted by a number of months"""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+def _fetch(cursor, sql, params=()):
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+
+def _parse_bound(value):
+    if value == "MINVALUE":
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def is_partitioned(connection, table):
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+        return cursor.fetchone() is not None
+
+
+def partition_by_month(connection, table, column, months_ahead):
+    """
+    Partition an existing table by month on column without copying or
+    rescanning it under a blocking lock. The slow steps run while writes
+    carry on: a CHECK constraint bounding column is validated, and a unique
+    index on (id, column) is built concurrently, so this can't run in a
+    transaction. Then, in a short one, the table becomes <table>_legacy and
+    the first partition of a new parent (MINVALUE up to the start of the
+    month after next), its indexes re-attached rather than rebuilt, and the
+    id sequence moves to the parent, whose primary key is (id, column). A
+    DEFAULT partition and the next months_ahead months' partitions follow.
+    Does nothing if the table is partitioned already.
+    """
+    legacy = f"{table}_legacy"
+    key = connection.ops.quote_name(column)
+    now = datetime.now(timezone.utc)
+    boundary = month_start(now, 2)
+    check = f"{table}_legacy_bound"
+    unique_index = f"{table}_id_{column}_uniq"
+
+    with connection.cursor() as cursor:
+        if _fetch(cursor, "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table]):
+            return
+        # Its id alone couldn't be referenced any more
+        referencing = _fetch(
+            cursor, "SELECT conname FROM pg_constraint WHERE contype = 'f' AND confrelid = %s::regclass", [table]
+        )
+        if referencing:
+            names = ", ".join(name for (name,) in referencing)
+            raise RuntimeError(f"Drop the foreign keys referencing {table} before partitioning it: {names}")
+
+        # Lets ATTACH PARTITION skip its scan; VALIDATE doesn't block writes
+        cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check}")
+        cursor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {check} CHECK ({key} IS NOT NULL AND {key} < %s) NOT VALID",
+            [boundary],
+        )
+        cursor.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {check}")
+        cursor.execute(f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {unique_index} ON {table} (id, {key})")
+
+        with transaction.atomic(using=connection.alias):
+            cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+            cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+            sequence, identity = _fetch(
+                cursor,
+                "SELECT pg_get_serial_sequence(%s, 'id'), attidentity <> '' FROM pg_attribute "
+                "WHERE attrelid = %s::regclass AND attname = 'id'",
+                [table, table],
+            )[0]
+            next_id = _fetch(
+                cursor,
+                f"SELECT GREATEST((SELECT last_value FROM {sequence}), (SELECT COALESCE(MAX(id), 0) FROM {table})) + 1",
+            )[0][0]
+            indexes = _fetch(
+                cursor,
+                "SELECT c.relname, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = %s::regclass AND NOT i.indisunique",
+                [table],
+            )
+            foreign_keys = _fetch(
+                cursor,
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE contype = 'f' AND conrelid = %s::regclass",
+                [table],
+            )
+
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+            if identity:
+                # Drops the identity's sequence too; the parent gets a plain one
+                cursor.execute(f"ALTER TABLE {legacy} ALTER COLUMN id DROP IDENTITY")
+                cursor.execute(f"CREATE SEQUENCE {table}_id_seq START WITH %s", [next_id])
+                sequence = f"{table}_id_seq"
+            else:
+                cursor.execute(f"ALTER TABLE {legacy} ALTER COLUMN id DROP DEFAULT")
+            # A partition's primary key has to match the parent's (id, column)
+            cursor.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {table}_pkey")
+            cursor.execute(f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_pkey PRIMARY KEY USING INDEX {unique_index}")
+
+            cursor.execute(
+                f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+                f"PARTITION BY RANGE ({key})"
+            )
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {check}")
+            cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {key})")
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+            cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+            for name, definition in foreign_keys:
+                cursor.execute(f"ALTER TABLE {legacy} RENAME CONSTRAINT {name} TO {name[:56]}_legacy")
+                cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+            # The parent takes over the index names Django's migrations know
+            for name, definition in indexes:
+                cursor.execute(f"ALTER INDEX {name} RENAME TO {name[:56]}_legacy")
+                cursor.execute(definition.replace(f" ON public.{table} ", f" ON {table} ", 1))
+
+            # Existing indexes and foreign keys of the legacy table are matched, not rebuilt
+            cursor.execute(
+                f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO (%s)", [boundary]
+            )
+            cursor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+            month = boundary
+            while month <= month_start(now, months_ahead):
+                cursor.execute(
+                    f"CREATE TABLE {partition_name(table, month)} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+                    [month, month_start(month, 1)],
+                )
+                month = month_start(month, 1)
+
+
+def list_partitions(connection, table):
+    """(name, lower, upper) per range partition by lower bound; None for MINVALUE"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+            [table],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound)
+        if match:
+            partitions.append((name, _parse_bound(match[1]), _parse_bound(match[2])))
+    return sorted(partitions, key=lambda partition: partition[1] or datetime.min.replace(tzinfo=timezone.utc))
+
+
+def ensure_monthly_partitions(connection, table, column, months_ahead, now=None):
+    """
+    Create the missing partitions up to months_ahead months from now; returns
+    their names. Rows the DEFAULT partition caught for one of those months
+    (partitions ran out before this ran) are moved into the new partition.
+    """
+    partitions = list_partitions(connection, table)
+    # Months already covered, by the legacy partition or earlier runs
+    covered_until = max(upper for _name, _lower, upper in partitions)
+    last = month_start(now or datetime.now(timezone.utc), months_ahead)
+    default = f"{table}_default"
+    key = connection.ops.quote_name(column)
+    created = []
+    month = covered_until
+    while month <= last:
+        name = partition_name(table, month)
+        bounds = [month, month_start(month, 1)]
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {key} >= %s AND {key} < %s)", bounds)
+            if cursor.fetchone()[0]:
+                # The DEFAULT partition can't keep rows the new partition's bounds claim
+                cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+                cursor.execute(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)", bounds)
+                cursor.execute(
+                    f"WITH moved AS (DELETE FROM {default} WHERE {key} >= %s AND {key} < %s RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved",
+                    bounds,
+                )
+                cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+            else:
+                # Scans the DEFAULT partition, which has nothing in range
+                cursor.execute(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)", bounds)
+        created.append(name)
+        month = bounds[1]
+    return created
+
+
+def detach_partition(connection, table, partition):
+    """Detach and drop a partition whose rows are no longer needed"""
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {partition}")
+        cursor.execute(f"DROP TABLE {partition}")
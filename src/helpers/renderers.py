@@ -0,0 +1,84 @@
+from itertools import chain
+
+import orjson
+from rest_framework.utils import encoders
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .streaming import csv_lines, ndjson_lines
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer backed by orjson. Compact output is byte-for-byte
+    what JSONRenderer produces, except for floats: very small or large ones
+    are spelled differently (0.00001 for 1e-05, 1e16 for 1e+16; the same
+    value once parsed), and NaN and Infinity become null where JSONRenderer's
+    strict mode raises. Indented or ASCII-only output falls back to the
+    stdlib encoder.
+    """
+    _fallback_encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self._fallback_encoder.default)
+        # Same strict-javascript-subset escaping as JSONRenderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    One JSON document per line. Streaming views feed lines() straight into
+    helpers.streaming.streaming_response(); render() covers ordinary
+    Responses (errors) with a line per item.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def lines(self, records):
+        return ndjson_lines(records)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(self.lines(data if isinstance(data, list) else [data]))
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV with a header taken from the first record's keys. Nested values are
+    written as JSON in their cell.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, (dict, list)):
+            return orjson.dumps(value, default=str).decode()
+        return value
+
+    def lines(self, records):
+        records = iter(records)
+        first = next(records, None)
+        if first is None:
+            return
+        header = list(first)
+        cell = self._cell
+        yield from csv_lines(header, (
+            [cell(record.get(name)) for name in header]
+            for record in chain([first], records)
+        ))
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(self.lines(data if isinstance(data, list) else [data]))
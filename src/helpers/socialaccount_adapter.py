@@ -1,5 +1,7 @@
+from allauth.core.exceptions import ImmediateHttpResponse
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.shortcuts import redirect
 from urllib.parse import urlencode
 
@@ -10,6 +12,19 @@ class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
     After successful social login, redirects to frontend with JWT tokens.
     """
 
+    def save_user(self, request, sociallogin, form=None):
+        """
+        Send the user back to the frontend with an error when the provider's
+        email belongs to another account in a different case, rather than
+        failing on the unique index
+        """
+        try:
+            with transaction.atomic():
+                return super().save_user(request, sociallogin, form)
+        except IntegrityError:
+            params = urlencode({'error': 'email_exists'})
+            raise ImmediateHttpResponse(redirect(f"{settings.FRONTEND_URL}/auth/callback?{params}"))
+
     def get_login_redirect_url(self, request):
         """
         Override to redirect to frontend with JWT tokens after social login.
@@ -0,0 +1,336 @@
+import json
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+import orjson
+from celery.exceptions import Retry
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase, TestCase, override_settings
+from kombu import Connection
+from ninja_jwt.tokens import RefreshToken
+from prometheus_client import REGISTRY
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks.smtp_stub import SMTPStub
+from waitlists.models import WaitlistEntry
+
+from .cache import LOCK_KEY_PREFIX, LocalLRU, TieredCache, check_shared_cache
+from .mail import MAIL_QUEUE, drain, drain_mail_queue, mail_connection, queue_mail, send_queued_mail, smtp_breaker
+from .renderers import ORJSONRenderer
+
+User = get_user_model()
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+    EMAIL_HOST="127.0.0.1",
+    EMAIL_HOST_USER="",
+    EMAIL_HOST_PASSWORD="",
+    EMAIL_USE_TLS=False,
+    EMAIL_USE_SSL=False,
+    EMAIL_TIMEOUT=5,
+    MAIL_MAX_ATTEMPTS=3,
+    MAIL_RETRY_BASE=30,
+    MAIL_RETRY_MAX=1800,
+)
+class MailTestCase(SimpleTestCase):
+    """helpers.mail against a local SMTP stub"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = SMTPStub(port=0).start_in_thread()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.stub.refused = set()
+        self.stub.drop_after = 0
+        self.settings_override = override_settings(EMAIL_PORT=self.stub.port)
+        self.settings_override.enable()
+        mail_connection.close()
+
+    def tearDown(self):
+        mail_connection.close()
+        self.settings_override.disable()
+
+    def messages(self, count):
+        return [EmailMessage("Subject", "Body", "from@example.com", [f"user{i}@example.com"]) for i in range(count)]
+
+    def test_refused_recipient_fails_only_its_message(self):
+        self.stub.refused = {"user1@example.com"}
+        messages, connections = self.stub.messages, self.stub.connections
+        batch = self.messages(3)
+        failures = mail_connection.send(batch)
+        self.assertEqual([message for message, _error in failures], [batch[1]])
+        self.assertIsInstance(failures[0][1], smtplib.SMTPRecipientsRefused)
+        self.assertEqual(self.stub.messages, messages + 2)
+        self.assertEqual(self.stub.connections, connections + 1)
+
+    def test_disconnect_resumes_without_resending(self):
+        self.stub.drop_after = 2
+        messages, connections = self.stub.messages, self.stub.connections
+        self.assertEqual(mail_connection.send(self.messages(5)), [])
+        # Each message accepted exactly once, over three connections
+        self.assertEqual(self.stub.messages, messages + 5)
+        self.assertEqual(self.stub.connections, connections + 3)
+
+    def run_task(self, **kwargs):
+        """Run the task inline; returns the retry() kwargs it asked for, if any"""
+        with mock.patch.object(send_queued_mail, "retry", side_effect=Retry()) as retry:
+            try:
+                send_queued_mail("Subject", "Body", "from@example.com", ["user@example.com"], **kwargs)
+            except Retry:
+                return retry.call_args.kwargs
+        return None
+
+    def test_task_sends_the_message(self):
+        messages = self.stub.messages
+        self.assertIsNone(self.run_task())
+        self.assertEqual(self.stub.messages, messages + 1)
+
+    def test_task_retries_transient_failures_then_drops(self):
+        with mock.patch("helpers.mail.MailConnection._send", side_effect=smtplib.SMTPServerDisconnected()):
+            with mock.patch("helpers.mail.random.uniform", side_effect=lambda low, high: high):
+                retry = self.run_task()
+                self.assertEqual(retry["countdown"], 30)
+                self.assertEqual(retry["kwargs"]["attempts"], 1)
+                self.assertEqual(self.run_task(attempts=1)["countdown"], 60)
+                self.assertIsNone(self.run_task(attempts=2))
+
+    def test_task_drops_rejected_message(self):
+        self.stub.refused = {"user@example.com"}
+        self.assertIsNone(self.run_task())
+
+    @contextmanager
+    def broker(self):
+        """An in-memory broker for queue_mail() and drain(), emptied afterwards"""
+        connection = Connection("memory://")
+
+        @contextmanager
+        def fail_fast_connection():
+            yield connection
+
+        with mock.patch("helpers.mail.fail_fast_connection", fail_fast_connection):
+            try:
+                yield connection
+            finally:
+                with connection.SimpleQueue(MAIL_QUEUE) as queue:
+                    queue.clear()
+                connection.release()
+
+    def queue(self, count):
+        for i in range(count):
+            queue_mail("Subject", "Body", "from@example.com", (f"user{i}@example.com",))
+
+    @override_settings(MAIL_PIPELINE_ENABLED=True, MAIL_BATCH_SIZE=4)
+    def test_drain_sends_queued_mail_in_batches_over_one_connection(self):
+        messages, connections = self.stub.messages, self.stub.connections
+        with self.broker() as connection, mock.patch("helpers.mail.publish") as publish:
+            self.queue(10)
+            # Published on every MAIL_BATCH_SIZE-th message
+            self.assertEqual(publish.call_args_list, [mock.call(drain_mail_queue)] * 2)
+            with mock.patch.object(mail_connection, "send", wraps=mail_connection.send) as send:
+                self.assertEqual(drain(connection), 10)
+            self.assertEqual([len(call.args[0]) for call in send.call_args_list], [4, 4, 2])
+            self.assertEqual(drain(connection), 0)
+        self.assertEqual(self.stub.messages, messages + 10)
+        self.assertEqual(self.stub.connections, connections + 1)
+
+    @override_settings(MAIL_PIPELINE_ENABLED=True, MAIL_BATCH_SIZE=10)
+    def test_drain_reschedules_only_the_messages_that_failed(self):
+        self.stub.refused = {"user1@example.com"}
+        messages = self.stub.messages
+        sent = mail_connection.send
+
+        def hang_up_on_user2(emails):
+            hung_up = [email for email in emails if email.to == ["user2@example.com"]]
+            failures = sent([email for email in emails if email not in hung_up])
+            return failures + [(email, smtplib.SMTPServerDisconnected()) for email in hung_up]
+
+        with self.broker() as connection:
+            self.queue(4)
+            with mock.patch.object(mail_connection, "send", hang_up_on_user2), \
+                    mock.patch.object(send_queued_mail, "apply_async") as apply_async:
+                self.assertEqual(drain(connection), 4)
+            self.assertEqual(drain(connection), 0)
+        # The refused recipient is dropped; the other failure is retried on its own
+        self.assertEqual(self.stub.messages, messages + 2)
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.kwargs["kwargs"]["recipient_list"], ["user2@example.com"])
+        self.assertEqual(apply_async.call_args.kwargs["kwargs"]["attempts"], 1)
+
+    @override_settings(MAIL_PIPELINE_ENABLED=True)
+    def test_drain_leaves_mail_queued_while_the_breaker_is_open(self):
+        messages = self.stub.messages
+        with self.broker() as connection:
+            self.queue(2)
+            for _ in range(smtp_breaker.failure_threshold):
+                smtp_breaker.record_failure()
+            self.assertEqual(drain(connection), 0)
+            smtp_breaker.record_success()
+            self.assertEqual(drain(connection), 2)
+        self.assertEqual(self.stub.messages, messages + 2)
+
+    @override_settings(MAIL_PIPELINE_ENABLED=True)
+    def test_queue_mail_raises_when_the_broker_is_down(self):
+        with mock.patch("helpers.mail.fail_fast_connection", side_effect=ConnectionRefusedError()):
+            with self.assertRaises(ConnectionRefusedError):
+                queue_mail("Subject", "Body", "from@example.com", ["user@example.com"])
+
+
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user("metered", "metered@example.com", "pw", is_staff=True)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_records_latency_queries_and_cache_by_route(self):
+        labels = {"route": "api/waitlists/", "method": "GET"}
+        requests = self.sample("django_http_request_duration_seconds_count", status="200", **labels)
+        queries = self.sample("django_http_request_db_queries_sum", **labels)
+        misses = self.sample("django_http_request_cache_lookups_total", route="api/waitlists/", cache="response", result="miss")
+        hits = self.sample("django_http_request_cache_lookups_total", route="api/waitlists/", cache="response", result="hit")
+
+        self.client.get("/api/waitlists/", **self.auth)
+        self.client.get("/api/waitlists/", **self.auth)
+
+        self.assertEqual(self.sample("django_http_request_duration_seconds_count", status="200", **labels), requests + 2)
+        # The user snapshot is loaded once, then both requests run the list query
+        self.assertEqual(self.sample("django_http_request_db_queries_sum", **labels), queries + 3)
+        self.assertEqual(
+            self.sample("django_http_request_cache_lookups_total", route="api/waitlists/", cache="response", result="miss"),
+            misses + 1,
+        )
+        self.assertEqual(
+            self.sample("django_http_request_cache_lookups_total", route="api/waitlists/", cache="response", result="hit"),
+            hits + 1,
+        )
+
+    def test_streamed_response_is_measured_to_the_last_chunk(self):
+        WaitlistEntry.objects.create(email="streamed@example.com")
+        labels = {"route": "api/waitlists/export/", "method": "GET"}
+        before = self.sample("django_http_request_db_queries_count", **labels)
+        response = self.client.get("/api/waitlists/export/", **self.auth)
+        self.assertEqual(self.sample("django_http_request_db_queries_count", **labels), before)
+        b"".join(response.streaming_content)
+        self.assertEqual(self.sample("django_http_request_db_queries_count", **labels), before + 1)
+
+    @override_settings(METRICS_TOKEN="scrape")
+    def test_metrics_endpoint_requires_the_token(self):
+        self.client.get("/api/waitlists/", **self.auth)
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'django_http_request_duration_seconds_bucket{le="0.005",method="GET",route="api/waitlists/"', response.content)
+        self.assertNotIn(b'route="metrics"', response.content)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_metrics_endpoint_without_a_token_is_closed_unless_debug(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+
+class TieredCacheTestCase(SimpleTestCase):
+    """helpers.cache against the configured default cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.cache = TieredCache(local_ttl=60, ttl=60, lock_timeout=0.3)
+        self.calls = 0
+
+    def producer(self, value="value", delay=0):
+        def produce():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return produce
+
+    def test_shared_tier_serves_other_processes(self):
+        self.assertEqual(self.cache.get_or_set("key", self.producer(), tags=["t"]), "value")
+        # A process with an empty local tier
+        other = TieredCache(local_ttl=60, ttl=60)
+        self.assertEqual(other.get_or_set("key", self.producer("other"), tags=["t"]), "value")
+        self.assertEqual(self.calls, 1)
+
+    def test_invalidating_a_tag_orphans_only_its_entries(self):
+        self.cache.get_or_set("a", self.producer("a1"), tags=["project:1", "projects"])
+        self.cache.get_or_set("b", self.producer("b1"), tags=["project:2"])
+        versions = self.cache.tag_versions(["project:1", "project:2"])
+        self.assertEqual(self.cache.tag_versions(["project:1", "project:2"]), versions)
+
+        self.cache.invalidate_tags("project:1")
+        self.assertNotEqual(self.cache.tag_versions(["project:1"]), versions[:1])
+        self.assertEqual(self.cache.get_or_set("a", self.producer("a2"), tags=["project:1", "projects"]), "a2")
+        self.assertEqual(self.cache.get_or_set("b", self.producer("b2"), tags=["project:2"]), "b1")
+
+    def test_concurrent_misses_produce_once(self):
+        start = threading.Barrier(8)
+        results = []
+
+        def read():
+            start.wait()
+            results.append(self.cache.get_or_set("key", self.producer(delay=0.1)))
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["value"] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_waiter_leaves_another_process_lock_alone(self):
+        lock_key = LOCK_KEY_PREFIX + self.cache._entry_key("key", [])
+        cache.add(lock_key, "other-process", timeout=60)
+        # Gives up waiting after lock_timeout and produces the value itself
+        self.assertEqual(self.cache.get_or_set("key", self.producer()), "value")
+        self.assertEqual(cache.get(lock_key), "other-process")
+
+    def test_lock_is_released_by_its_owner(self):
+        self.cache.get_or_set("key", self.producer())
+        self.assertIsNone(cache.get(LOCK_KEY_PREFIX + self.cache._entry_key("key", [])))
+
+    def test_local_tier_evicts_least_recently_used(self):
+        lru = LocalLRU(max_entries=2, max_bytes=10)
+        lru.set("a", b"1111", 60)
+        lru.set("b", b"2222", 60)
+        lru.get("a")
+        lru.set("c", b"3333", 60)
+        self.assertEqual((lru.get("a"), lru.get("b"), lru.get("c")), (b"1111", None, b"3333"))
+        # Over max_bytes on its own: never stored
+        lru.set("d", b"x" * 11, 60)
+        self.assertIsNone(lru.get("d"))
+
+    @override_settings(
+        DEBUG=False, CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_deploy_check_warns_about_a_per_process_cache(self):
+        messages = check_shared_cache(None)
+        self.assertEqual([message.id for message in messages], ["helpers.W001"])
+        self.assertFalse(messages[0].is_serious())
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class ORJSONRendererTestCase(SimpleTestCase):
+    def test_matches_json_renderer_but_for_float_spelling(self):
+        data = {"name": "Line\u2028break", "tags": ["ü", None, True], "count": 3}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        # Documented difference: the same floats, spelled shorter
+        floats = {"rank": 1e-05, "size": 1e16}
+        self.assertEqual(ORJSONRenderer().render(floats), b'{"rank":0.00001,"size":1e16}')
+        self.assertEqual(orjson.loads(ORJSONRenderer().render(floats)), json.loads(JSONRenderer().render(floats)))
@@ -0,0 +1,40 @@
+"""
+Coalescing on_commit work.
+
+Signal handlers that react to every saved row (children bumping their
+project, search reindexing) would queue one callback, and one query, per
+row. on_commit_batch() gathers the values passed to it during a transaction
+and calls func once, on commit, with all of them; outside a transaction func
+runs at once. A batch registered in a savepoint that rolls back is dropped
+with it, like any on_commit callback, and later values start a new one.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+class _Batch:
+    def __init__(self, func):
+        self.func = func
+        self.values = set()
+        self.called = False
+
+    def __call__(self):
+        self.called = True
+        self.func(self.values)
+
+
+def on_commit_batch(func, values, using=None):
+    """Call func(set_of_values) once when the current transaction commits"""
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    if not connection.in_atomic_block:
+        func(set(values))
+        return
+    # The callbacks still pending, without those of rolled back savepoints.
+    # One already called (captureOnCommitCallbacks(execute=True) runs them
+    # without clearing the list) takes no more values.
+    for _savepoint_ids, callback, *_robust in connection.run_on_commit:
+        if isinstance(callback, _Batch) and callback.func is func and not callback.called:
+            callback.values.update(values)
+            return
+    batch = _Batch(func)
+    batch.values.update(values)
+    transaction.on_commit(batch, using=using)
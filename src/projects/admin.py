@@ -1,20 +1,23 @@
 from django.contrib import admin
+
+from helpers.admin import LargeTableAdminMixin, PaginatedTabularInline
+
 from .models import Project, DataSource, Report, Analytic, AIIntegration
 
 
-class DataSourceInline(admin.TabularInline):
+class DataSourceInline(PaginatedTabularInline):
     model = DataSource
     extra = 1
     fields = ['name', 'type', 'description', 'order']
 
 
-class ReportInline(admin.TabularInline):
+class ReportInline(PaginatedTabularInline):
     model = Report
     extra = 1
     fields = ['name', 'frequency', 'description', 'order']
 
 
-class AnalyticInline(admin.TabularInline):
+class AnalyticInline(PaginatedTabularInline):
     model = Analytic
     extra = 1
     fields = ['name', 'type', 'description', 'order']
@@ -26,7 +29,7 @@ class AIIntegrationInline(admin.StackedInline):
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['name', 'status', 'progress', 'budget', 'due_date', 'created_at']
     list_filter = ['status', 'created_at']
     search_fields = ['name', 'description', 'client_company']
@@ -0,0 +1,140 @@
+"""
+Bulk project upsert behind POST /api/projects/bulk/.
+
+Every table is written with set-based statements inside one transaction,
+so an import costs a handful of queries per batch instead of one per row.
+Bulk statements bypass model signals, so the side effects of
+signals.project_changed (summary cache, response cache tags, search index)
+are applied here explicitly.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from helpers.cache import invalidate_tags
+from helpers.transactions import on_commit_batch
+
+from .models import Project, DataSource, Report, Analytic, AIIntegration
+from .search import reindex_projects
+from .summary import invalidate_project_summary
+
+BATCH_SIZE = 1000
+
+CHILD_MODELS = [
+    ('data_sources', DataSource),
+    ('reports', Report),
+    ('analytics', Analytic),
+]
+AI_INTEGRATION_FIELDS = ['enabled', 'features', 'models']
+# Fields an upsert may overwrite on conflict: all but the keys and created_at
+PROJECT_UPDATE_FIELDS = [
+    field.name for field in Project._meta.concrete_fields
+    if field.name not in ('id', 'external_id', 'created_at')
+]
+
+
+def _chunks(values):
+    for start in range(0, len(values), BATCH_SIZE):
+        yield values[start:start + BATCH_SIZE]
+
+
+def _project_ids(external_ids):
+    ids = {}
+    for chunk in _chunks(external_ids):
+        ids.update(Project.objects.filter(external_id__in=chunk).values_list('external_id', 'id'))
+    return ids
+
+
+def _delete_children(model, project_ids):
+    # Plain DELETEs: a queryset delete() would load every child to send its
+    # post_delete signal. The child tables have nothing cascading from them
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        for chunk in _chunks(project_ids):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM {table} WHERE project_id IN ({placeholders})", chunk)
+
+
+def _upsert(model, rows, unique_field, update_fields):
+    """
+    INSERT ... ON CONFLICT for dicts of field values. Rows are grouped by the
+    fields they carry and an update only overwrites those: a field an item
+    omits keeps its stored value (or gets the model default when inserted).
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        groups[frozenset(row)].append(model(**row))
+    for names, objects in groups.items():
+        present = [name for name in update_fields if name in names or name == 'updated_at']
+        if present:
+            model.objects.bulk_create(
+                objects,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=[unique_field],
+                update_fields=present,
+            )
+        else:
+            model.objects.bulk_create(objects, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def bulk_upsert_projects(items):
+    """
+    Create or update projects keyed by external_id from validated
+    ProjectBulkItemSerializer data. Scalar fields an item omits keep their
+    stored value; nested lists that are present replace the project's
+    existing rows.
+    Returns (created, updated, {external_id: id}).
+    """
+    external_ids = [item['external_id'] for item in items]
+    nested = {name for name, _model in CHILD_MODELS} | {'ai_integration'}
+
+    with transaction.atomic():
+        existing = _project_ids(external_ids)
+
+        _upsert(
+            Project,
+            [{name: value for name, value in item.items() if name not in nested} for item in items],
+            'external_id',
+            PROJECT_UPDATE_FIELDS,
+        )
+        found = _project_ids(external_ids)
+        ids = {key: found[key] for key in external_ids}
+
+        for name, model in CHILD_MODELS:
+            replaced = [item for item in items if name in item]
+            if not replaced:
+                continue
+            _delete_children(model, [ids[item['external_id']] for item in replaced])
+            model.objects.bulk_create(
+                [
+                    model(project_id=ids[item['external_id']], **row)
+                    for item in replaced
+                    for row in item[name]
+                ],
+                batch_size=BATCH_SIZE,
+            )
+
+        _upsert(
+            AIIntegration,
+            [
+                {'project_id': ids[item['external_id']], **item['ai_integration']}
+                for item in items if item.get('ai_integration') is not None
+            ],
+            'project',
+            AI_INTEGRATION_FIELDS,
+        )
+        cleared = [
+            ids[item['external_id']] for item in items
+            if 'ai_integration' in item and item['ai_integration'] is None
+        ]
+        if cleared:
+            _delete_children(AIIntegration, cleared)
+
+        project_ids = list(ids.values())
+        invalidate_project_summary()
+        invalidate_tags("projects:list", *[f"project:{project_id}" for project_id in project_ids])
+        on_commit_batch(reindex_projects, project_ids)
+
+    created = len(external_ids) - len(existing)
+    return created, len(existing), ids
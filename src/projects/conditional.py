@@ -0,0 +1,66 @@
+"""
+Validators for conditional GET on the project endpoints.
+
+Each probe is a single cheap query that runs before any serialization, so
+If-None-Match / If-Modified-Since requests can be answered with a 304.
+Child saves bump Project.updated_at (see signals.py), which keeps the
+detail validators correct for the nested relations.
+
+The list has only an ETag: deleting a project doesn't move MAX(updated_at),
+so a Last-Modified date alone would answer 304 with a stale list.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+
+from .models import Project
+
+
+def _etag(request, *parts):
+    # The representation also depends on the query string (cursor, page
+    # size, format) and the negotiated media type
+    key = "|".join(
+        [request.get_full_path(), request.META.get("HTTP_ACCEPT", "")]
+        + [str(part) for part in parts]
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _list_version(request):
+    if not hasattr(request, "_projects_list_version"):
+        # The count catches deletions, which don't move MAX(updated_at)
+        request._projects_list_version = Project.objects.aggregate(
+            last_modified=Max("updated_at"),
+            count=Count("id"),
+        )
+    return request._projects_list_version
+
+
+def _detail_version(request, pk):
+    if not hasattr(request, "_project_detail_version"):
+        request._project_detail_version = (
+            Project.objects.filter(pk=pk).values_list("updated_at", flat=True).first()
+        )
+    return request._project_detail_version
+
+
+def list_etag(request, *args, **kwargs):
+    version = _list_version(request)
+    return _etag(request, version["last_modified"], version["count"])
+
+
+def detail_etag(request, pk=None, *args, **kwargs):
+    try:
+        updated_at = _detail_version(request, pk)
+    except ValueError:
+        return None
+    if updated_at is None:
+        return None
+    return _etag(request, pk, updated_at)
+
+
+def detail_last_modified(request, pk=None, *args, **kwargs):
+    try:
+        return _detail_version(request, pk)
+    except ValueError:
+        return None
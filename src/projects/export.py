@@ -0,0 +1,39 @@
+"""
+Full project graph export behind GET /api/projects/export/.
+
+Projects are read in id order, PROJECTS_EXPORT_CHUNK_SIZE at a time, each
+chunk with one query for the projects (AI integration joined in) and one
+prefetch query per child table, so an export costs four queries per chunk
+whatever the number of children. Every project is serialized with
+ProjectDetailSerializer as it is produced and only one chunk is held in
+memory at a time.
+"""
+from django.conf import settings
+
+from .serializers import ProjectDetailSerializer
+
+
+def iter_project_chunks(queryset, chunk_size=None):
+    """Lists of projects in ascending id order, keyset-paginated"""
+    chunk_size = chunk_size or settings.PROJECTS_EXPORT_CHUNK_SIZE
+    queryset = queryset.order_by('id')
+    last_id = None
+    while True:
+        chunk_queryset = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        chunk = list(chunk_queryset[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1].id
+
+
+def export_projects(queryset, context=None):
+    """
+    Yield each project as a ProjectDetailSerializer dict. queryset should
+    carry the serializer's select_related / prefetch_related plan.
+    """
+    serializer = ProjectDetailSerializer(context=context or {})
+    for chunk in iter_project_chunks(queryset):
+        for project in chunk:
+            yield serializer.to_representation(project)
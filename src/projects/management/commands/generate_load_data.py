@@ -0,0 +1,300 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from contact.models import ContactMessage, ContactOutbox
+from helpers.cache import invalidate_tags
+from projects.models import Project, DataSource, Report, Analytic, AIIntegration
+from projects.search import reindex_projects
+from projects.summary import invalidate_project_summary
+from waitlists.models import WaitlistEntry
+
+User = get_user_model()
+
+# Generated rows carry these prefixes so --clear only removes them
+EXTERNAL_ID_PREFIX = "load-"
+USERNAME_PREFIX = "load-user-"
+EMAIL_DOMAIN = "load.example.com"
+
+WORDS = [
+    "claims", "provider", "member", "policy", "pipeline", "telemetry",
+    "dashboard", "fraud", "risk", "retention", "pharmacy", "hospital",
+    "billing", "eligibility", "forecast", "quality", "audit", "network",
+    "benefit", "compliance", "referral", "capacity", "outcomes", "cohort",
+]
+SOURCE_TYPES = ["API Integration", "Database Connection", "File Transfer", "ETL Pipeline"]
+FREQUENCIES = ["Daily", "Weekly", "Monthly", "Quarterly"]
+ANALYTIC_TYPES = ["Predictive Model", "Dashboard", "Segmentation", "Anomaly Detection"]
+AI_FEATURES = ["Summaries", "Classification", "Forecasting", "Entity Extraction"]
+AI_MODELS = ["gradient-boosting", "random-forest", "transformer", "logistic-regression"]
+PEOPLE = ["Sarah Chen", "Michael Roberts", "Priya Nair", "Tom Walsh", "Ana Costa", "Liam O'Brien"]
+# Share of waitlist sign-ups placed in the last 24 hours, where the rolling
+# per-email cap applies
+RECENT_SHARE = 0.05
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """Let bulk_create() keep the auto_now / auto_now_add values we set"""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate deterministic synthetic projects (with children), users, "
+        "waitlist entries and contact messages for load testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=1000)
+        parser.add_argument("--children", type=int, default=4, help="max data sources/reports/analytics per project")
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--waitlist", type=int, default=10000)
+        parser.add_argument("--contacts", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--months", type=int, default=18,
+            help="spread creation times over this many past months (monthly partitions, archiving)",
+        )
+        parser.add_argument("--clear", action="store_true", help="delete previously generated rows first")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        if options["months"] < 1:
+            raise CommandError("--months must be positive")
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.span = timedelta(days=30 * options["months"])
+
+        if options["clear"]:
+            self.clear()
+
+        started = time.perf_counter()
+        total = 0
+        user_ids = self.timed("users", self.create_users, options["users"])
+        total += len(user_ids)
+        total += self.timed("projects", self.create_projects, options["projects"], options["children"])
+        total += self.timed("waitlist entries", self.create_waitlist, options["waitlist"], user_ids)
+        total += self.timed("contact messages", self.create_contacts, options["contacts"])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)"
+        ))
+
+    def timed(self, label, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        rows = result if isinstance(result, int) else len(result)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label}: {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+        return result
+
+    def clear(self):
+        # Plain DELETEs a batch of parents at a time: a model delete() would
+        # load every row and send the per-row signals (parent bumps, cache
+        # invalidations, reindexes). Dependent rows are removed first
+        projects = self.timed(
+            "cleared projects", self.delete_batches,
+            Project.objects.filter(external_id__startswith=EXTERNAL_ID_PREFIX),
+            [(DataSource, "project_id"), (Report, "project_id"), (Analytic, "project_id"), (AIIntegration, "project_id")],
+        )
+        self.timed(
+            "cleared waitlist entries", self.delete_batches,
+            WaitlistEntry.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}"),
+        )
+        self.timed(
+            "cleared contact messages", self.delete_batches,
+            ContactMessage.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}"),
+            [(ContactOutbox, "contact_message_id")],
+        )
+        self.timed("cleared users", self.delete_batches, User.objects.filter(username__startswith=USERNAME_PREFIX))
+        # What the skipped signals would have done for the projects; their
+        # cached detail responses are left to expire
+        invalidate_project_summary()
+        invalidate_tags("projects:list")
+        reindex_projects(projects)
+
+    def delete_batches(self, queryset, dependents=()):
+        """Delete the rows of queryset, and those of (model, column) pointing at them; returns their ids"""
+        deleted = []
+        with connection.cursor() as cursor:
+            while True:
+                ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:self.batch_size])
+                if not ids:
+                    return deleted
+                placeholders = ", ".join(["%s"] * len(ids))
+                with transaction.atomic():
+                    for model, column in [*dependents, (queryset.model, "id")]:
+                        cursor.execute(f"DELETE FROM {model._meta.db_table} WHERE {column} IN ({placeholders})", ids)
+                deleted += ids
+
+    def past(self):
+        """A random moment within the last --months months"""
+        return self.now - self.rng.random() * self.span
+
+    def words(self, count):
+        return " ".join(self.rng.choice(WORDS) for _ in range(count))
+
+    def sentence(self, count):
+        return self.words(count).capitalize() + "."
+
+    def batches(self, count):
+        for start in range(0, count, self.batch_size):
+            yield range(start, min(start + self.batch_size, count))
+
+    def create_users(self, count):
+        # Hashing is deliberately slow, so every generated user shares one hash
+        password = make_password("load-test-password")
+        ids = []
+        for batch in self.batches(count):
+            users = User.objects.bulk_create([
+                User(
+                    username=f"{USERNAME_PREFIX}{i}",
+                    email=f"{USERNAME_PREFIX}{i}@{EMAIL_DOMAIN}",
+                    password=password,
+                )
+                for i in batch
+            ])
+            ids += [user.pk for user in users]
+        return ids
+
+    def create_projects(self, count, max_children):
+        statuses = [status for status, _label in Project.STATUS_CHOICES]
+        rows = 0
+        project_ids = []
+        for batch in self.batches(count):
+            with transaction.atomic():
+                projects = []
+                for i in batch:
+                    tasks_total = self.rng.randint(5, 60)
+                    created_at = self.past()
+                    projects.append(Project(
+                        external_id=f"{EXTERNAL_ID_PREFIX}{i}",
+                        name=f"{self.words(3).title()} {i}",
+                        status=self.rng.choice(statuses),
+                        description=self.sentence(self.rng.randint(12, 30)),
+                        progress=self.rng.randint(0, 100),
+                        due_date=f"{self.rng.randint(1, 28)} Dec 2025",
+                        team_size=self.rng.randint(1, 12),
+                        digitalpath_responsible=self.rng.choice(PEOPLE),
+                        client_responsible=self.rng.choice(PEOPLE),
+                        tasks_total=tasks_total,
+                        tasks_completed=self.rng.randint(0, tasks_total),
+                        budget=f"${self.rng.randint(5, 200) * 500:,} AUD",
+                        implementation_time=f"{self.rng.randint(1, 12)} weeks",
+                        last_update=f"{self.rng.randint(1, 23)} hours ago",
+                        full_scope="\n\n".join(
+                            self.sentence(self.rng.randint(20, 60)) for _ in range(self.rng.randint(2, 6))
+                        ),
+                        created_at=created_at,
+                        updated_at=created_at + (self.now - created_at) * self.rng.random(),
+                    ))
+                with explicit_timestamps(Project):
+                    projects = Project.objects.bulk_create(projects)
+                rows += len(projects)
+                project_ids += [project.pk for project in projects]
+                rows += self.create_children(projects, max_children)
+        invalidate_project_summary()
+        invalidate_tags("projects:list")
+        reindex_projects(project_ids)
+        return rows
+
+    def create_children(self, projects, max_children):
+        data_sources, reports, analytics, integrations = [], [], [], []
+        for project in projects:
+            for order in range(self.rng.randint(0, max_children)):
+                data_sources.append(DataSource(
+                    project=project, order=order, name=f"{self.words(2).title()} Source",
+                    type=self.rng.choice(SOURCE_TYPES), description=self.sentence(12),
+                ))
+            for order in range(self.rng.randint(0, max_children)):
+                reports.append(Report(
+                    project=project, order=order, name=f"{self.words(2).title()} Report",
+                    frequency=self.rng.choice(FREQUENCIES), description=self.sentence(12),
+                ))
+            for order in range(self.rng.randint(0, max_children)):
+                analytics.append(Analytic(
+                    project=project, order=order, name=f"{self.words(2).title()} Analysis",
+                    type=self.rng.choice(ANALYTIC_TYPES), description=self.sentence(12),
+                ))
+            if self.rng.random() < 0.5:
+                integrations.append(AIIntegration(
+                    project=project,
+                    enabled=self.rng.random() < 0.8,
+                    features=self.rng.sample(AI_FEATURES, self.rng.randint(1, len(AI_FEATURES))),
+                    models=self.rng.sample(AI_MODELS, self.rng.randint(1, 2)),
+                ))
+        for model, rows in [
+            (DataSource, data_sources),
+            (Report, reports),
+            (Analytic, analytics),
+            (AIIntegration, integrations),
+        ]:
+            model.objects.bulk_create(rows, batch_size=self.batch_size)
+        return len(data_sources) + len(reports) + len(analytics) + len(integrations)
+
+    def create_waitlist(self, count, user_ids):
+        rows = 0
+        # About three sign-ups per email, so some share a 24 hour window
+        emails = max(count // 3, 1)
+        for batch in self.batches(count):
+            entries = []
+            for _i in batch:
+                if self.rng.random() < RECENT_SHARE:
+                    timestamp = self.now - timedelta(days=self.rng.random())
+                else:
+                    timestamp = self.past()
+                entries.append(WaitlistEntry(
+                    # Most signups are anonymous
+                    user_id=self.rng.choice(user_ids) if user_ids and self.rng.random() < 0.3 else None,
+                    email=f"waiter-{self.rng.randrange(emails)}@{EMAIL_DOMAIN}",
+                    description=self.sentence(self.rng.randint(4, 20)) if self.rng.random() < 0.5 else None,
+                    timestamp=timestamp,
+                    updated=timestamp,
+                ))
+            with explicit_timestamps(WaitlistEntry):
+                rows += len(WaitlistEntry.objects.bulk_create(entries))
+        return rows
+
+    def create_contacts(self, count):
+        statuses = [status for status, _label in ContactMessage.STATUS_CHOICES]
+        rows = 0
+        for batch in self.batches(count):
+            messages = []
+            for i in batch:
+                created_at = self.past()
+                status = self.rng.choice(statuses)
+                messages.append(ContactMessage(
+                    name=self.rng.choice(PEOPLE),
+                    email=f"contact-{i % 5000}@{EMAIL_DOMAIN}",
+                    message=self.sentence(self.rng.randint(10, 80)),
+                    status=status,
+                    created_at=created_at,
+                    updated_at=created_at,
+                    sent_at=created_at if status == 'sent' else None,
+                ))
+            with explicit_timestamps(ContactMessage):
+                rows += len(ContactMessage.objects.bulk_create(messages))
+        return rows
@@ -0,0 +1,93 @@
+# Generated by Django 5.0 on 2026-10-18 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('completed', 'Completed'), ('on_hold', 'On Hold'), ('planning', 'Planning')], default='planning', max_length=20)),
+                ('description', models.TextField()),
+                ('progress', models.IntegerField(default=0)),
+                ('due_date', models.CharField(max_length=50)),
+                ('team_size', models.IntegerField(default=1)),
+                ('digitalpath_responsible', models.CharField(max_length=100)),
+                ('client_responsible', models.CharField(max_length=100)),
+                ('client_company', models.CharField(default='Health Fund Australia', max_length=255)),
+                ('tasks_total', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('budget', models.CharField(max_length=50)),
+                ('implementation_time', models.CharField(max_length=50)),
+                ('last_update', models.CharField(max_length=50)),
+                ('full_scope', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DataSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('type', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('order', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='data_sources', to='projects.project')),
+            ],
+            options={
+                'ordering': ['order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Analytic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('type', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('order', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analytics', to='projects.project')),
+            ],
+            options={
+                'ordering': ['order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AIIntegration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enabled', models.BooleanField(default=False)),
+                ('features', models.JSONField(default=list)),
+                ('models', models.JSONField(default=list)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ai_integration', to='projects.project')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Report',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('frequency', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('order', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reports', to='projects.project')),
+            ],
+            options={
+                'ordering': ['order'],
+            },
+        ),
+    ]
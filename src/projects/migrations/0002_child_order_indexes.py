@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analytic',
+            index=models.Index(fields=['project', 'order'], name='projects_an_project_c02455_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='datasource',
+            index=models.Index(fields=['project', 'order'], name='projects_da_project_339ebd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['project', 'order'], name='projects_re_project_0fdbd3_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_child_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-created_at', '-id'], name='projects_pr_created_35e83e_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_project_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['updated_at'], name='projects_pr_updated_d6acc2_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+from django.db import migrations
+
+# The search document as it was when this migration was written, inlined so
+# the migration never changes with projects.search. A later change to the
+# document needs a migration of its own that backfills it again.
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE projects_project ADD COLUMN search_vector tsvector")
+        schema_editor.execute(
+            "CREATE INDEX projects_project_search_idx ON projects_project USING gin (search_vector)"
+        )
+        schema_editor.execute("""
+            UPDATE projects_project AS p SET search_vector =
+                setweight(to_tsvector('english', coalesce(p.name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(p.description, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(
+                    (SELECT string_agg(c.name, ' ') FROM (
+                        SELECT name FROM projects_datasource WHERE project_id = p.id
+                        UNION ALL SELECT name FROM projects_report WHERE project_id = p.id
+                        UNION ALL SELECT name FROM projects_analytic WHERE project_id = p.id
+                    ) AS c), ''
+                )), 'B') ||
+                setweight(to_tsvector('english', coalesce(p.full_scope, '')), 'C')
+        """)
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE projects_project_fts USING fts5("
+            "name, description, full_scope, children, tokenize='porter unicode61')"
+        )
+        schema_editor.execute("""
+            INSERT INTO projects_project_fts (rowid, name, description, full_scope, children)
+            SELECT p.id, p.name, p.description, p.full_scope,
+                (SELECT group_concat(c.name, ' ') FROM (
+                    SELECT name FROM projects_datasource WHERE project_id = p.id
+                    UNION ALL SELECT name FROM projects_report WHERE project_id = p.id
+                    UNION ALL SELECT name FROM projects_analytic WHERE project_id = p.id
+                ) AS c)
+            FROM projects_project AS p
+        """)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS projects_project_search_idx")
+        schema_editor.execute("ALTER TABLE projects_project DROP COLUMN IF EXISTS search_vector")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS projects_project_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
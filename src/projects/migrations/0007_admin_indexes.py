@@ -0,0 +1,30 @@
+# Generated by Django 5.0 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+from helpers.operations import AddIndexConcurrently, AddTrigramIndexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('projects', '0006_project_external_id'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='projects_pr_status_8c278e_idx'),
+        ),
+        # Admin search (icontains) on PostgreSQL
+        AddTrigramIndexes(
+            model_name='project',
+            indexes=[
+                ('projects_name_trgm_idx', 'name'),
+                ('projects_description_trgm_idx', 'description'),
+                ('projects_client_company_trgm_idx', 'client_company'),
+            ],
+        ),
+    ]
@@ -13,6 +13,8 @@ class Project(models.Model):
     ]
 
     # Basic Information
+    # Caller-supplied key that bulk imports upsert on
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
     name = models.CharField(max_length=255)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='planning')
     description = models.TextField()
@@ -41,6 +43,14 @@ class Project(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination key for the list endpoint
+            models.Index(fields=['-created_at', '-id']),
+            # MAX(updated_at) version probe for conditional GET
+            models.Index(fields=['updated_at']),
+            # Admin changelist filtered by status
+            models.Index(fields=['status', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return self.name
@@ -55,6 +65,9 @@ class DataSource(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['project', 'order']),
+        ]
 
     def __str__(self):
         return f"{self.project.name} - {self.name}"
@@ -69,6 +82,9 @@ class Report(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['project', 'order']),
+        ]
 
     def __str__(self):
         return f"{self.project.name} - {self.name}"
@@ -83,6 +99,9 @@ class Analytic(models.Model):
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['project', 'order']),
+        ]
 
     def __str__(self):
         return f"{self.project.name} - {self.name}"
@@ -0,0 +1,120 @@
+"""
+Full-text search over projects.
+
+The search document for a project is its name, description, full_scope and
+the names of its data sources, reports and analytics. It is stored outside
+the Project model so the model stays portable across backends:
+
+* PostgreSQL: a weighted ``search_vector`` tsvector column on
+  projects_project with a GIN index.
+* SQLite: the ``projects_project_fts`` FTS5 virtual table keyed by project id.
+
+Both are created and backfilled by migration 0005, which keeps its own
+frozen copy of the SQL below, and kept current by reindex_projects(). The
+signals batch it per transaction through on_commit_batch(), and bulk
+writers join the same batch. Changing the document here means adding a
+migration that backfills it again.
+"""
+import re
+
+from django.db import connection, transaction
+
+FTS_TABLE = "projects_project_fts"
+REINDEX_BATCH_SIZE = 500
+
+CHILD_NAMES_SQL = """
+    SELECT name FROM projects_datasource WHERE project_id = p.id
+    UNION ALL SELECT name FROM projects_report WHERE project_id = p.id
+    UNION ALL SELECT name FROM projects_analytic WHERE project_id = p.id
+"""
+
+POSTGRES_REINDEX_SQL = f"""
+    UPDATE projects_project AS p SET search_vector =
+        setweight(to_tsvector('english', coalesce(p.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(p.description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(
+            (SELECT string_agg(c.name, ' ') FROM ({CHILD_NAMES_SQL}) AS c), ''
+        )), 'B') ||
+        setweight(to_tsvector('english', coalesce(p.full_scope, '')), 'C')
+    WHERE p.id = ANY(%s)
+"""
+
+POSTGRES_SEARCH_SQL = """
+    SELECT p.id, ts_rank(p.search_vector, q) AS rank
+    FROM projects_project AS p, websearch_to_tsquery('english', %s) AS q
+    WHERE p.search_vector @@ q
+    ORDER BY rank DESC, p.id DESC
+    LIMIT %s
+"""
+
+SQLITE_INSERT_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, name, description, full_scope, children)
+    SELECT p.id, p.name, p.description, p.full_scope,
+        (SELECT group_concat(c.name, ' ') FROM ({CHILD_NAMES_SQL}) AS c)
+    FROM projects_project AS p
+    WHERE p.id IN ({{placeholders}})
+"""
+
+# bm25() column weights: name, description, full_scope, children
+SQLITE_SEARCH_SQL = f"""
+    SELECT rowid, -bm25({FTS_TABLE}, 10.0, 4.0, 1.0, 4.0) AS rank
+    FROM {FTS_TABLE}
+    WHERE {FTS_TABLE} MATCH %s
+    ORDER BY rank DESC, rowid DESC
+    LIMIT %s
+"""
+
+
+def reindex_projects(project_ids):
+    """
+    Rebuild the search document of the given projects. Ids of deleted
+    projects are dropped from the index.
+    """
+    project_ids = list(project_ids)
+    for start in range(0, len(project_ids), REINDEX_BATCH_SIZE):
+        batch = project_ids[start:start + REINDEX_BATCH_SIZE]
+        # Atomic so concurrent reindexes of a project can't interleave the
+        # SQLite DELETE and INSERT
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(POSTGRES_REINDEX_SQL, [batch])
+            elif connection.vendor == "sqlite":
+                placeholders = ", ".join(["%s"] * len(batch))
+                cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", batch)
+                cursor.execute(SQLITE_INSERT_SQL.format(placeholders=placeholders), batch)
+
+
+def _fts5_query(query):
+    # Quote every term so user input can't inject FTS5 syntax; the last
+    # term also matches as a prefix for type-ahead
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_projects(query, limit):
+    """
+    Return [(project_id, rank), ...] best match first
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(POSTGRES_SEARCH_SQL, [query, limit])
+            return cursor.fetchall()
+        if connection.vendor == "sqlite":
+            match = _fts5_query(query)
+            if match is None:
+                return []
+            cursor.execute(SQLITE_SEARCH_SQL, [match, limit])
+            return cursor.fetchall()
+
+    # Other backends have no index; fall back to an unranked substring scan
+    from django.db.models import Q
+    from .models import Project
+
+    ids = Project.objects.filter(
+        Q(name__icontains=query) | Q(description__icontains=query)
+    ).values_list("id", flat=True)[:limit]
+    return [(project_id, 0.0) for project_id in ids]
@@ -1,3 +1,6 @@
+from operator import itemgetter
+
+from django.conf import settings
 from rest_framework import serializers
 from .models import Project, DataSource, Report, Analytic, AIIntegration
 
@@ -26,7 +29,69 @@ class AIIntegrationSerializer(serializers.ModelSerializer):
         fields = ['id', 'enabled', 'features', 'models']
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+# Serializer fields that are computed from other model columns
+FIELD_COLUMNS = {
+    'tasks': ['tasks_total', 'tasks_completed'],
+}
+
+
+def _parse_names(query_params, param, allowed):
+    value = query_params.get(param)
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names - set(allowed)
+    if unknown:
+        raise serializers.ValidationError({
+            param: f"Unknown value(s): {', '.join(sorted(unknown))}. "
+                   f"Allowed: {', '.join(allowed)}"
+        })
+    return names
+
+
+def parse_fieldset(query_params, serializer_class):
+    """
+    Parse ?fields= and ?include= for serializer_class. Returns
+    (fields, include) where None means "everything" for that parameter.
+    """
+    relations = getattr(serializer_class, 'relation_fields', [])
+    scalars = [name for name in serializer_class.Meta.fields if name not in relations]
+    fields = _parse_names(query_params, 'fields', scalars)
+    if fields is not None:
+        fields.add('id')
+    include = _parse_names(query_params, 'include', relations)
+    return fields, include
+
+
+def fieldset_columns(model, fields):
+    """Model columns backing the requested serializer fields"""
+    columns = set()
+    for name in fields:
+        columns.update(FIELD_COLUMNS.get(name, [name]))
+    return columns & {field.attname for field in model._meta.concrete_fields}
+
+
+class SparseFieldsetMixin:
+    """
+    Drop the fields and nested relations that were not requested through
+    ?fields= / ?include= (passed in the serializer context by the view)
+    """
+    relation_fields = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        include = self.context.get('include')
+        for name in list(self.fields):
+            if name in self.relation_fields:
+                wanted = include is None or name in include
+            else:
+                wanted = fields is None or name in fields
+            if not wanted:
+                self.fields.pop(name)
+
+
+class ProjectListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for list view - lighter data"""
     tasks = serializers.SerializerMethodField()
 
@@ -44,8 +109,55 @@ class ProjectListSerializer(serializers.ModelSerializer):
         }
 
 
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectListFastSerializer:
+    """
+    values()-based equivalent of ProjectListSerializer for the list endpoint.
+    Reads only the needed columns and builds plain dicts, skipping model
+    instantiation and per-field DRF machinery; the output is identical. The
+    fields are ProjectListSerializer's and their columns come from
+    FIELD_COLUMNS, so only computed fields need a builder here.
+    """
+    fields = ProjectListSerializer.Meta.fields
+    # Fields not read from the column of the same name
+    field_builders = {
+        'tasks': lambda row: {
+            'total': row['tasks_total'],
+            'completed': row['tasks_completed'],
+        },
+    }
+
+    @classmethod
+    def builders(cls, fields=None):
+        """(name, getter) per rendered field, in the declared order"""
+        return [
+            (name, cls.field_builders.get(name, itemgetter(name)))
+            for name in cls.fields if fields is None or name in fields
+        ]
+
+    @classmethod
+    def values(cls, queryset, fields=None):
+        # created_at is only read for the keyset cursor, it is not rendered
+        columns = fieldset_columns(queryset.model, cls.fields if fields is None else fields)
+        return queryset.values(*sorted(columns | {'id', 'created_at'}))
+
+    @classmethod
+    def to_representation(cls, row):
+        return {name: build(row) for name, build in cls.builders()}
+
+    @classmethod
+    def serialize(cls, rows, fields=None):
+        # Resolve the per-field getters once for all rows
+        builders = cls.builders(fields)
+        return [{name: build(row) for name, build in builders} for row in rows]
+
+
+class ProjectDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for detail view - full data"""
+    # Relations walked by the nested serializers, fetched up front by the viewset
+    select_related_fields = ['ai_integration']
+    prefetch_related_fields = ['data_sources', 'reports', 'analytics']
+    relation_fields = ['data_sources', 'reports', 'analytics', 'ai_integration']
+
     data_sources = DataSourceSerializer(many=True, read_only=True)
     reports = ReportSerializer(many=True, read_only=True)
     analytics = AnalyticSerializer(many=True, read_only=True)
@@ -69,3 +181,45 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
             'total': obj.tasks_total,
             'completed': obj.tasks_completed
         }
+
+
+class ProjectBulkItemSerializer(serializers.ModelSerializer):
+    """
+    One project of a POST /api/projects/bulk/ payload. Only validates; the
+    rows are written by projects.bulk.bulk_upsert_projects(). A nested list
+    that is present replaces the project's existing rows, an omitted one
+    leaves them untouched.
+    """
+    # Declared explicitly: the model's UniqueValidator would cost one query
+    # per item, and existing keys are exactly what an upsert expects
+    external_id = serializers.CharField(max_length=100)
+    data_sources = DataSourceSerializer(many=True, required=False)
+    reports = ReportSerializer(many=True, required=False)
+    analytics = AnalyticSerializer(many=True, required=False)
+    ai_integration = AIIntegrationSerializer(required=False, allow_null=True)
+
+    class Meta:
+        model = Project
+        fields = [
+            'external_id', 'name', 'status', 'description', 'progress',
+            'due_date', 'team_size', 'tasks_total', 'tasks_completed',
+            'budget', 'implementation_time', 'last_update',
+            'digitalpath_responsible', 'client_responsible',
+            'client_company', 'full_scope',
+            'data_sources', 'reports', 'analytics', 'ai_integration',
+        ]
+
+
+class ProjectBulkSerializer(serializers.Serializer):
+    projects = ProjectBulkItemSerializer(many=True, allow_empty=False)
+
+    def validate_projects(self, items):
+        limit = settings.PROJECTS_BULK_MAX_ITEMS
+        if len(items) > limit:
+            raise serializers.ValidationError(f"At most {limit} projects per request.")
+        seen = set()
+        for item in items:
+            if item['external_id'] in seen:
+                raise serializers.ValidationError(f"Duplicate external_id: {item['external_id']}")
+            seen.add(item['external_id'])
+        return items
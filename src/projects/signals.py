@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from helpers.cache import invalidate_tags
+from helpers.transactions import on_commit_batch
+
+from .models import Project, DataSource, Report, Analytic, AIIntegration
+from .search import reindex_projects
+from .summary import invalidate_project_summary
+
+
+@receiver([post_save, post_delete], sender=Project)
+def project_changed(sender, instance, **kwargs):
+    invalidate_project_summary()
+    invalidate_tags(f"project:{instance.pk}", "projects:list")
+    on_commit_batch(reindex_projects, [instance.pk])
+
+
+def touch_projects(project_ids):
+    # Children are part of the project representation, so bump the parents'
+    # version to keep their ETag / Last-Modified validators correct
+    Project.objects.filter(pk__in=project_ids).update(updated_at=timezone.now())
+    invalidate_tags(*[f"project:{project_id}" for project_id in project_ids])
+
+
+@receiver([post_save, post_delete], sender=DataSource)
+@receiver([post_save, post_delete], sender=Report)
+@receiver([post_save, post_delete], sender=Analytic)
+@receiver([post_save, post_delete], sender=AIIntegration)
+def project_child_changed(sender, instance, **kwargs):
+    # One UPDATE per transaction for all the children saved in it
+    on_commit_batch(touch_projects, [instance.project_id])
+    if sender is not AIIntegration:
+        # Child names are part of the parent's search document
+        on_commit_batch(reindex_projects, [instance.project_id])
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+
+from helpers.metrics import record_cache
+
+from .models import Project
+
+SUMMARY_CACHE_KEY = "projects:summary"
+
+
+def compute_project_summary(queryset=None):
+    """
+    Compute status counts and average progress in a single aggregate query
+    """
+    if queryset is None:
+        queryset = Project.objects.all()
+
+    aggregates = {'total': Count('id')}
+    for status, _label in Project.STATUS_CHOICES:
+        aggregates[status] = Count('id', filter=Q(status=status))
+    aggregates['average_progress'] = Avg('progress')
+
+    summary = queryset.aggregate(**aggregates)
+    average = summary['average_progress']
+    summary['average_progress'] = round(average) if average is not None else 0
+    return summary
+
+
+def get_project_summary():
+    """
+    Return the cached project summary, computing it on a cache miss
+    """
+    summary = cache.get(SUMMARY_CACHE_KEY)
+    record_cache("projects_summary", summary is not None)
+    if summary is None:
+        summary = compute_project_summary()
+        cache.set(SUMMARY_CACHE_KEY, summary, settings.PROJECTS_SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_project_summary():
+    # Wait for the commit so a concurrent reader can't re-cache stale counts
+    transaction.on_commit(lambda: cache.delete(SUMMARY_CACHE_KEY))
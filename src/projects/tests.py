@@ -0,0 +1,591 @@
+import csv
+import importlib
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from contact.models import ContactMessage
+from helpers.cache import response_cache
+from helpers.renderers import ORJSONRenderer
+from waitlists.models import WaitlistEntry
+
+from .models import AIIntegration, Analytic, DataSource, Project, Report
+from .search import FTS_TABLE, reindex_projects
+from .summary import SUMMARY_CACHE_KEY, compute_project_summary, get_project_summary
+from .views import ProjectViewSet
+from .serializers import ProjectDetailSerializer, ProjectListFastSerializer, ProjectListSerializer
+
+User = get_user_model()
+
+
+def project_item(external_id, **fields):
+    return {
+        'external_id': external_id,
+        'name': f"Project {external_id}",
+        'description': "Description",
+        'due_date': "2026-12-31",
+        'digitalpath_responsible': "Ana",
+        'client_responsible': "Bo",
+        'budget': "$10k",
+        'implementation_time': "3 months",
+        'last_update': "today",
+        'full_scope': "Scope",
+        **fields,
+    }
+
+
+def make_project(name="Project", **fields):
+    item = project_item(None, name=name, **fields)
+    item.pop('external_id')
+    return Project.objects.create(**item)
+
+
+class ProjectsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.local.clear()
+        self.user = User.objects.create_user("planner", "planner@example.com", "pw")
+        self.client.force_login(self.user)
+
+
+class ProjectSummaryTestCase(ProjectsTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_project("Alpha", status='active', progress=40)
+            make_project("Beta", status='active', progress=61)
+            make_project("Gamma", status='completed', progress=100)
+
+    def test_counts_and_average_in_one_query(self):
+        with self.assertNumQueries(1):
+            summary = compute_project_summary()
+        self.assertEqual(summary, {
+            'total': 3, 'active': 2, 'completed': 1, 'on_hold': 0, 'planning': 0, 'average_progress': 67,
+        })
+        Project.objects.all().delete()
+        self.assertEqual(compute_project_summary()['average_progress'], 0)
+
+    def test_served_from_the_cache_after_the_first_read(self):
+        with self.assertNumQueries(1):
+            summary = get_project_summary()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_project_summary(), summary)
+        self.assertEqual(self.client.get('/api/projects/summary/').json(), summary)
+
+    def test_writes_invalidate_it_on_commit(self):
+        get_project_summary()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_project("Delta", status='on_hold', progress=0)
+            # A concurrent reader still gets the committed counts
+            self.assertEqual(cache.get(SUMMARY_CACHE_KEY)['total'], 3)
+        self.assertIsNone(cache.get(SUMMARY_CACHE_KEY))
+        self.assertEqual(get_project_summary()['on_hold'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.get(name="Delta").delete()
+        self.assertEqual(get_project_summary()['total'], 3)
+
+    def test_bulk_upserts_invalidate_it(self):
+        get_project_summary()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/projects/bulk/', {'projects': [project_item('a', status='on_hold')]}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(get_project_summary()['on_hold'], 1)
+
+
+def add_children(project, count):
+    DataSource.objects.bulk_create(
+        DataSource(project=project, name=f"Source {n}", type="SQL", description="-", order=n) for n in range(count)
+    )
+    Report.objects.bulk_create(
+        Report(project=project, name=f"Report {n}", frequency="weekly", description="-", order=n) for n in range(count)
+    )
+    Analytic.objects.bulk_create(
+        Analytic(project=project, name=f"Analytic {n}", description="-", order=n) for n in range(count)
+    )
+    AIIntegration.objects.create(project=project, enabled=True, features=["triage"], models=["m1"])
+
+
+class ProjectFetchPlanTestCase(ProjectsTestCase):
+    def planned_queryset(self, action, **params):
+        view = ProjectViewSet(action=action, format_kwarg=None)
+        view.request = Request(APIRequestFactory().get('/api/projects/', params))
+        return view.get_queryset()
+
+    def test_detail_plan_joins_and_prefetches_the_relations(self):
+        queryset = self.planned_queryset('retrieve')
+        self.assertEqual(queryset.query.select_related, {'ai_integration': {}})
+        self.assertEqual(queryset._prefetch_related_lookups, ('data_sources', 'reports', 'analytics'))
+        # ?include= narrows the plan to what is rendered
+        queryset = self.planned_queryset('retrieve', include='reports')
+        self.assertIs(queryset.query.select_related, False)
+        self.assertEqual(queryset._prefetch_related_lookups, ('reports',))
+
+    def test_detail_queries_do_not_grow_with_its_children(self):
+        small, large = make_project("Small"), make_project("Large")
+        add_children(small, 1)
+        add_children(large, 25)
+        counts = []
+        for project in (small, large):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(f'/api/projects/{project.id}/')
+            self.assertEqual(len(response.json()['data_sources']), 1 if project is small else 25)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_detail_serializer_over_many_projects_runs_four_queries(self):
+        for number in range(5):
+            add_children(make_project(f"Project {number}"), 3)
+        queryset = self.planned_queryset('retrieve')
+        # The projects joined to their AI integration, then one query per child table
+        with self.assertNumQueries(4):
+            data = ProjectDetailSerializer(queryset, many=True).data
+        self.assertEqual([len(project['reports']) for project in data], [3] * 5)
+        self.assertEqual([source['order'] for source in data[0]['data_sources']], [0, 1, 2])
+
+    def test_children_have_a_project_order_index(self):
+        with connection.cursor() as cursor:
+            for model in (DataSource, Report, Analytic):
+                constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+                self.assertIn(
+                    ['project_id', 'order'],
+                    [constraint['columns'] for constraint in constraints.values() if constraint['index']],
+                )
+
+
+class SparseFieldsetTestCase(ProjectsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = make_project("Alpha", full_scope="Long scope", tasks_total=5, tasks_completed=2)
+        add_children(self.project, 2)
+
+    def project_selects(self, queries):
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'FROM "projects_project"' in query['sql']
+        ]
+
+    def test_list_returns_and_reads_only_the_requested_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/projects/', {'fields': "name,tasks"})
+        self.assertEqual(response.json()['results'], [
+            {'id': self.project.id, 'name': "Alpha", 'tasks': {'total': 5, 'completed': 2}},
+        ])
+        listing = [sql for sql in self.project_selects(queries) if '"projects_project"."tasks_total"' in sql]
+        self.assertEqual(len(listing), 1)
+        self.assertNotIn('"projects_project"."description"', listing[0])
+
+    def test_detail_renders_and_fetches_only_the_requested_parts(self):
+        url = f'/api/projects/{self.project.id}/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': "name", 'include': "reports"})
+        data = response.json()
+        self.assertEqual(set(data), {'id', 'name', 'reports'})
+        self.assertEqual([report['name'] for report in data['reports']], ["Report 0", "Report 1"])
+        sql = " ".join(query['sql'] for query in queries)
+        self.assertNotIn('"projects_datasource"', sql)
+        self.assertNotIn('"projects_aiintegration"', sql)
+        self.assertFalse(any('"projects_project"."full_scope"' in sql for sql in self.project_selects(queries)))
+
+        # Omitting both parameters still returns everything
+        data = self.client.get(url).json()
+        self.assertEqual(len(data['data_sources']), 2)
+        self.assertEqual(data['full_scope'], "Long scope")
+
+    def test_empty_include_drops_every_relation(self):
+        data = self.client.get(f'/api/projects/{self.project.id}/', {'include': ""}).json()
+        self.assertFalse({'data_sources', 'reports', 'analytics', 'ai_integration'} & set(data))
+        self.assertEqual(data['name'], "Alpha")
+
+    def test_unknown_names_are_rejected(self):
+        response = self.client.get('/api/projects/', {'fields': "name,secret"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("secret", response.json()['fields'])
+        # The list has no relations to include
+        response = self.client.get('/api/projects/', {'include': "reports"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'/api/projects/{self.project.id}/', {'fields': "reports"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_fieldsets_are_cached_and_validated_separately(self):
+        full = self.client.get('/api/projects/')
+        sparse = self.client.get('/api/projects/', {'fields': "name"})
+        self.assertEqual(set(sparse.json()['results'][0]), {'id', 'name'})
+        self.assertIn('description', self.client.get('/api/projects/').json()['results'][0])
+        self.assertNotEqual(full['ETag'], sparse['ETag'])
+
+
+class ProjectBulkTestCase(ProjectsTestCase):
+    def bulk(self, *items):
+        response = self.client.post('/api/projects/bulk/', {'projects': list(items)}, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_creates_then_updates_by_external_id(self):
+        data = self.bulk(project_item('a', progress=10), project_item('b'))
+        self.assertEqual((data['created'], data['updated']), (2, 0))
+        ids = {row['external_id']: row['id'] for row in data['results']}
+
+        data = self.bulk(project_item('a', name="Renamed", progress=50), project_item('c'))
+        self.assertEqual((data['created'], data['updated']), (1, 1))
+        self.assertEqual(Project.objects.count(), 3)
+        project = Project.objects.get(external_id='a')
+        self.assertEqual(project.id, ids['a'])
+        self.assertEqual((project.name, project.progress), ("Renamed", 50))
+
+    def test_nested_lists_replace_children_and_omitted_ones_are_kept(self):
+        self.bulk(project_item(
+            'a',
+            data_sources=[{'name': "Claims", 'type': "SQL", 'description': "-", 'order': 0}],
+            reports=[{'name': "Weekly", 'frequency': "weekly", 'description': "-", 'order': 0}],
+        ))
+        self.bulk(project_item(
+            'a',
+            data_sources=[
+                {'name': "Members", 'type': "API", 'description': "-", 'order': 0},
+                {'name': "Providers", 'type': "CSV", 'description': "-", 'order': 1},
+            ],
+        ))
+        project = Project.objects.get(external_id='a')
+        self.assertEqual(
+            list(DataSource.objects.filter(project=project).values_list('name', flat=True)),
+            ["Members", "Providers"],
+        )
+        self.assertEqual(list(Report.objects.filter(project=project).values_list('name', flat=True)), ["Weekly"])
+
+    def test_ai_integration_is_upserted_and_cleared_by_null(self):
+        self.bulk(project_item('a', ai_integration={'enabled': True, 'features': ["triage"], 'models': ["m1"]}))
+        self.bulk(project_item('a', ai_integration={'features': ["triage", "summaries"]}))
+        integration = AIIntegration.objects.get(project__external_id='a')
+        # Omitted fields of the integration keep their value too
+        self.assertEqual(
+            (integration.enabled, integration.features, integration.models), (True, ["triage", "summaries"], ["m1"])
+        )
+
+        self.bulk(project_item('a', ai_integration=None))
+        self.assertFalse(AIIntegration.objects.filter(project__external_id='a').exists())
+
+    def test_omitted_optional_fields_keep_their_value(self):
+        self.bulk(project_item('a', status='active', progress=40, team_size=5, client_company="Acme"))
+        self.bulk(project_item('a', progress=60), project_item('b'))
+        project = Project.objects.get(external_id='a')
+        self.assertEqual(
+            (project.status, project.progress, project.team_size, project.client_company),
+            ('active', 60, 5, "Acme"),
+        )
+        # A new project still gets the model defaults
+        self.assertEqual(Project.objects.get(external_id='b').status, 'planning')
+
+    def test_rejects_duplicate_external_ids(self):
+        response = self.client.post(
+            '/api/projects/bulk/', {'projects': [project_item('a'), project_item('a')]}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Project.objects.exists())
+
+
+class ProjectListPaginationTestCase(ProjectsTestCase):
+    def test_pages_cover_projects_sharing_a_timestamp_once(self):
+        for number in range(5):
+            make_project(f"Project {number}")
+        Project.objects.update(created_at=timezone.now())
+        seen = []
+        url = '/api/projects/?page_size=2'
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                data = self.client.get(url).json()
+                seen += [project['id'] for project in data['results']]
+                url = data['next']
+        self.assertEqual(seen, list(Project.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+        # Later pages seek with one row-value comparison
+        self.assertTrue(any(
+            '("projects_project"."created_at", "projects_project"."id") <' in query['sql'] for query in queries
+        ))
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        response = self.client.get('/api/projects/', {'cursor': "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': "Invalid cursor"})
+
+
+class ProjectListFastSerializerTestCase(TestCase):
+    def setUp(self):
+        make_project("Alpha", progress=40, team_size=3, tasks_total=10, tasks_completed=4)
+        make_project("Beta \u2028 ünïcode", description="Line\nbreak \"quoted\"", due_date="")
+
+    def assertRendersLikeTheSerializer(self, fields=None):
+        queryset = Project.objects.order_by('-created_at', '-id')
+        expected = JSONRenderer().render(ProjectListSerializer(queryset, many=True, context={'fields': fields}).data)
+        rows = ProjectListFastSerializer.values(queryset, fields)
+        self.assertEqual(ORJSONRenderer().render(ProjectListFastSerializer.serialize(rows, fields)), expected)
+
+    def test_output_is_byte_identical(self):
+        self.assertRendersLikeTheSerializer()
+
+    def test_sparse_fieldset_output_is_byte_identical(self):
+        self.assertRendersLikeTheSerializer({'id', 'name', 'tasks'})
+        self.assertRendersLikeTheSerializer({'id', 'due_date'})
+
+    def test_single_row_matches_the_listing(self):
+        row = ProjectListFastSerializer.values(Project.objects.filter(name="Alpha")).get()
+        self.assertEqual(
+            ProjectListFastSerializer.to_representation(row),
+            ProjectListSerializer(Project.objects.get(name="Alpha")).data,
+        )
+
+
+class ConditionalGetTestCase(ProjectsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = make_project("Alpha")
+        make_project("Beta")
+
+    def test_list_answers_304_until_a_project_is_deleted(self):
+        response = self.client.get('/api/projects/')
+        etag = response['ETag']
+        # Deletions don't move MAX(updated_at), so there is no Last-Modified
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+        response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        response = self.client.get('/api/projects/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_revalidates_with_etag_and_last_modified(self):
+        url = f'/api/projects/{self.project.id}/'
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_detail_precondition_failures_answer_412(self):
+        url = f'/api/projects/{self.project.id}/'
+        self.assertEqual(self.client.get(url, HTTP_IF_MATCH='"stale"').status_code, 412)
+        response = self.client.get(url, HTTP_IF_UNMODIFIED_SINCE='Sat, 01 Jan 2000 00:00:00 GMT')
+        self.assertEqual(response.status_code, 412)
+
+    def test_child_saves_change_the_detail_etag_with_one_update(self):
+        url = f'/api/projects/{self.project.id}/'
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for order in range(5):
+                        DataSource.objects.create(
+                            project=self.project, name=f"Source {order}", type="SQL", description="-", order=order
+                        )
+        # The parent's version is bumped once, on commit
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "projects_project"')]
+        self.assertEqual(len(updates), 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data_sources']), 5)
+
+
+class ProjectSearchTestCase(ProjectsTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.named = make_project("Claims portal", description="Member intake", full_scope="Rollout")
+            self.scoped = make_project("Billing", description="Invoices", full_scope="Replaces the claims queue")
+            make_project("Reporting", description="Dashboards", full_scope="Weekly")
+
+    def search(self, query):
+        response = self.client.get('/api/projects/search/', {'q': query})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [project['name'] for project in response.json()['results']]
+
+    def index_writes(self, queries):
+        # reindex_projects() statements: the tsvector UPDATE, or the FTS5 DELETE
+        return [
+            query for query in queries
+            if query['sql'].lstrip().startswith(
+                ('UPDATE projects_project AS p SET search_vector', f'DELETE FROM {FTS_TABLE}')
+            )
+        ]
+
+    def index_snapshot(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT id, search_vector::text FROM projects_project ORDER BY id")
+            else:
+                cursor.execute(f"SELECT rowid, name, description, full_scope, children FROM {FTS_TABLE} ORDER BY rowid")
+            return cursor.fetchall()
+
+    def test_name_matches_outrank_scope_matches(self):
+        self.assertEqual(self.search("claims"), ["Claims portal", "Billing"])
+        # Stemmed on both backends
+        self.assertEqual(self.search("invoice"), ["Billing"])
+
+    def test_child_names_are_indexed_once_per_transaction(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for order in range(3):
+                        DataSource.objects.create(
+                            project=self.scoped, name=f"Ledger {order}", type="SQL", description="-", order=order
+                        )
+                    Analytic.objects.create(project=self.named, name="Ledger audit", description="-", order=0)
+        self.assertEqual(len(self.index_writes(queries)), 1)
+        self.assertEqual(self.search("ledger"), ["Billing", "Claims portal"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DataSource.objects.filter(project=self.scoped).delete()
+            Analytic.objects.get(name="Ledger audit").delete()
+        self.assertEqual(self.search("ledger"), [])
+
+    def test_renamed_and_deleted_projects_are_reindexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.named.name = "Intake portal"
+            self.named.save()
+            self.scoped.delete()
+        self.assertEqual(self.search("claims"), [])
+        self.assertEqual(self.search("intake"), ["Intake portal"])
+
+    def test_bulk_upserts_reindex_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    '/api/projects/bulk/',
+                    {'projects': [project_item('a', name="Ledger sync"), project_item('b', name="Ledger export")]},
+                    content_type='application/json',
+                )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(self.index_writes(queries)), 1)
+        self.assertEqual(sorted(self.search("ledger")), ["Ledger export", "Ledger sync"])
+
+    def test_migration_backfill_builds_the_same_index_as_reindex(self):
+        DataSource.objects.create(project=self.named, name="Ledger", type="SQL", description="-", order=0)
+        reindex_projects(Project.objects.values_list('id', flat=True))
+        indexed = self.index_snapshot()
+
+        migration = importlib.import_module('projects.migrations.0005_project_search_index')
+
+        class SchemaEditor:
+            def __init__(self, cursor):
+                self.connection = connection
+                self.execute = cursor.execute
+
+        with connection.cursor() as cursor:
+            migration.drop_search_index(None, SchemaEditor(cursor))
+            migration.create_search_index(None, SchemaEditor(cursor))
+        self.assertEqual(self.index_snapshot(), indexed)
+
+
+class ProjectExportTestCase(ProjectsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.projects = [make_project(f"Project {number}") for number in range(5)]
+        for project in self.projects[:3]:
+            add_children(project, 4)
+
+    def export(self, format):
+        response = self.client.get('/api/projects/export/', {'format': format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="projects.{format}"')
+        with CaptureQueriesContext(connection) as queries:
+            body = b"".join(response.streaming_content).decode()
+        return body, queries
+
+    @override_settings(PROJECTS_EXPORT_CHUNK_SIZE=2)
+    def test_ndjson_streams_every_project_in_chunks_of_four_queries(self):
+        body, queries = self.export('ndjson')
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([record['id'] for record in records], [project.id for project in self.projects])
+        # Chunks of 2, 2 and 1 projects: projects + three child prefetches each
+        self.assertEqual(len(queries), 12)
+        detail = self.client.get(f'/api/projects/{self.projects[0].id}/').json()
+        self.assertEqual(records[0], detail)
+        self.assertEqual(len(records[0]['reports']), 4)
+        self.assertIsNone(records[4]['ai_integration'])
+
+    def test_csv_writes_nested_values_as_json_cells(self):
+        body, _queries = self.export('csv')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([int(row['id']) for row in rows], [project.id for project in self.projects])
+        self.assertEqual(
+            [source['name'] for source in json.loads(rows[0]['data_sources'])],
+            [f"Source {number}" for number in range(4)],
+        )
+        self.assertEqual(json.loads(rows[0]['ai_integration'])['features'], ["triage"])
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/projects/export/').status_code, 403)
+
+
+class ProjectAdminTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(self.admin)
+
+    def test_search_matches_any_case_and_caps_the_count(self):
+        make_project("Claims Portal", client_company="Acme")
+        make_project("Member app", description="Rebuilds the CLAIMS intake")
+        make_project("Billing")
+        response = self.client.get('/admin/projects/project/', {'q': "claims"})
+        self.assertEqual(
+            sorted(project.name for project in response.context['cl'].result_list), ["Claims Portal", "Member app"]
+        )
+        with override_settings(ADMIN_COUNT_LIMIT=1):
+            response = self.client.get('/admin/projects/project/', {'q': "a"})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_inline_pages_cover_children_sharing_an_order_value_once(self):
+        project = make_project("Alpha")
+        DataSource.objects.bulk_create(
+            DataSource(project=project, name=f"Source {number}", type="SQL", description="-", order=0)
+            for number in range(45)
+        )
+        url = f'/admin/projects/project/{project.id}/change/'
+        seen = []
+        for page in (1, 2, 3):
+            response = self.client.get(url, {'data_sources-page': page})
+            formset = response.context['inline_admin_formsets'][0].formset
+            self.assertEqual(formset.paginator.num_pages, 3)
+            self.assertEqual(formset.paginator.object_list.query.order_by, ('order', 'pk'))
+            seen += [source.name for source in formset.page.object_list]
+        self.assertEqual(sorted(seen), sorted(f"Source {number}" for number in range(45)))
+        self.assertContains(response, '?data_sources-page=2')
+
+
+class GenerateLoadDataTestCase(TestCase):
+    def generate(self, *args):
+        call_command(
+            'generate_load_data', '--projects=30', '--users=5', '--waitlist=300', '--contacts=100', *args,
+            stdout=io.StringIO(),
+        )
+
+    def test_spreads_timestamps_and_clears_only_generated_rows(self):
+        kept = make_project("Kept")
+        self.generate('--months=6')
+        oldest = timezone.now() - timedelta(days=60)
+        self.assertTrue(Project.objects.filter(created_at__lt=oldest).exists())
+        self.assertTrue(WaitlistEntry.objects.filter(timestamp__lt=oldest).exists())
+        self.assertTrue(ContactMessage.objects.filter(created_at__lt=oldest).exists())
+        self.assertFalse(WaitlistEntry.objects.filter(timestamp__lt=timezone.now() - timedelta(days=190)).exists())
+
+        self.generate('--clear')
+        self.assertEqual(Project.objects.count(), 31)
+        self.assertEqual(WaitlistEntry.objects.count(), 300)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertTrue(Project.objects.filter(pk=kept.pk).exists())
+        self.assertFalse(DataSource.objects.exclude(project__in=Project.objects.all()).exists())
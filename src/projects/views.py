@@ -1,58 +1,188 @@
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+
+from helpers.cache import cache_response
+from helpers.pagination import KeysetPagination, get_page_size
+from helpers.renderers import CSVRenderer, NDJSONRenderer, ORJSONRenderer
+from helpers.streaming import streaming_response
+from .bulk import bulk_upsert_projects
+from .export import export_projects
 from .models import Project, DataSource, Report, Analytic, AIIntegration
 from .serializers import (
+    ProjectBulkSerializer,
     ProjectListSerializer,
+    ProjectListFastSerializer,
     ProjectDetailSerializer,
     DataSourceSerializer,
     ReportSerializer,
     AnalyticSerializer,
-    AIIntegrationSerializer
+    AIIntegrationSerializer,
+    fieldset_columns,
+    parse_fieldset,
+)
+from .conditional import (
+    detail_etag,
+    detail_last_modified,
+    list_etag,
 )
+from .search import search_projects
+from .summary import get_project_summary
 
 
 class ProjectViewSet(viewsets.ModelViewSet):
     """
     API endpoint for projects
-    List: GET /api/projects/
-    Detail: GET /api/projects/{id}/
+    List: GET /api/projects/?cursor=&page_size=&fields=
+    Detail: GET /api/projects/{id}/?fields=&include=
     Create: POST /api/projects/
     Update: PUT /api/projects/{id}/
     Delete: DELETE /api/projects/{id}/
+    Search: GET /api/projects/search/?q=&limit=
+    Bulk upsert: POST /api/projects/bulk/
+    Export: GET /api/projects/export/?format=ndjson|csv
     """
     queryset = Project.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+
+    def get_fieldset(self):
+        """
+        (fields, include) requested through ?fields= / ?include= on reads;
+        None means everything
+        """
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = (None, None)
+            if self.action in ('list', 'retrieve'):
+                self._fieldset = parse_fieldset(self.request.query_params, self.get_serializer_class())
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'], context['include'] = self.get_fieldset()
+        return context
+
+    def get_queryset(self):
+        """
+        Build the fetch plan from the serializer in use so nested relations
+        are loaded in one query each instead of once per project. Columns and
+        relations left out by ?fields= / ?include= are never read.
+        """
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        fields, include = self.get_fieldset()
+        select_related = getattr(serializer_class, 'select_related_fields', [])
+        prefetch_related = getattr(serializer_class, 'prefetch_related_fields', [])
+        if include is not None:
+            select_related = [name for name in select_related if name in include]
+            prefetch_related = [name for name in prefetch_related if name in include]
+        if fields is not None and self.action == 'retrieve':
+            needed = fieldset_columns(Project, fields)
+            queryset = queryset.defer(*[
+                field.attname for field in Project._meta.concrete_fields
+                if not field.primary_key and field.attname not in needed
+            ])
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'list':
             return ProjectListSerializer
         return ProjectDetailSerializer
 
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.action in ('list', 'retrieve'):
+            # Let clients keep a copy but always revalidate it with the ETag
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @method_decorator(condition(etag_func=list_etag))
+    @cache_response(tags=lambda request, *args, **kwargs: ["projects:list"])
+    def list(self, request, *args, **kwargs):
+        # Fast path: same payload as ProjectListSerializer, built from values()
+        queryset = self.filter_queryset(self.get_queryset())
+        fields, _include = self.get_fieldset()
+        page = self.paginate_queryset(ProjectListFastSerializer.values(queryset, fields))
+        return self.get_paginated_response(ProjectListFastSerializer.serialize(page, fields))
+
+    @method_decorator(condition(etag_func=detail_etag, last_modified_func=detail_last_modified))
+    @cache_response(tags=lambda request, *args, pk=None, **kwargs: [f"project:{pk}"])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """
         GET /api/projects/summary/
         Returns summary statistics for projects
         """
-        projects = self.get_queryset()
-        total = projects.count()
-        active = projects.filter(status='active').count()
-        completed = projects.filter(status='completed').count()
-        on_hold = projects.filter(status='on_hold').count()
-        planning = projects.filter(status='planning').count()
+        return Response(get_project_summary())
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        GET /api/projects/search/?q=&limit=
+        Ranked full-text search over name, description, full_scope and the
+        names of the project's data sources, reports and analytics
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This query parameter is required.'})
+        limit = get_page_size(request.query_params.get('limit'))
 
-        # Calculate average progress
-        avg_progress = 0
-        if total > 0:
-            total_progress = sum(p.progress for p in projects)
-            avg_progress = round(total_progress / total)
+        ranked = search_projects(query, limit)
+        ranks = dict(ranked)
+        rows = {
+            row['id']: row
+            for row in ProjectListFastSerializer.values(Project.objects.filter(id__in=ranks))
+        }
+        results = []
+        for project_id, rank in ranked:
+            if project_id in rows:
+                item = ProjectListFastSerializer.to_representation(rows[project_id])
+                item['rank'] = round(rank, 6)
+                results.append(item)
+        return Response({'results': results})
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        POST /api/projects/bulk/
+        Create or update many projects, with their nested data sources,
+        reports, analytics and AI integration, keyed by external_id.
+        Body: {"projects": [{"external_id": ..., ...}, ...]}
+        """
+        serializer = ProjectBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        created, updated, ids = bulk_upsert_projects(serializer.validated_data['projects'])
         return Response({
-            'total': total,
-            'active': active,
-            'completed': completed,
-            'on_hold': on_hold,
-            'planning': planning,
-            'average_progress': avg_progress
+            'created': created,
+            'updated': updated,
+            'results': [{'external_id': key, 'id': project_id} for key, project_id in ids.items()],
         })
+
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        GET /api/projects/export/?format=ndjson|csv
+        Every project with its data sources, reports, analytics and AI
+        integration, streamed in keyset-ordered chunks. CSV writes nested
+        values as JSON cells.
+        """
+        renderer = request.accepted_renderer
+        return streaming_response(
+            request._request,
+            renderer.lines(export_projects(self.get_queryset(), self.get_serializer_context())),
+            content_type=renderer.media_type,
+            filename=f"projects.{renderer.format}",
+        )
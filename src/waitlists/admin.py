@@ -1,6 +1,15 @@
 from django.contrib import admin
 
-# Register your models here.
+from helpers.admin import LargeTableAdminMixin
+
 from .models import WaitlistEntry
 
-admin.site.register(WaitlistEntry)
\ No newline at end of file
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['email', 'user', 'timestamp', 'updated']
+    list_select_related = ['user']
+    search_fields = ['email']
+    # A raw id input instead of a <select> of every user
+    raw_id_fields = ['user']
+    readonly_fields = ['timestamp', 'updated']
@@ -1,15 +1,26 @@
-from typing import List
+from typing import List, Literal, Optional
 import json
-from django.shortcuts import get_object_or_404
-from ninja import Router
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import aget_object_or_404
+from ninja import File, Router
+from ninja.errors import HttpError
+from ninja.files import UploadedFile
+from ninja.pagination import paginate
 
 import helpers
+from helpers.pagination import NinjaKeysetPagination
+from helpers.streaming import streaming_response
 from ninja_jwt.authentication import JWTAuth
 
+from .buffer import buffer_signup
 from .forms import WaitlistEntryCreateForm
 from .models import WaitlistEntry
+from .transfer import ImportFileError, export_lines, import_entries
 from .schemas import (
     WaitlistEntryCreateSchema, 
+    WaitlistEntryReceiptSchema,
+    WaitlistImportReportSchema,
     WaitlistEntryListSchema, 
     WaitlistEntryDetailSchema,
     ErrorWaitlistEntryCreateSchema,
@@ -20,9 +31,10 @@ router = Router()
 
 
 
-# /api/waitlists/
+# /api/waitlists/?cursor=&page_size=
 @router.get("", response=List[WaitlistEntryListSchema], auth=helpers.api_auth_user_required)
-def list_wailist_entries(request):
+@paginate(NinjaKeysetPagination, ordering=("-timestamp", "-id"))
+async def list_wailist_entries(request):
     qs = WaitlistEntry.objects.filter(user=request.user)
     return qs
 
@@ -30,28 +42,62 @@ def list_wailist_entries(request):
 @router.post("", 
     response={
         201: WaitlistEntryDetailSchema,
+        202: WaitlistEntryReceiptSchema,
         400: ErrorWaitlistEntryCreateSchema
     },
     auth=helpers.api_auth_user_or_annon
     )
-def create_waitlist_entry(request, data:WaitlistEntryCreateSchema): 
+async def create_waitlist_entry(request, data:WaitlistEntryCreateSchema): 
     form = WaitlistEntryCreateForm(data.dict())
-    if not form.is_valid():
+    # Form validation claims a sign-up slot (cache counter or cap query) in sync code
+    if not await sync_to_async(form.is_valid)():
         # cleaned_data = form.cleaned_data
         # obj = WaitlistEntry(**cleaned_data.dict())
         # {'email': [{'message': 'Cannot use gmail', 'code': ''}]}
         form_errors = json.loads(form.errors.as_json())
         return 400, form_errors
+    if settings.WAITLIST_BUFFERED_INGESTION and not request.user.is_authenticated:
+        # Saved later in a batch; signed-in users are written through so
+        # their own list shows the entry straight away
+        receipt = await sync_to_async(buffer_signup, thread_sensitive=False)(form.cleaned_data["email"])
+        return 202, {"receipt": receipt}
     obj = form.save(commit=False)
     if request.user.is_authenticated:
         obj.user = request.user
-    obj.save()
+    await obj.asave()
     return 201, obj
 
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# /api/waitlists/export/?format=csv
+# Sync handlers: the export streams from a DB cursor, the import is a
+# long-running batch job
+@router.get("export/", auth=helpers.api_auth_staff_required)
+def export_waitlist_entries(request, format: Literal["csv", "ndjson"] = "csv"):
+    return streaming_response(
+        request,
+        export_lines(format),
+        content_type=EXPORT_CONTENT_TYPES[format],
+        filename=f"waitlist.{format}",
+    )
+
+# /api/waitlists/import/?format= (multipart, field "file")
+@router.post("import/", response=WaitlistImportReportSchema, auth=helpers.api_auth_staff_required)
+def import_waitlist_entries(request, file: UploadedFile = File(...), format: Optional[Literal["csv", "ndjson"]] = None):
+    if format is None:
+        format = "ndjson" if file.name.endswith((".ndjson", ".jsonl")) else "csv"
+    try:
+        return import_entries(file, format)
+    except ImportFileError as e:
+        raise HttpError(400, str(e))
+
 # http REVIEW
 @router.get("{entry_id}/", response=WaitlistEntryDetailSchema, auth=helpers.api_auth_user_required)
-def get_wailist_entry(request, entry_id:int):
-    obj = get_object_or_404(
+async def get_wailist_entry(request, entry_id:int):
+    obj = await aget_object_or_404(
         WaitlistEntry, 
         id=entry_id,
         user=request.user)
@@ -59,26 +105,28 @@ def get_wailist_entry(request, entry_id:int):
 
 # http UPDATE
 @router.put("{entry_id}/", response=WaitlistEntryDetailSchema, auth=helpers.api_auth_user_required)
-def update_wailist_entry(request, 
+async def update_wailist_entry(request, 
     entry_id:int, 
     payload:WaitlistEntryUpdateSchema
     ):
-    obj = get_object_or_404(
+    obj = await aget_object_or_404(
         WaitlistEntry, 
         id=entry_id,
         user=request.user)
     payload_dict = payload.dict()
     for k,v in payload_dict.items():
         setattr(obj, k, v)
-    obj.save()
+    await obj.asave()
     return obj
 
 # http DELETE
 @router.delete("{entry_id}/delete/", response=WaitlistEntryDetailSchema, auth=helpers.api_auth_user_required)
-def delete_wailist_entry(request, entry_id:int):
-    obj = get_object_or_404(
+async def delete_wailist_entry(request, entry_id:int):
+    obj = await aget_object_or_404(
         WaitlistEntry, 
         id=entry_id,
         user=request.user)
-    obj.delete()
+    await obj.adelete()
+    # delete() clears the pk; echo back the entry that was removed
+    obj.id = entry_id
     return obj
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+Write-behind buffer for waitlist sign-ups.
+
+With WAITLIST_BUFFERED_INGESTION on, an accepted anonymous sign-up is
+appended to a durable buffer and answered 202 with a receipt; the
+flush_waitlist_buffer task later saves the buffer with batched bulk_create.
+WAITLIST_BUFFER picks the buffer:
+
+* a redis:// URL: a Redis stream (XADD to append, XRANGE + XDEL to drain);
+* a file path: a spool of JSON lines, fsync'ed on every append. The worker
+  that flushes it must share the file system with the web processes.
+
+A flush is published every WAITLIST_BUFFER_BATCH_SIZE appends and runs on
+Celery beat every WAITLIST_BUFFER_FLUSH_INTERVAL seconds. One flush runs at a
+time, under a lock kept next to the buffer (a Redis key, or flock() on a file
+beside the spool). Delivery is at least once: entries keep the time they were
+accepted, so a batch re-read after a crash hits the unique (receipt,
+timestamp) constraint and its saved rows are skipped by the insert itself.
+"""
+import contextlib
+import fcntl
+import functools
+import json
+import logging
+import os
+import uuid
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from helpers.broker import publish
+from helpers.cache import RELEASE_LOCK_SCRIPT
+
+from .models import WaitlistEntry
+
+logger = logging.getLogger(__name__)
+
+APPENDED_KEY = "waitlist-buffer:appended"
+FLUSH_LOCK_TIMEOUT = 300
+
+
+class RedisStreamBuffer:
+    def __init__(self, url, key="waitlist:signups"):
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+        self.lock_key = f"{key}:flushing"
+        self.release_lock = self.client.register_script(RELEASE_LOCK_SCRIPT)
+
+    @contextlib.contextmanager
+    def lock(self):
+        """Yields whether this flush got the lock; it expires if the flush dies"""
+        token = uuid.uuid4().hex
+        locked = self.client.set(self.lock_key, token, nx=True, ex=FLUSH_LOCK_TIMEOUT)
+        try:
+            yield bool(locked)
+        finally:
+            if locked:
+                self.release_lock(keys=[self.lock_key], args=[token])
+
+    def append(self, record):
+        self.client.xadd(self.key, {"record": json.dumps(record)})
+
+    def drain(self, batch_size):
+        """Yield batches of records, deleting each once the consumer asks for the next"""
+        while True:
+            messages = self.client.xrange(self.key, count=batch_size)
+            if not messages:
+                return
+            yield [json.loads(fields[b"record"]) for _id, fields in messages]
+            self.client.xdel(self.key, *[message_id for message_id, _fields in messages])
+
+
+class SpoolFileBuffer:
+    def __init__(self, path):
+        self.path = path
+        self.flushing_path = f"{path}.flushing"
+        self.lock_path = f"{path}.lock"
+
+    @contextlib.contextmanager
+    def lock(self):
+        """Yields whether this flush got the lock; released when the process dies"""
+        with open(self.lock_path, "ab") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+
+    def append(self, record):
+        line = (json.dumps(record) + "\n").encode()
+        while True:
+            with open(self.path, "ab") as spool:
+                fcntl.flock(spool, fcntl.LOCK_EX)
+                try:
+                    current = os.stat(self.path).st_ino
+                except FileNotFoundError:
+                    current = None
+                if os.fstat(spool.fileno()).st_ino != current:
+                    # A flush moved the spool aside while we waited for the lock
+                    continue
+                spool.write(line)
+                spool.flush()
+                os.fsync(spool.fileno())
+                return
+
+    def drain(self, batch_size):
+        """
+        Yield batches of records from the spool, moved aside first so appends
+        carry on into a fresh file. The moved file is deleted once consumed;
+        a flush that dies part way re-reads it from the start next time.
+        """
+        if not os.path.exists(self.flushing_path):
+            try:
+                with open(self.path, "rb") as spool:
+                    fcntl.flock(spool, fcntl.LOCK_EX)
+                    os.rename(self.path, self.flushing_path)
+            except FileNotFoundError:
+                return
+        with open(self.flushing_path, "rb") as flushing:
+            batch = []
+            for line in flushing:
+                batch.append(json.loads(line))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        os.remove(self.flushing_path)
+
+
+@functools.lru_cache(maxsize=None)
+def _buffer_for(location):
+    if location.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStreamBuffer(location)
+    return SpoolFileBuffer(location)
+
+
+def get_buffer():
+    return _buffer_for(settings.WAITLIST_BUFFER)
+
+
+def buffer_signup(email):
+    """Append a validated sign-up to the buffer; returns its receipt"""
+    from .tasks import flush_waitlist_buffer
+
+    receipt = uuid.uuid4().hex
+    get_buffer().append({"receipt": receipt, "email": email, "timestamp": timezone.now().isoformat()})
+
+    cache.add(APPENDED_KEY, 0, timeout=None)
+    if cache.incr(APPENDED_KEY) % settings.WAITLIST_BUFFER_BATCH_SIZE == 0:
+        try:
+            publish(flush_waitlist_buffer)
+        except Exception as e:
+            logger.warning(f"Broker unavailable, waitlist buffer left to the scheduled flush: {e}")
+    return receipt
+
+
+def _save(records):
+    entries = [
+        WaitlistEntry(
+            email=record["email"],
+            receipt=record["receipt"],
+            # Records buffered before they carried their time
+            timestamp=parse_datetime(record["timestamp"]) if "timestamp" in record else timezone.now(),
+        )
+        for record in records
+    ]
+    # Rows saved by an earlier run of the same batch conflict on (receipt, timestamp)
+    WaitlistEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def flush(batch_size=None):
+    """Save everything buffered so far; returns the number of records flushed"""
+    buffer = get_buffer()
+    with buffer.lock() as locked:
+        if not locked:
+            return 0
+        flushed = 0
+        for records in buffer.drain(batch_size or settings.WAITLIST_BUFFER_BATCH_SIZE):
+            _save(records)
+            flushed += len(records)
+        return flushed
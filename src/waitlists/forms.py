@@ -1,5 +1,5 @@
 from django import forms
-from django.utils import timezone
+from .limits import reserve_signup
 from .models import WaitlistEntry
 
 class WaitlistEntryCreateForm(forms.ModelForm):
@@ -10,14 +10,8 @@ class WaitlistEntryCreateForm(forms.ModelForm):
     
     def clean_email(self):
         email = self.cleaned_data.get("email")
-        today = timezone.now().day
-        qs = WaitlistEntry.objects.filter(
-            email=email,
-            timestamp__day=today
-        )
-        if qs.count() >= 5:
+        if not reserve_signup(email):
             raise forms.ValidationError("Cannot enter this email again today.")
         # if email.endswith('@gmail.com'):
         #     raise forms.ValidationError('Cannot use gmail')
         return email
-    
@@ -0,0 +1,78 @@
+"""
+Per-email cap on waitlist sign-ups over a rolling window.
+
+The authoritative check is a range query (email = ? AND timestamp >= now -
+WAITLIST_SIGNUP_WINDOW) served by the (email, timestamp) index, and it stops
+counting at WAITLIST_SIGNUP_CAP rows.
+
+With WAITLIST_SIGNUP_CAP_CACHE on, a counter in the shared cache answers
+first. It is seeded from the query, expires with the window and is bumped
+atomically for every accepted sign-up, so below the cap no query runs. The
+counter can only overcount (entries age out of the window or get deleted
+before it expires); when it reaches the cap the query decides.
+
+With WAITLIST_BUFFERED_INGESTION on, the counter is used whatever
+WAITLIST_SIGNUP_CAP_CACHE says, and it has the last word: buffered sign-ups
+aren't in the table until they are flushed, so the query would let them
+through again. An email refused by an overcounting counter waits for it to
+expire instead.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import WaitlistEntry
+
+KEY_PREFIX = "waitlist-signups:"
+
+
+def recent_signup_count(email):
+    """Sign-ups for the email within the window, counted up to the cap"""
+    since = timezone.now() - timedelta(seconds=settings.WAITLIST_SIGNUP_WINDOW)
+    return (
+        WaitlistEntry.objects.filter(email=email, timestamp__gte=since)
+        .values("pk")[:settings.WAITLIST_SIGNUP_CAP]
+        .count()
+    )
+
+
+def _key(email):
+    return KEY_PREFIX + hashlib.sha256(email.encode()).hexdigest()
+
+
+def reserve_signup(email):
+    """
+    Claim one of the email's sign-ups in the current window; False once the
+    cap is reached. A claimed slot is not handed back if the entry is never
+    saved.
+    """
+    cap = settings.WAITLIST_SIGNUP_CAP
+    buffered = settings.WAITLIST_BUFFERED_INGESTION
+    if not (settings.WAITLIST_SIGNUP_CAP_CACHE or buffered):
+        return recent_signup_count(email) < cap
+
+    key = _key(email)
+    try:
+        claimed = cache.incr(key)
+    except ValueError:
+        # No counter yet: seed it from the database (add() loses to a
+        # concurrent seed, whose value is just as good)
+        cache.add(key, recent_signup_count(email), timeout=settings.WAITLIST_SIGNUP_WINDOW)
+        claimed = cache.incr(key)
+    if claimed <= cap:
+        return True
+    if buffered:
+        cache.decr(key)
+        return False
+
+    # At the cap by the counter's reckoning; older sign-ups may have left
+    # the window since it was seeded
+    count = recent_signup_count(email)
+    if count >= cap:
+        cache.decr(key)
+        return False
+    cache.set(key, count + 1, timeout=settings.WAITLIST_SIGNUP_WINDOW)
+    return True
@@ -0,0 +1,24 @@
+# Generated by Django 5.0 on 2026-10-18 11:50
+
+from django.db import migrations
+
+from helpers.operations import AddTrigramIndexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('waitlists', '0005_waitlistentry_user_timestamp_index'),
+    ]
+
+    operations = [
+        # Admin search (icontains) on PostgreSQL
+        AddTrigramIndexes(
+            model_name='waitlistentry',
+            indexes=[
+                ('waitlists_email_trgm_idx', 'email'),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 11:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+from helpers.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('waitlists', '0006_email_trigram_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='waitlistentry',
+            index=models.Index(fields=['email', 'timestamp'], name='waitlists_w_email_28e8c3_idx'),
+        ),
+    ]
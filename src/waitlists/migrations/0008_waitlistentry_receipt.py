@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waitlists', '0007_waitlistentry_email_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='waitlistentry',
+            name='receipt',
+            field=models.CharField(blank=True, db_index=True, max_length=32, null=True),
+        ),
+    ]
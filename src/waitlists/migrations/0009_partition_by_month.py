@@ -0,0 +1,22 @@
+# Generated by Django 5.0 on 2026-10-18 12:12
+
+# Partitions waitlists_waitlistentry by month on timestamp; see
+# helpers.partitions.partition_by_month. archive_old_records keeps the
+# months coming.
+
+from django.db import migrations
+
+from helpers.operations import PartitionByMonth
+
+
+class Migration(migrations.Migration):
+    # Builds an index CONCURRENTLY, then swaps the table in its own transaction
+    atomic = False
+
+    dependencies = [
+        ('waitlists', '0008_waitlistentry_receipt'),
+    ]
+
+    operations = [
+        PartitionByMonth("waitlistentry", "timestamp", months_ahead=3),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL # "auth.User" 
 
@@ -11,4 +12,20 @@ class WaitlistEntry(models.Model):
     email = models.EmailField()
     description = models.TextField(blank=True, null=True)
     updated = models.DateTimeField(auto_now=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    # A default rather than auto_now_add, so a buffered sign-up keeps the time it was accepted
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+    # Handed out when a buffered sign-up is accepted; lets a re-flushed batch skip rows already saved
+    receipt = models.CharField(max_length=32, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination key for a user's entries
+            models.Index(fields=['user', '-timestamp', '-id']),
+            # Rolling-window sign-up cap per email
+            models.Index(fields=['email', 'timestamp']),
+        ]
+        constraints = [
+            # Unique keys of the partitioned table must include the partition
+            # key; a buffered record is always saved with the same timestamp
+            models.UniqueConstraint(fields=['receipt', 'timestamp'], name='waitlists_receipt_uniq'),
+        ]
\ No newline at end of file
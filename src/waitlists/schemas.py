@@ -9,6 +9,26 @@ class WaitlistEntryCreateSchema(Schema):
     # WaitlistEntryIn
     email: EmailStr
 
+class WaitlistEntryReceiptSchema(Schema):
+    # Buffered create -> accepted, saved later
+    receipt: str
+
+
+class WaitlistImportErrorSchema(Schema):
+    line: int
+    error: str
+
+
+class WaitlistImportReportSchema(Schema):
+    # Import -> how the upload went
+    rows: int
+    created: int
+    failed: int
+    errors: List[WaitlistImportErrorSchema]
+    seconds: float
+    rows_per_second: int
+
+
 class ErrorWaitlistEntryCreateSchema(Schema):
     # Create -> Data
     # WaitlistEntryIn
@@ -0,0 +1,16 @@
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def flush_waitlist_buffer():
+    """Save buffered waitlist sign-ups with batched inserts"""
+    from .buffer import flush
+
+    flushed = flush()
+    if flushed:
+        logger.info(f"Flushed {flushed} buffered waitlist sign-up(s)")
+    return flushed
@@ -1,3 +1,268 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from ninja_jwt.tokens import RefreshToken
+
+from . import buffer
+from .limits import reserve_signup
+from .models import WaitlistEntry
+
+User = get_user_model()
+
+
+class WaitlistAPITestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("waiter", "waiter@example.com", "pw")
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def test_list_is_keyset_paginated(self):
+        WaitlistEntry.objects.bulk_create(
+            [WaitlistEntry(email=f"e{i}@example.com", user=self.user) for i in range(5)]
+        )
+        seen = []
+        url = "/api/waitlists/?page_size=2"
+        while url:
+            response = self.client.get(url, **self.auth)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data["results"]), 2)
+            seen += [entry["id"] for entry in data["results"]]
+            url = data["next"]
+        expected = list(
+            WaitlistEntry.objects.order_by("-timestamp", "-id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_list_rejects_invalid_cursor(self):
+        response = self.client.get("/api/waitlists/?cursor=not-a-cursor", **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"detail": "Invalid cursor"})
+
+    def test_create_get_update_delete(self):
+        response = self.client.post(
+            "/api/waitlists/", {"email": "new@example.com"}, content_type="application/json", **self.auth
+        )
+        self.assertEqual(response.status_code, 201)
+        entry_id = response.json()["id"]
+        self.assertEqual(WaitlistEntry.objects.get(id=entry_id).user, self.user)
+
+        response = self.client.put(
+            f"/api/waitlists/{entry_id}/", {"description": "hi"}, content_type="application/json", **self.auth
+        )
+        self.assertEqual(response.json()["description"], "hi")
+        self.assertEqual(self.client.get(f"/api/waitlists/{entry_id}/", **self.auth).status_code, 200)
+
+        response = self.client.delete(f"/api/waitlists/{entry_id}/delete/", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], entry_id)
+        self.assertFalse(WaitlistEntry.objects.filter(id=entry_id).exists())
+
+    def test_anonymous_create(self):
+        response = self.client.post(
+            "/api/waitlists/", {"email": "anon@example.com"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(WaitlistEntry.objects.get(email="anon@example.com").user)
+        self.assertEqual(self.client.get("/api/waitlists/").status_code, 401)
+
+
+@override_settings(WAITLIST_SIGNUP_CAP=2, WAITLIST_SIGNUP_WINDOW=24 * 60 * 60)
+class WaitlistSignupCapTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def signup(self, email="capped@example.com"):
+        return self.client.post("/api/waitlists/", {"email": email}, content_type="application/json")
+
+    def backdate(self, **delta):
+        WaitlistEntry.objects.update(timestamp=timezone.now() - timedelta(**delta))
+
+    def test_cap_applies_per_email(self):
+        self.assertEqual(self.signup().status_code, 201)
+        self.assertEqual(self.signup().status_code, 201)
+        response = self.signup()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.json())
+        self.assertEqual(self.signup("other@example.com").status_code, 201)
+
+    def test_window_rolls(self):
+        self.signup()
+        self.signup()
+        self.backdate(hours=23)
+        self.assertEqual(self.signup().status_code, 400)
+        self.backdate(hours=25)
+        # The counter still says two; the query finds none in the window
+        self.assertEqual(self.signup().status_code, 201)
+
+    def test_same_day_last_month_does_not_count(self):
+        WaitlistEntry.objects.bulk_create([WaitlistEntry(email="capped@example.com") for _ in range(2)])
+        self.backdate(days=30)
+        self.assertEqual(self.signup().status_code, 201)
+
+    def test_counter_skips_the_query_below_the_cap(self):
+        self.signup()
+        # Only the INSERT
+        with self.assertNumQueries(1):
+            self.assertEqual(self.signup().status_code, 201)
+        # At the cap the query decides
+        with self.assertNumQueries(1):
+            self.assertFalse(reserve_signup("capped@example.com"))
+
+    @override_settings(WAITLIST_SIGNUP_CAP_CACHE=False)
+    def test_without_the_counter(self):
+        WaitlistEntry.objects.bulk_create([WaitlistEntry(email="capped@example.com") for _ in range(2)])
+        with self.assertNumQueries(1):
+            self.assertFalse(reserve_signup("capped@example.com"))
+        self.backdate(days=1, seconds=1)
+        self.assertTrue(reserve_signup("capped@example.com"))
+
+
+class BufferedIngestionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        spool = os.path.join(tempfile.mkdtemp(), "waitlist.spool")
+        self.settings_override = override_settings(
+            WAITLIST_BUFFERED_INGESTION=True, WAITLIST_BUFFER=spool, WAITLIST_BUFFER_BATCH_SIZE=3
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        # Size-triggered flushes are published to the broker
+        publish = mock.patch("waitlists.buffer.publish")
+        self.publish = publish.start()
+        self.addCleanup(publish.stop)
+
+    def signup(self, email, **extra):
+        return self.client.post("/api/waitlists/", {"email": email}, content_type="application/json", **extra)
+
+    def test_anonymous_signup_is_buffered_then_flushed(self):
+        response = self.signup("launch@example.com")
+        self.assertEqual(response.status_code, 202)
+        receipt = response.json()["receipt"]
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+        accepted = timezone.now()
+        # One INSERT; saved receipts are skipped by the unique constraint, not a lookup
+        with self.assertNumQueries(1):
+            self.assertEqual(buffer.flush(), 1)
+        entry = WaitlistEntry.objects.get()
+        self.assertEqual((entry.email, entry.receipt, entry.user), ("launch@example.com", receipt, None))
+        # Timestamped when accepted, not when flushed
+        self.assertLess(entry.timestamp, accepted)
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_flush_is_published_every_batch_size_signups(self):
+        for i in range(7):
+            self.signup(f"l{i}@example.com")
+        self.assertEqual(self.publish.call_count, 2)
+        self.assertEqual(buffer.flush(batch_size=2), 7)
+        self.assertEqual(WaitlistEntry.objects.count(), 7)
+
+    def test_reflushed_batch_skips_saved_receipts(self):
+        self.signup("a@example.com")
+        self.signup("b@example.com")
+        spool = buffer.get_buffer()
+        with mock.patch("os.remove"):
+            # The flush dies before the drained spool is deleted
+            self.assertEqual(buffer.flush(), 2)
+        self.assertTrue(os.path.exists(spool.flushing_path))
+        self.signup("c@example.com")
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(WaitlistEntry.objects.count(), 2)
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(WaitlistEntry.objects.count(), 3)
+
+    def test_one_flush_at_a_time(self):
+        self.signup("a@example.com")
+        with buffer.get_buffer().lock() as locked:
+            self.assertTrue(locked)
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.flush(), 1)
+
+    @override_settings(WAITLIST_SIGNUP_CAP=2, WAITLIST_SIGNUP_CAP_CACHE=False)
+    def test_cap_counts_signups_not_flushed_yet(self):
+        self.assertEqual(self.signup("capped@example.com").status_code, 202)
+        self.assertEqual(self.signup("capped@example.com").status_code, 202)
+        self.assertEqual(self.signup("capped@example.com").status_code, 400)
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_authenticated_signup_reads_its_own_write(self):
+        user = User.objects.create_user("launcher", "launcher@example.com", "pw")
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(user).access_token}"}
+        response = self.signup("mine@example.com", **auth)
+        self.assertEqual(response.status_code, 201)
+        listed = self.client.get("/api/waitlists/", **auth).json()["results"]
+        self.assertEqual([entry["email"] for entry in listed], ["mine@example.com"])
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2, IMPORT_BATCH_SIZE=2)
+class WaitlistTransferTestCase(TestCase):
+    def setUp(self):
+        staff = User.objects.create_user("ops", "ops@example.com", "pw", is_staff=True)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(staff).access_token}"}
+        WaitlistEntry.objects.bulk_create(
+            [WaitlistEntry(email=f"e{i}@example.com", description="x" if i else None) for i in range(5)]
+        )
+
+    def upload(self, name, content, **params):
+        return self.client.post(
+            "/api/waitlists/import/",
+            {"file": SimpleUploadedFile(name, content.encode())},
+            QUERY_STRING="&".join(f"{k}={v}" for k, v in params.items()),
+            **self.auth,
+        )
+
+    def test_staff_only(self):
+        member = User.objects.create_user("member", "member@example.com", "pw")
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {RefreshToken.for_user(member).access_token}"}
+        self.assertEqual(self.client.get("/api/waitlists/export/", **auth).status_code, 403)
+        self.assertEqual(self.client.get("/api/waitlists/export/").status_code, 401)
+
+    def test_csv_export_streams_every_row(self):
+        response = self.client.get("/api/waitlists/export/", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="waitlist.csv"')
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([row["email"] for row in rows], [f"e{i}@example.com" for i in range(5)])
+        self.assertEqual(rows[0]["description"], "")
+
+    async def test_ndjson_export_under_asgi(self):
+        response = await AsyncClient().get(
+            "/api/waitlists/export/?format=ndjson", headers={"Authorization": self.auth["HTTP_AUTHORIZATION"]}
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        records = body.decode().splitlines()
+        self.assertEqual(len(records), 5)
+        self.assertIn('"email":"e4@example.com"', records[-1])
+
+    def test_csv_import_reports_rejected_rows(self):
+        content = "email,description\nnew1@example.com,hi\nnot-an-email,\nnew2@example.com,\nnew3@example.com,\n"
+        response = self.upload("signups.csv", content)
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual((report["rows"], report["created"], report["failed"]), (4, 3, 1))
+        self.assertEqual(report["errors"][0]["line"], 3)
+        self.assertEqual(WaitlistEntry.objects.get(email="new1@example.com").description, "hi")
+        self.assertEqual(WaitlistEntry.objects.count(), 8)
+
+    def test_ndjson_import(self):
+        content = '{"email": "n1@example.com"}\n\n[1]\n{"email": "n2@example.com", "description": "d"}\n{bad\n'
+        report = self.upload("signups.ndjson", content).json()
+        self.assertEqual((report["rows"], report["created"], report["failed"]), (4, 2, 2))
+        self.assertEqual([error["line"] for error in report["errors"]], [3, 5])
+
+    def test_csv_without_email_column(self):
+        response = self.upload("signups.txt", "name\nana\n", format="csv")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(WaitlistEntry.objects.count(), 5)
@@ -0,0 +1,130 @@
+"""
+Bulk export and import of waitlist entries for staff.
+
+Exports stream the table in primary-key order through
+QuerySet.iterator(chunk_size=EXPORT_CHUNK_SIZE). Imports read the uploaded
+file a line at a time (uploads past FILE_UPLOAD_MAX_MEMORY_SIZE are spooled
+to disk by Django), validate each row and bulk_create the valid ones every
+IMPORT_BATCH_SIZE rows, so memory stays flat whatever the file's size. Each
+batch is committed on its own, so an import stopped by an unreadable file
+keeps the batches before it. Imported rows bypass the per-email sign-up cap.
+"""
+import csv
+import io
+import logging
+import time
+
+import orjson
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from helpers.streaming import csv_lines, ndjson_lines
+
+from .models import WaitlistEntry
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = ("id", "email", "description", "user_id", "timestamp", "updated")
+# Row errors kept for the import report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+EMAIL_MAX_LENGTH = WaitlistEntry._meta.get_field("email").max_length
+
+
+def export_lines(format):
+    rows = (
+        WaitlistEntry.objects.order_by("id")
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    if format == "ndjson":
+        return ndjson_lines(dict(zip(EXPORT_FIELDS, row)) for row in rows)
+    return csv_lines(EXPORT_FIELDS, rows)
+
+
+class ImportFileError(ValueError):
+    """The upload can't be read as the given format at all"""
+
+
+def _csv_records(upload):
+    text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        if "email" not in (reader.fieldnames or ()):
+            raise ImportFileError("CSV header must include an 'email' column")
+        for record in reader:
+            yield reader.line_num, record
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ImportFileError(f"Unreadable CSV after line {reader.line_num}: {e}") from e
+    finally:
+        # Leave the upload open for Django to clean up
+        text.detach()
+
+
+def _ndjson_records(upload):
+    for number, line in enumerate(upload, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield number, ValidationError(f"Invalid JSON: {e}")
+            continue
+        yield number, record if isinstance(record, dict) else ValidationError("Expected a JSON object")
+
+
+def _entry(record):
+    if isinstance(record, ValidationError):
+        raise record
+    email, description = record.get("email"), record.get("description")
+    if not isinstance(email, str) or not isinstance(description, (str, type(None))):
+        raise ValidationError("Email and description must be strings")
+    email = email.strip()
+    if len(email) > EMAIL_MAX_LENGTH:
+        raise ValidationError(f"Email longer than {EMAIL_MAX_LENGTH} characters")
+    validate_email(email)
+    return WaitlistEntry(email=email, description=description or None)
+
+
+def import_entries(upload, format):
+    """
+    Validate and save the entries in an uploaded CSV or NDJSON file (an
+    `email` field, optionally `description`); returns a report of the run
+    """
+    records = _ndjson_records(upload) if format == "ndjson" else _csv_records(upload)
+    batch_size = settings.IMPORT_BATCH_SIZE
+    rows = created = failed = 0
+    errors = []
+    batch = []
+    started = time.perf_counter()
+    for line, record in records:
+        rows += 1
+        try:
+            batch.append(_entry(record))
+        except ValidationError as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line, "error": "; ".join(e.messages)})
+            continue
+        if len(batch) == batch_size:
+            WaitlistEntry.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    if batch:
+        WaitlistEntry.objects.bulk_create(batch)
+        created += len(batch)
+    seconds = time.perf_counter() - started
+    report = {
+        "rows": rows,
+        "created": created,
+        "failed": failed,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds) if seconds else rows,
+    }
+    logger.info(
+        f"Waitlist import: {created} of {rows} row(s) created in {seconds:.1f}s "
+        f"({report['rows_per_second']} rows/s), {failed} rejected"
+    )
+    return report